@@ -15,6 +15,16 @@ from db.models.weight import Weight
 from db.models.user_goals import UserGoals
 from db.models.user_settings import UserSettings
 from db.models.nutrient import Nutrient
+from db.models.daily_nutrition_total import DailyNutritionTotal
+from db.models.catalog_version import CatalogVersion
+from db.models.food_association import FoodAssociation
+from db.models.food_occurrence import FoodOccurrence
+from db.models.meal_count import MealCount
+from db.models.recipe import Recipe
+from db.models.recipe_component import RecipeComponent
+from db.models.sync_tombstone import SyncTombstone
+from db.models.idempotency_key import IdempotencyKey
+from db.models.change_event import ChangeEvent
 
 # Import Blueprints
 from routes.food_routes import food_bp
@@ -24,14 +34,26 @@ from routes.weight_routes import weight_bp
 from routes.goals_routes import goals_bp
 from routes.user_settings_routes import user_settings_bp
 from routes.nutrient_routes import nutrient_bp
-# from routes.food_association_routes import food_association_bp
+from routes.diagnostics_routes import diagnostics_bp
+from routes.food_association_routes import food_association_bp
+from routes.event_routes import events_bp
+from routes.recipe_routes import recipe_bp
+from routes.bootstrap_routes import bootstrap_bp
+from routes.sync_routes import sync_bp
+from services.nutrition_rollup_service import NutritionRollupService
+from services.food_search_service import FoodSearchService
+from services.food_association_service import FoodAssociationService
+from services.food_usage_counter import food_usage_counter
+from services.sync_service import SyncService
+from services.idempotency_store import idempotency_store
+from services.event_broker import event_broker
 
 def create_app():
     app = Flask(__name__)
     
     # Configure Flask app from environment variables
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-    app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
     # Configure CORS
     cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000,https://78.47.227.143').split(',')
@@ -40,12 +62,33 @@ def create_app():
          resources={r"/api/*": {
              "origins": cors_origins,
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization"]
+             "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "Idempotency-Key"],
+             "expose_headers": ["ETag", "X-Next-Cursor", "Idempotent-Replayed"]
          }})
 
     
+    # Diary nutrition strategy (DIARY_NUTRITION_MODE=derive|snapshot)
+    if DiaryEntry.NUTRITION_MODE not in DiaryEntry.NUTRITION_MODES:
+        raise ValueError(f"Unknown DIARY_NUTRITION_MODE '{DiaryEntry.NUTRITION_MODE}', "
+                         f"expected one of {list(DiaryEntry.NUTRITION_MODES)}")
+    
     # Initialize database
     init_db(app)
+    
+    # Backfill derived tables (nutrition rollup, search index, food associations) if needed
+    # and prune old sync tombstones and idempotency keys
+    with app.app_context():
+        NutritionRollupService().ensure_backfilled()
+        FoodSearchService().ensure_index()
+        FoodAssociationService().ensure_backfilled()
+        SyncService().prune()
+        idempotency_store.evict()
+    
+    # Write-behind Food.used/last_used counters flush from a timer and at exit
+    food_usage_counter.init_app(app)
+    
+    # Change events reach the streams of every worker through the database
+    event_broker.init_app(app)
 
     migrate = Migrate(app, db)
     
@@ -68,7 +111,12 @@ def create_app():
     app.register_blueprint(goals_bp, url_prefix='/api/goals')
     app.register_blueprint(user_settings_bp, url_prefix='/api')
     app.register_blueprint(nutrient_bp, url_prefix='/api/nutrients')
-    # app.register_blueprint(food_association_bp, url_prefix='/api')
+    app.register_blueprint(diagnostics_bp, url_prefix='/api/diagnostics')
+    app.register_blueprint(food_association_bp, url_prefix='/api/food-associations')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    app.register_blueprint(recipe_bp, url_prefix='/api/recipes')
+    app.register_blueprint(bootstrap_bp, url_prefix='/api/bootstrap')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
     
     # TODO: configure error handlers
     
@@ -80,7 +128,7 @@ if __name__ == "__main__":
     # Get host and port from environment variables
     host = '0.0.0.0'  # Force host to 0.0.0.0 for Docker
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
     # Check if we should use HTTPS (for production)
     use_https = os.getenv('USE_HTTPS', 'False').lower() == 'true'
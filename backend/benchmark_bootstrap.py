@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark af GET /api/bootstrap mod de seks separate requests som
+frontenden lavede ved opstart (mål, indstillinger, dagbog, dagsoversigt,
+motion og vægt).
+
+Opretter en historik i en midlertidig SQLite fil og måler per opstart:
+tid på serveren og antal SQL statements for
+
+  - separat:    de seks GET requests efter hinanden
+  - bootstrap:  ét GET /api/bootstrap?date=
+  - concurrent: ét GET /api/bootstrap?date=&concurrent=1, hvor delene
+                hentes parallelt på hver sin forbindelse
+
+Svarene fra bootstrap sammenlignes med de separate endpoints.
+
+Brug: python benchmark_bootstrap.py [--days 365] [--entries-per-day 20]
+                                    [--requests 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, insert
+from db.database import db
+from db.models.food import Food
+from db.models.exercise import Exercise
+from db.models.weight import Weight
+from db.models.meal_types import MealType
+
+FOOD_COUNT = 500
+
+def seed(client, days, entries_per_day):
+    rng = random.Random(42)
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    food_ids = [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+    start = date.today() - timedelta(days=days - 1)
+    for day in range(days):
+        entries = [{
+            'food_id': rng.choice(food_ids), 'date': (start + timedelta(days=day)).isoformat(),
+            'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+            'amount_grams': rng.randint(10, 300)
+        } for i in range(entries_per_day)]
+        response = client.post('/api/diary/entries/batch', json={'entries': entries})
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+    db.session.execute(insert(Exercise.__table__), [{
+        'name': 'Løb', 'duration_minutes': 30, 'calories_burned': 300,
+        'date': start + timedelta(days=day)
+    } for day in range(0, days, 2)])
+    db.session.execute(insert(Weight.__table__), [{
+        'date': start + timedelta(days=day), 'weight_kg': 80 - day / 100
+    } for day in range(0, days, 7)])
+    db.session.commit()
+
+    response = client.post('/api/goals/', json={
+        'daily_calories': 2100, 'protein_target': 140, 'carbs_target': 230, 'fat_target': 70
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+def separate_urls(day):
+    return {
+        'goals': '/api/goals/',
+        'settings': '/api/api/user-settings',
+        'entries': f'/api/diary/entries?date={day}',
+        'summary': f'/api/diary/summary?date={day}',
+        'exercises': f'/api/exercises/{day}',
+        'weights': '/api/weights/',
+    }
+
+def load_separate(client, day):
+    result = {}
+    for name, url in separate_urls(day).items():
+        response = client.get(url)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        data = response.get_json()
+        result[name] = data['data'] if name in ('goals', 'settings', 'exercises', 'weights') else data
+    return result
+
+def load_bootstrap(client, day, concurrent=False):
+    response = client.get(f'/api/bootstrap?date={day}' + ('&concurrent=1' if concurrent else ''))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+def measure(function, requests):
+    statements = []
+    on_execute = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    timings = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return timings, len(statements) / requests, result
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def without_created_at(data):
+    # Dagbogens created_at er tidspunktet for serialiseringen
+    return dict(data, entries=[dict(entry, created_at=None) for entry in data['entries']])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af GET /api/bootstrap')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--entries-per-day', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        seed(client, args.days, args.entries_per_day)
+        day = date.today().isoformat()
+        print(f"📊 {args.days * args.entries_per_day} indgange over {args.days} dage, "
+              f"{args.requests} opstarter per måling\n")
+
+        results = {}
+        for label, function in (
+            ('separat', lambda: load_separate(client, day)),
+            ('bootstrap', lambda: load_bootstrap(client, day)),
+            ('concurrent', lambda: load_bootstrap(client, day, concurrent=True)),
+        ):
+            timings, statements, results[label] = measure(function, args.requests)
+            requests = 6 if label == 'separat' else 1
+            print(f"{label:<10} | {requests} request(s) | p50 {statistics.median(timings):6.2f}ms "
+                  f"p99 {percentile(timings, 99):6.2f}ms | {statements:4.1f} statements")
+
+        separate = without_created_at(results['separat'])
+        same = all(
+            without_created_at(results[label])[name] == separate[name]
+            for label in ('bootstrap', 'concurrent') for name in separate
+        )
+        print(f"\n{'✅' if same else '❌'} Bootstrap svarer til de separate endpoints")
+        if not same:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark af samtidige skrivninger mod SQLite med hver database profil.
+
+Starter et antal processer der samtidigt opretter dagbogsindgange via
+POST /api/diary/entries, mens andre processer læser dagen og summary.
+Tæller "database is locked" fejl, andre fejl, throughput og latency.
+
+Brug: python benchmark_db_writers.py [--writers 8] [--readers 4] [--entries 200]
+                                     [--profiles development,production]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from db.models.meal_types import MealType
+
+FOOD_COUNT = 200
+TARGET_DATE = '2025-01-15'
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def seed_database():
+    from app import create_app
+    from db.database import db
+    from db.models.food import Food
+
+    app = create_app()
+    now = datetime.now()
+    with app.app_context():
+        db.session.add_all([
+            Food(name=f'Benchmark fødevare {i}', category='benchmark', calories=100 + i,
+                 protein=10, carbohydrates=20, fat=5, used=0, created_at=now, updated_at=now)
+            for i in range(FOOD_COUNT)
+        ])
+        db.session.commit()
+        food_ids = [food.id for food in Food.query.all()]
+        db.engine.dispose()
+    return food_ids
+
+def worker(role, count, food_ids, barrier, results, seed):
+    from app import create_app
+
+    rng = random.Random(seed)
+    client = create_app().test_client()
+    stats = {'role': role, 'ok': 0, 'locked': 0, 'errors': 0, 'latencies': [], 'samples': []}
+
+    barrier.wait()
+    run_started = time.perf_counter()
+    for _ in range(count):
+        started = time.perf_counter()
+        if role == 'writer':
+            response = client.post('/api/diary/entries', json={
+                'food_id': rng.choice(food_ids),
+                'date': TARGET_DATE,
+                'meal_type': rng.choice(MealType.CORE_TYPES),
+                'amount_grams': rng.randint(10, 300)
+            })
+        elif rng.random() < 0.5:
+            response = client.get(f'/api/diary/entries?date={TARGET_DATE}')
+        else:
+            response = client.get(f'/api/diary/summary?date={TARGET_DATE}')
+        stats['latencies'].append((time.perf_counter() - started) * 1000)
+
+        if response.status_code < 400:
+            stats['ok'] += 1
+            continue
+
+        body = response.get_data(as_text=True)
+        if 'locked' in body or 'busy' in body:
+            stats['locked'] += 1
+        else:
+            stats['errors'] += 1
+            if len(stats['samples']) < 3:
+                stats['samples'].append(body[:200])
+
+    stats['elapsed'] = time.perf_counter() - run_started
+    results.put(stats)
+
+def run_profile(profile, writers, readers, entries):
+    db_file = Path(tempfile.mkdtemp()) / 'benchmark.db'
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    os.environ['DB_PROFILE'] = profile
+    os.environ['FLASK_DEBUG'] = 'False'
+
+    # Seed i en separat proces, så ingen forbindelser arves af workers
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        food_ids = pool.apply(seed_database)
+
+    barrier = ctx.Barrier(writers + readers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=('writer', entries, food_ids, barrier, results, i))
+        for i in range(writers)
+    ] + [
+        ctx.Process(target=worker, args=('reader', entries, food_ids, barrier, results, 1000 + i))
+        for i in range(readers)
+    ]
+
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    # Tid fra barrieren, uden opstart af processerne
+    elapsed = max(s['elapsed'] for s in stats)
+
+    for role in ('writer', 'reader'):
+        role_stats = [s for s in stats if s['role'] == role]
+        if not role_stats:
+            continue
+        ok = sum(s['ok'] for s in role_stats)
+        locked = sum(s['locked'] for s in role_stats)
+        errors = sum(s['errors'] for s in role_stats)
+        latencies = [l for s in role_stats for l in s['latencies']]
+        print(
+            f"{profile:<12} {role:<7} | ok {ok:>6} | locked {locked:>5} | andre fejl {errors:>4} "
+            f"| {ok / elapsed:7.1f} req/s "
+            f"| p50 {percentile(latencies, 50):7.1f}ms p99 {percentile(latencies, 99):7.1f}ms"
+        )
+        for s in role_stats:
+            for sample in s['samples']:
+                print(f"   ⚠️  {sample}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark samtidige skrivninger per database profil')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--entries', type=int, default=200, help='Requests per proces')
+    parser.add_argument('--profiles', default='development,production')
+    args = parser.parse_args()
+
+    print(f"📊 {args.writers} skrivere og {args.readers} læsere, {args.entries} requests hver")
+    for profile in args.profiles.split(','):
+        run_profile(profile, args.writers, args.readers, args.entries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark af et helt måltid logget som enkelte POST /api/diary/entries,
+som ét POST /api/diary/entries/batch og kopieret med POST /api/diary/copy.
+
+Kører mod en midlertidig SQLite fil (med fsync ved commit) og tæller
+SQL statements og commits per måltid.
+
+Brug: python benchmark_diary_batch.py [--meals 200] [--foods-per-meal 8]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, insert
+from db.database import db
+from db.models.food import Food
+from db.models.meal_types import MealType
+
+FOOD_COUNT = 500
+
+def seed_foods():
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def meals(food_ids, count, foods_per_meal, start):
+    rng = random.Random(42)
+    for i in range(count):
+        day = (start + timedelta(days=i // len(MealType.CORE_TYPES))).isoformat()
+        meal_type = MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)]
+        yield [{
+            'food_id': food_id, 'date': day, 'meal_type': meal_type,
+            'amount_grams': rng.randint(10, 300)
+        } for food_id in rng.sample(food_ids, foods_per_meal)]
+
+def run(client, label, batches, log_meal):
+    statements = []
+    commits = []
+    engine = db.engine
+    on_execute = lambda *args: statements.append(1)
+    on_commit = lambda conn: commits.append(1)
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    event.listen(engine, 'commit', on_commit)
+
+    timings = []
+    try:
+        for meal in batches:
+            started = time.perf_counter()
+            log_meal(client, meal)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+        event.remove(engine, 'commit', on_commit)
+
+    print(f"{label:<14} | median {statistics.median(timings):7.2f}ms per måltid "
+          f"| {len(statements) / len(timings):5.1f} statements | {len(commits) / len(timings):4.1f} commits")
+
+def log_single(client, meal):
+    for item in meal:
+        response = client.post('/api/diary/entries', json=item)
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+def log_batch(client, meal):
+    response = client.post('/api/diary/entries/batch', json={'entries': meal})
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+def copy_meal(client, meal):
+    # Kopier det batch-loggede måltid to år frem
+    source = meal[0]
+    target = date.fromisoformat(source['date']) + timedelta(days=730)
+    response = client.post('/api/diary/copy', json={
+        'from': source['date'], 'to': target.isoformat(), 'meal_type': source['meal_type']
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af batch dagbogsskrivning')
+    parser.add_argument('--meals', type=int, default=200)
+    parser.add_argument('--foods-per-meal', type=int, default=8)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids = seed_foods()
+        print(f"📊 {args.meals} måltider med {args.foods_per_meal} fødevarer hver")
+        # Forskellige datoer, så begge varianter skriver til tomme måltider
+        run(client, 'enkelte POST', meals(food_ids, args.meals, args.foods_per_meal, date(2020, 1, 1)), log_single)
+        run(client, 'batch POST', meals(food_ids, args.meals, args.foods_per_meal, date(2022, 1, 1)), log_batch)
+        run(client, 'kopi af måltid', meals(food_ids, args.meals, args.foods_per_meal, date(2022, 1, 1)), copy_meal)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark af dag-opslag med og uden indexes på diary, exercise, weight og foods.
+
+Opretter 5 års syntetiske data i en midlertidig SQLite database og måler
+de forespørgsler routes og services bruger, først uden og derefter med
+indexes fra migrationen 3f1c2a9b7d10. Query planen vises for hver.
+
+Brug: python benchmark_diary_indexes.py [--years 5] [--entries-per-day 20] [--foods 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import insert, text
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.exercise import Exercise
+from db.models.weight import Weight
+from db.models.meal_types import MealType
+from services.exercise_service import ExerciseService
+from services.weight_service import WeightService
+
+INDEX_NAMES = [
+    'idx_diary_entries_date_meal',
+    'idx_diary_entries_food_date',
+    'idx_exercises_date',
+    'idx_weights_date',
+    'idx_foods_used',
+    'idx_foods_last_used',
+]
+
+REPEATS = 50
+
+def seed(years, entries_per_day, food_count):
+    rng = random.Random(42)
+    now = datetime.now()
+    end = date.today()
+    start = end - timedelta(days=365 * years)
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': rng.uniform(20, 600),
+        'protein': 10, 'carbohydrates': 20, 'fat': 5,
+        'used': int(rng.paretovariate(1.2)) - 1,
+        'last_used': int(time.time()) - rng.randint(0, 365 * 86400) if rng.random() < 0.3 else None,
+        'created_at': now, 'updated_at': now
+    } for i in range(food_count)])
+
+    entries = []
+    for day in days:
+        for _ in range(entries_per_day):
+            entries.append({
+                'date': day,
+                'meal_type': rng.choice(MealType.CORE_TYPES),
+                'food_id': rng.randint(1, food_count),
+                'grams': rng.randint(10, 400)
+            })
+        if len(entries) >= 50000:
+            db.session.execute(insert(DiaryEntry.__table__), entries)
+            entries = []
+    if entries:
+        db.session.execute(insert(DiaryEntry.__table__), entries)
+
+    db.session.execute(insert(Exercise.__table__), [{
+        'name': rng.choice(['Løb', 'Cykling', 'Svømning']), 'duration_minutes': 30,
+        'calories_burned': 300, 'date': day
+    } for day in days for _ in range(rng.randint(0, 2))])
+    db.session.execute(insert(Weight.__table__), [
+        {'date': day, 'weight_kg': 80 + rng.uniform(-5, 5)} for day in days
+    ])
+    db.session.commit()
+    return days
+
+def queries(days, food_count):
+    rng = random.Random(7)
+    exercise_service = ExerciseService()
+    weight_service = WeightService()
+
+    def diary_day():
+        day = rng.choice(days)
+        return db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.date == day).all()
+
+    def diary_meal():
+        day = rng.choice(days)
+        return db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.date == day, DiaryEntry.meal_type == MealType.LUNCH).all()
+
+    def food_history():
+        return db.session.query(DiaryEntry.date).filter(
+            DiaryEntry.food_id == rng.randint(1, food_count)
+        ).distinct().all()
+
+    def exercises_day():
+        return exercise_service.get_exercises_by_date(rng.choice(days))
+
+    def weights_recent():
+        return Weight.query.order_by(Weight.date.desc()).limit(30).all()
+
+    def weights_all():
+        return weight_service.get_weights()
+
+    def recent_foods():
+        return Food.query.filter(
+            Food.last_used.isnot(None),
+            Food.used > 0
+        ).order_by(Food.last_used.desc()).limit(20).all()
+
+    return [
+        ('diary dag (GET /entries)', diary_day, "SELECT * FROM diary_entries WHERE date = '2024-01-01'"),
+        ('diary dag + måltid', diary_meal,
+         "SELECT * FROM diary_entries WHERE date = '2024-01-01' AND meal_type = 'frokost'"),
+        ('fødevare historik', food_history, "SELECT DISTINCT date FROM diary_entries WHERE food_id = 1"),
+        ('motion dag', exercises_day, "SELECT * FROM exercises WHERE date = '2024-01-01'"),
+        ('vægt seneste 30', weights_recent, "SELECT * FROM weights ORDER BY date DESC LIMIT 30"),
+        ('vægt alle (get_weights)', weights_all, "SELECT * FROM weights ORDER BY date DESC"),
+        ('seneste fødevarer', recent_foods,
+         "SELECT * FROM foods WHERE last_used IS NOT NULL AND used > 0 ORDER BY last_used DESC LIMIT 20"),
+    ]
+
+def measure(query):
+    timings = []
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        query()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def query_plan(sql):
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return '; '.join(row[-1] for row in rows)
+
+def drop_indexes():
+    for name in INDEX_NAMES:
+        db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    db.session.commit()
+
+def create_indexes():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in INDEX_NAMES:
+                index.create(db.engine, checkfirst=True)
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af hot column indexes')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--entries-per-day', type=int, default=20)
+    parser.add_argument('--foods', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        days = seed(args.years, args.entries_per_day, args.foods)
+        entry_count = DiaryEntry.query.count()
+        print(f"📊 {len(days)} dage, {entry_count} dagbogsindgange, {args.foods} fødevarer "
+              f"(seedet på {time.perf_counter() - started:.1f}s)")
+
+        results = {}
+        for label, setup in (('uden', drop_indexes), ('med', create_indexes)):
+            setup()
+            for name, query, sql in queries(days, args.foods):
+                results.setdefault(name, {})[label] = (measure(query), query_plan(sql))
+
+        print(f"\n{'Forespørgsel':<26} {'uden':>10} {'med':>10} {'faktor':>8}")
+        for name, result in results.items():
+            before, after = result['uden'][0], result['med'][0]
+            print(f"{name:<26} {before:>8.3f}ms {after:>8.3f}ms {before / after if after else 0:>7.1f}x")
+
+        print("\nQuery planer (uden -> med):")
+        for name, result in results.items():
+            print(f"  {name}:\n    {result['uden'][1]}\n    {result['med'][1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark af de to strategier for dagbogens næringsindhold
+(DIARY_NUTRITION_MODE): 'derive' beregner fra fødevaren ved læsning,
+'snapshot' gemmer værdierne på indgangen når den skrives.
+
+For hver strategi logges den samme historik i sit eget datointerval i en
+midlertidig SQLite fil, og der måles:
+
+  - skrivning: enkelte POST /api/diary/entries og batch POST
+  - læsning: GET /api/diary/entries for en dag
+  - aggregering over hele historikken direkte fra diary_entries
+    (det rollup genopbygningen og genberegninger kører)
+  - ændring af en populær fødevare (PUT /api/foods/<id>), som i derive
+    mode genberegner alle dage fødevaren er logget og i snapshot mode kun
+    dage med indgange uden snapshot
+
+Til sidst tjekkes at rollup tabellen svarer til en fuld genopbygning.
+
+Brug: python benchmark_diary_nutrition_modes.py [--days 365] [--foods-per-meal 5]
+                                                [--requests 300]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, insert
+from db.database import db
+from db.models.food import Food
+from db.models.daily_nutrition_total import DailyNutritionTotal
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from services.nutrition_rollup_service import NutritionRollupService
+
+FOOD_COUNT = 500
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def seed_foods():
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def count_statements(function):
+    statements = []
+    on_execute = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        started = time.perf_counter()
+        function()
+        return (time.perf_counter() - started) * 1000, len(statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+def run_mode(client, mode, start, args, food_ids):
+    DiaryEntry.NUTRITION_MODE = mode
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(len(food_ids))]
+    days = [start + timedelta(days=i) for i in range(args.days)]
+
+    # Skrivning: hvert måltid som én batch, den første uge som enkelte POST
+    batch_timings, single_timings = [], []
+    for day_index, day in enumerate(days):
+        for meal_type in MealType.CORE_TYPES:
+            entries = [{
+                'food_id': food_id, 'date': day.isoformat(), 'meal_type': meal_type,
+                'amount_grams': rng.randint(10, 300)
+            } for food_id in rng.choices(food_ids, weights, k=args.foods_per_meal)]
+
+            if day_index < 7:
+                for entry in entries:
+                    started = time.perf_counter()
+                    response = client.post('/api/diary/entries', json=entry)
+                    single_timings.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 201, response.get_data(as_text=True)
+            else:
+                started = time.perf_counter()
+                response = client.post('/api/diary/entries/batch', json={'entries': entries})
+                batch_timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 201, response.get_data(as_text=True)
+
+    read_timings = []
+    for _ in range(args.requests):
+        day = rng.choice(days)
+        started = time.perf_counter()
+        response = client.get(f'/api/diary/entries?date={day.isoformat()}')
+        read_timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    service = NutritionRollupService()
+    aggregate_ms = min(
+        count_statements(lambda: service._aggregate_rows(days))[0] for _ in range(3)
+    )
+
+    food_edit_ms, food_edit_statements = count_statements(
+        lambda: client.put(f'/api/foods/{food_ids[0]}', json={'calories': rng.randint(50, 500)})
+    )
+
+    print(f"{mode:<9} | enkelt POST p50 {statistics.median(single_timings):6.2f}ms "
+          f"| batch p50 {statistics.median(batch_timings):6.2f}ms "
+          f"| dag GET p50 {percentile(read_timings, 50):5.2f}ms p99 {percentile(read_timings, 99):5.2f}ms "
+          f"| aggregering {aggregate_ms:6.1f}ms "
+          f"| fødevareændring {food_edit_ms:6.1f}ms ({food_edit_statements} statements)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af derive og snapshot strategierne')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--foods-per-meal', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids = seed_foods()
+        entries = args.days * len(MealType.CORE_TYPES) * args.foods_per_meal
+        print(f"📊 {entries} indgange over {args.days} dage per strategi\n")
+
+        # Hver strategi får sine egne fødevarer, så en fødevareændring kun
+        # rammer den strategis historik
+        half = len(food_ids) // 2
+        run_mode(client, 'derive', date(2020, 1, 1), args, food_ids[:half])
+        run_mode(client, 'snapshot', date(2022, 1, 1), args, food_ids[half:])
+
+        # Rollup skal stemme med en fuld genopbygning; den bruger snapshots
+        # hvor de findes, så begge datointervaller tjekkes i snapshot mode
+        totals = lambda: sorted(
+            (row.date, row.meal_type, row.entry_count, round(row.calories, 6))
+            for row in DailyNutritionTotal.query.filter(DailyNutritionTotal.entry_count > 0)
+        )
+        stored = totals()
+        NutritionRollupService().rebuild()
+        db.session.commit()
+        status = '✅' if stored == totals() else '❌'
+        print(f"\n{status} Rollup svarer til en fuld genopbygning")
+        if stored != totals():
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
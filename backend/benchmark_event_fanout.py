@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Fan-out benchmark af Server-Sent Events (GET /api/events/stream).
+
+Et antal abonnenter forbinder samtidigt, og en udgiver sender events med
+et tidsstempel i payload. Hver abonnent måler tiden fra publish til
+modtagelse. Rapporterer leveringslatens (p50/p99/maks), leveringer per
+sekund og hvad publish koster udgiveren.
+
+  --mode broker   abonnenter læser event_broker.listen() direkte i tråde
+  --mode http     abonnenter forbinder over HTTP til en trådet WSGI server;
+                  events går gennem change_events tabellen som under gunicorn
+
+Brug: python benchmark_event_fanout.py [--subscribers 1000] [--events 200]
+                                       [--rate 50] [--mode broker|http]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from services.event_broker import event_broker
+
+HOST = '127.0.0.1'
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def read_frames(chunks, events, latencies, ready):
+    """Parse SSE frames fra chunks og gem latens for hvert benchmark event."""
+    received = 0
+    buffer = ''
+    ready.release()
+    for chunk in chunks:
+        buffer += chunk
+        while '\n\n' in buffer:
+            frame, buffer = buffer.split('\n\n', 1)
+            for line in frame.split('\n'):
+                if line.startswith('data: '):
+                    payload = json.loads(line[6:])['payload']
+                    latencies.append((time.perf_counter() - payload['sent']) * 1000)
+                    received += 1
+        if received >= events:
+            return
+
+def broker_subscriber(events, latencies, ready):
+    read_frames(event_broker.listen(), events, latencies, ready)
+
+def http_subscriber(port, events, latencies, ready):
+    connection = http.client.HTTPConnection(HOST, port, timeout=60)
+    connection.request('GET', '/api/events/stream')
+    response = connection.getresponse()
+
+    def chunks():
+        while True:
+            line = response.fp.readline()
+            if not line:
+                return
+            yield line.decode('utf-8')
+
+    try:
+        read_frames(chunks(), events, latencies, ready)
+    finally:
+        connection.close()
+
+def start_http_server(port):
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    server = make_server(HOST, port, create_app(), threaded=True)
+    server.socket.listen(4096)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Fan-out benchmark af SSE events')
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=50, help='Events per sekund')
+    parser.add_argument('--mode', choices=['broker', 'http'], default='broker')
+    parser.add_argument('--port', type=int, default=5066)
+    args = parser.parse_args()
+
+    threading.stack_size(256 * 1024)
+    server = start_http_server(args.port) if args.mode == 'http' else None
+
+    results = [[] for _ in range(args.subscribers)]
+    ready = threading.Semaphore(0)
+    threads = []
+    started = time.perf_counter()
+    for i in range(args.subscribers):
+        if args.mode == 'http':
+            target, target_args = http_subscriber, (args.port, args.events, results[i], ready)
+        else:
+            target, target_args = broker_subscriber, (args.events, results[i], ready)
+        thread = threading.Thread(target=target, args=target_args, daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    for _ in range(args.subscribers):
+        ready.acquire()
+    # Vent til alle abonnenter er registreret i brokeren
+    while event_broker.subscribers < args.subscribers:
+        time.sleep(0.05)
+    print(f"📡 {args.subscribers} abonnenter ({args.mode}) forbundet på "
+          f"{time.perf_counter() - started:.1f}s")
+
+    publish_costs = []
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for i in range(args.events):
+        sent = time.perf_counter()
+        event_broker.publish('benchmark', {'sequence': i, 'sent': sent})
+        publish_costs.append((time.perf_counter() - sent) * 1000)
+        time.sleep(max(0.0, started + (i + 1) * interval - time.perf_counter()))
+
+    for thread in threads:
+        thread.join(timeout=60)
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for result in results for latency in result]
+    expected = args.subscribers * args.events
+    print(f"📨 {len(latencies)}/{expected} leveringer på {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.0f} leveringer/s)")
+    print(f"   latens: p50 {percentile(latencies, 50):.1f}ms p99 {percentile(latencies, 99):.1f}ms "
+          f"maks {max(latencies, default=0):.1f}ms")
+    print(f"   publish: p50 {percentile(publish_costs, 50) * 1000:.0f}µs "
+          f"p99 {percentile(publish_costs, 99) * 1000:.0f}µs")
+
+    if server:
+        server.shutdown()
+    if len(latencies) != expected:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark af de inkrementelle food association tællere og anbefalingsindexet.
+
+Simulerer et års måltider i en midlertidig SQLite database. Hver
+dagbogsindgang oprettes og tælles via FoodAssociationService i samme
+transaktion, ligesom POST /api/diary/entries gør. Derefter måles
+indlæsning af food_recommendation_index og opslag i det, og tællerne
+sammenlignes med en fuld genoptælling fra diary_entries.
+
+Brug: python benchmark_food_recommendations.py [--days 365] [--foods 2000]
+                                               [--foods-per-meal 6] [--lookups 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import combinations
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import insert
+from db.database import db
+from db.models.food import Food
+from db.models.food_association import FoodAssociation
+from db.models.food_occurrence import FoodOccurrence
+from db.models.meal_count import MealCount
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from services.food_association_service import FoodAssociationService
+from services.food_recommendation_index import FoodRecommendationIndex
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def seed_foods(food_count):
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(food_count)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def log_meals(days, food_ids, foods_per_meal):
+    """Opret måltider én indgang ad gangen og mål hver skrivning."""
+    rng = random.Random(42)
+    service = FoodAssociationService()
+    # Få populære fødevarer, så nogle par går igen på tværs af måltider
+    weights = [1 / (rank + 1) for rank in range(len(food_ids))]
+    start = date.today() - timedelta(days=days)
+
+    timings = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for meal_type in MealType.CORE_TYPES:
+            meal = rng.choices(food_ids, weights, k=rng.randint(1, foods_per_meal))
+            for food_id in meal:
+                started = time.perf_counter()
+                entry = DiaryEntry(food_id=food_id, date=day, meal_type=meal_type,
+                                   grams=rng.randint(10, 300))
+                db.session.add(entry)
+                service.add_entry(entry)
+                db.session.commit()
+                timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def recount():
+    """Tæl måltider, fødevarer og par forfra fra diary_entries."""
+    meals = {}
+    for day, meal_type, food_id in db.session.query(
+        DiaryEntry.date, DiaryEntry.meal_type, DiaryEntry.food_id
+    ).yield_per(10000):
+        meals.setdefault((day, meal_type), set()).add(food_id)
+
+    meal_counts, occurrences, pairs = Counter(), Counter(), Counter()
+    for (_, meal_type), foods in meals.items():
+        meal_counts[meal_type] += 1
+        for food_id in foods:
+            occurrences[(meal_type, food_id)] += 1
+        for food1_id, food2_id in combinations(sorted(foods), 2):
+            pairs[(meal_type, food1_id, food2_id)] += 1
+    return meal_counts, occurrences, pairs
+
+def stored():
+    meal_counts = Counter(dict(db.session.query(MealCount.meal_type, MealCount.meal_count).all()))
+    occurrences = Counter({
+        (meal_type, food_id): count for meal_type, food_id, count in db.session.query(
+            FoodOccurrence.meal_type, FoodOccurrence.food_id, FoodOccurrence.meal_count
+        )
+    })
+    pairs = Counter({
+        (meal_type, food1_id, food2_id): count for meal_type, food1_id, food2_id, count in db.session.query(
+            FoodAssociation.meal_type, FoodAssociation.food1_id,
+            FoodAssociation.food2_id, FoodAssociation.co_occurrence_count
+        )
+    })
+    return meal_counts, occurrences, pairs
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af food association tællere')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--foods', type=int, default=2000)
+    parser.add_argument('--foods-per-meal', type=int, default=6)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        food_ids = seed_foods(args.foods)
+
+        started = time.perf_counter()
+        timings = log_meals(args.days, food_ids, args.foods_per_meal)
+        elapsed = time.perf_counter() - started
+        print(f"📊 {len(timings)} dagbogsindgange over {args.days} dage på {elapsed:.1f}s")
+        print(f"   skrivning inkl. tællere: p50 {percentile(timings, 50):.2f}ms "
+              f"p99 {percentile(timings, 99):.2f}ms")
+        print(f"   første og sidste måned: p50 {statistics.median(timings[:len(timings) // 12]):.2f}ms "
+              f"-> {statistics.median(timings[-len(timings) // 12:]):.2f}ms")
+
+        index = FoodRecommendationIndex()
+        started = time.perf_counter()
+        index.load_from_db()
+        print(f"\n📥 Index indlæst på {(time.perf_counter() - started) * 1000:.1f}ms: {index.stats()}")
+
+        rng = random.Random(7)
+        lookups = []
+        for _ in range(args.lookups):
+            food_id = rng.choice(food_ids[:200])
+            meal_type = rng.choice(MealType.CORE_TYPES)
+            started = time.perf_counter()
+            index.recommend(food_id, meal_type, limit=5, min_confidence=0.1)
+            lookups.append((time.perf_counter() - started) * 1000)
+        print(f"🔎 {args.lookups} anbefalinger: p50 {percentile(lookups, 50) * 1000:.1f}µs "
+              f"p99 {percentile(lookups, 99) * 1000:.1f}µs")
+
+        started = time.perf_counter()
+        expected = recount()
+        recount_ms = (time.perf_counter() - started) * 1000
+        actual = stored()
+        names = ('måltider', 'fødevarer', 'par')
+        print(f"\n🧮 Fuld genoptælling tog {recount_ms:.0f}ms")
+        for name, want, have in zip(names, expected, actual):
+            status = '✅' if want == have else '❌'
+            print(f"   {status} {name}: {len(have)} tællere")
+
+        if expected != actual:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark af FoodSuggestIndex: opbygningstid, p50/p99 latency og RSS
+for 10k, 100k og 1M syntetiske fødevarer.
+
+Brug: python benchmark_food_suggest.py [--sizes 10000,100000,1000000] [--budget-mb 512]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from services.food_suggest_index import FoodSuggestIndex
+
+WORDS = [
+    'kylling', 'bryst', 'rugbrød', 'smør', 'mælk', 'ost', 'yoghurt', 'blåbær',
+    'jordbær', 'æble', 'pære', 'laks', 'torsk', 'havregryn', 'ris', 'pasta',
+    'tomat', 'agurk', 'løg', 'kartoffel', 'skinke', 'pålæg', 'leverpostej',
+    'müsli', 'granola', 'kaffe', 'juice', 'hakket', 'oksekød', 'svinekød',
+    'mørk', 'chokolade', 'hvidløg', 'peberfrugt', 'spinat', 'broccoli'
+]
+BRANDS = ['arla', 'lurpak', 'salling', 'coop', 'änglamark', 'øko', '', '']
+
+def rss_mb():
+    """Nuværende resident set size i MB (Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        import resource
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ImportError):
+        return float('nan')
+
+def synthetic_foods(count, rng):
+    for food_id in range(1, count + 1):
+        name = ' '.join(rng.sample(WORDS, rng.randint(1, 3))) + f' {food_id}'
+        yield food_id, name, rng.choice(BRANDS) or None, int(rng.paretovariate(1.5)) - 1
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def bench(count, budget_mb, queries=2000):
+    rng = random.Random(count)
+    gc.collect()
+    rss_before = rss_mb()
+
+    index = FoodSuggestIndex(memory_budget_mb=budget_mb)
+    started = time.perf_counter()
+    index.build(list(synthetic_foods(count, rng)))
+    build_seconds = time.perf_counter() - started
+
+    gc.collect()
+    rss_after = rss_mb()
+
+    prefixes = []
+    for _ in range(queries):
+        word = rng.choice(WORDS)
+        prefixes.append(word[:rng.randint(1, len(word))])
+
+    latencies = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    stats = index.stats()
+    print(
+        f"{count:>9,} foods | indexed {stats['foods']:>9,} "
+        f"| build {build_seconds:6.2f}s "
+        f"| p50 {percentile(latencies, 50):6.3f}ms p99 {percentile(latencies, 99):6.3f}ms "
+        f"| RSS +{rss_after - rss_before:7.1f}MB"
+        f"{' (truncated by budget)' if stats['truncated'] else ''}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark food suggest index')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--budget-mb', type=float, default=2048)
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        bench(size, args.budget_mb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark af forbrugstællerne på fødevarer (Food.used og Food.last_used).
+
+Et antal tråde logger samtidig dagbogsindgange på nogle få populære
+fødevarer i en midlertidig SQLite fil, på to måder:
+
+  - direct:   hver indgang læser fødevaren og skriver used + 1 tilbage i
+              samme transaktion, som POST /api/diary/entries gjorde før
+  - buffered: hver indgang kalder food_usage_counter.add, og tællerne
+              skrives samlet med atomiske `used = used + n` opdateringer
+
+Til sidst sammenlignes summen af Food.used med antallet af indgange:
+forskellen er tabte opdateringer. Fejl (fx "database is locked") tælles
+for sig.
+
+Brug: python benchmark_food_usage_counter.py [--threads 8] [--entries 200]
+                                             [--foods 5] [--mode begge]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import func, insert
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from services.food_usage_counter import food_usage_counter
+
+def seed_foods(count):
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Populær {i}', 'category': 'benchmark', 'calories': 100,
+        'used': 0, 'created_at': now, 'updated_at': now
+    } for i in range(count)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def log_direct(food_id):
+    """Den gamle måde: læs tælleren og skriv den tilbage."""
+    food = db.session.get(Food, food_id)
+    db.session.add(DiaryEntry(food_id=food_id, date=date(2024, 1, 1), meal_type='frokost', grams=100))
+    food.used = (food.used or 0) + 1
+    food.last_used = int(time.time())
+    db.session.commit()
+
+def log_buffered(food_id):
+    db.session.add(DiaryEntry(food_id=food_id, date=date(2024, 1, 1), meal_type='frokost', grams=100))
+    food_usage_counter.add(db.session, food_id)
+    db.session.commit()
+    food_usage_counter.flush_if_due()
+
+def run(app, mode, food_ids, threads, entries):
+    log = log_direct if mode == 'direct' else log_buffered
+    errors = []
+
+    def worker(index):
+        with app.app_context():
+            for i in range(entries):
+                try:
+                    log(food_ids[(index + i) % len(food_ids)])
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    with app.app_context():
+        food_usage_counter.flush()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        logged = db.session.query(func.count(DiaryEntry.id)).scalar()
+        counted = db.session.query(func.sum(Food.used)).scalar() or 0
+        # Nulstil til næste kørsel
+        db.session.query(DiaryEntry).delete()
+        db.session.query(Food).update({Food.used: 0, Food.last_used: None})
+        db.session.commit()
+
+    lost = logged - counted
+    status = '✅' if lost == 0 else '❌'
+    print(f"{status} {mode:<8} | {logged:5d} indgange på {elapsed:6.2f}s "
+          f"({logged / elapsed:7.1f}/s) | tabte opdateringer {lost:4d} | fejl {len(errors):4d}")
+    return lost
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af forbrugstællerne på fødevarer')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--entries', type=int, default=200, help='Indgange per tråd')
+    parser.add_argument('--foods', type=int, default=5, help='Antal populære fødevarer')
+    parser.add_argument('--mode', choices=['direct', 'buffered', 'begge'], default='begge')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        food_ids = seed_foods(args.foods)
+    print(f"📊 {args.threads} tråde × {args.entries} indgange på {args.foods} fødevarer\n")
+
+    modes = ['direct', 'buffered'] if args.mode == 'begge' else [args.mode]
+    lost = {mode: run(app, mode, food_ids, args.threads, args.entries) for mode in modes}
+    if lost.get('buffered'):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
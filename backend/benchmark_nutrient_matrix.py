@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark af NutrientMatrix mod næringsberegning attribut for attribut.
+
+Lægger et antal dagbogsindgange (standard 100.000) i en midlertidig SQLite
+database og beregner dags-, uge- og årstotaler (per dag) på tre måder:
+
+  - attributter: 18 multiplikationer per indgang, som koden gjorde før
+  - matrix:      NutrientMatrix.totals_by, gram summeres per fødevare først
+  - sql:         GROUP BY med join, som rollup genopbygningen kører
+
+Indgangene hentes som (dato, fødevare, gram) rækker; den tid er målt for
+sig. Resultaterne sammenlignes, så alle tre giver de samme totaler.
+
+Brug: python benchmark_nutrient_matrix.py [--entries 100000] [--foods 2000]
+                                          [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import insert
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from db.models.nutrient_vector import FIELDS, NutrientMatrix
+from services.nutrition_rollup_service import NutritionRollupService
+
+ENTRIES_PER_DAY = 90
+START = date(2023, 1, 1)
+
+def seed(entry_count, food_count):
+    rng = random.Random(42)
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [dict(
+        {field: round(rng.uniform(0, 50), 2) for field in FIELDS},
+        name=f'Fødevare {i}', category='benchmark', used=0, created_at=now, updated_at=now
+    ) for i in range(food_count)])
+    food_ids = [food_id for (food_id,) in db.session.query(Food.id).all()]
+    weights = [1 / (rank + 1) for rank in range(len(food_ids))]
+
+    rows = []
+    for i in range(entry_count):
+        rows.append({
+            'date': START + timedelta(days=i // ENTRIES_PER_DAY),
+            'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+            'food_id': rng.choices(food_ids, weights)[0],
+            'grams': float(rng.randint(10, 300))
+        })
+    for i in range(0, len(rows), 10000):
+        db.session.execute(insert(DiaryEntry.__table__), rows[i:i + 10000])
+    db.session.commit()
+
+def load_rows(start, end):
+    return db.session.query(DiaryEntry.date, DiaryEntry.food_id, DiaryEntry.grams).filter(
+        DiaryEntry.date >= start, DiaryEntry.date < end
+    ).all()
+
+def totals_by_attributes(rows, foods):
+    """Den gamle måde: hver indgang ganges ud attribut for attribut."""
+    totals = {}
+    for entry_date, food_id, grams in rows:
+        food = foods[food_id]
+        multiplier = grams / 100.0
+        day = totals.get(entry_date)
+        if day is None:
+            day = totals[entry_date] = dict.fromkeys(FIELDS, 0.0)
+        day['calories'] += food.calories * multiplier
+        day['protein'] += food.protein * multiplier
+        day['carbohydrates'] += food.carbohydrates * multiplier
+        day['fat'] += food.fat * multiplier
+        day['fiber'] += food.fiber * multiplier
+        day['sugar'] += food.sugar * multiplier
+        day['saturated_fat'] += food.saturated_fat * multiplier
+        day['unsaturated_fat'] += food.unsaturated_fat * multiplier
+        day['cholesterol'] += food.cholesterol * multiplier
+        day['sodium'] += food.sodium * multiplier
+        day['potassium'] += food.potassium * multiplier
+        day['calcium'] += food.calcium * multiplier
+        day['iron'] += food.iron * multiplier
+        day['vitamin_a'] += food.vitamin_a * multiplier
+        day['vitamin_c'] += food.vitamin_c * multiplier
+        day['vitamin_d'] += food.vitamin_d * multiplier
+        day['vitamin_b12'] += food.vitamin_b12 * multiplier
+        day['magnesium'] += food.magnesium * multiplier
+    return {entry_date: [day[field] for field in FIELDS] for entry_date, day in totals.items()}
+
+def totals_by_matrix(rows, matrix):
+    return matrix.totals_by(rows)
+
+def totals_by_sql(start, end):
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    totals = {}
+    for row in NutritionRollupService()._aggregate_rows(days):
+        day = totals.setdefault(row.date, [0.0] * len(FIELDS))
+        for i, field in enumerate(FIELDS):
+            day[i] += getattr(row, field)
+    return totals
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+def same(a, b):
+    return a.keys() == b.keys() and all(
+        abs(x - y) <= 1e-6 * max(1.0, abs(x)) for key in a for x, y in zip(a[key], b[key])
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af NutrientMatrix')
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--foods', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        seed(args.entries, args.foods)
+        print(f"📦 {args.entries} indgange og {args.foods} fødevarer oprettet på "
+              f"{time.perf_counter() - started:.1f}s")
+
+        load_ms, matrix = best_of(args.repeat, lambda: NutrientMatrix.load(db.session))
+        foods = {food.id: food for food in Food.query.all()}
+        print(f"🧮 Matrix med {len(matrix)} fødevarer indlæst på {load_ms:.1f}ms\n")
+
+        days = args.entries // ENTRIES_PER_DAY
+        periods = [('dag', 1), ('uge', 7), ('år', min(365, days)), ('alt', days + 1)]
+        failed = False
+        print(f"{'periode':<8} {'indgange':>9} | {'hent rækker':>12} | {'attributter':>12} "
+              f"| {'matrix':>9} | {'sql':>9}")
+        for label, length in periods:
+            start, end = START, START + timedelta(days=length)
+            fetch_ms, rows = best_of(args.repeat, lambda: load_rows(start, end))
+            attribute_ms, by_attributes = best_of(args.repeat, lambda: totals_by_attributes(rows, foods))
+            matrix_ms, by_matrix = best_of(args.repeat, lambda: totals_by_matrix(rows, matrix))
+            sql_ms, by_sql = best_of(args.repeat, lambda: totals_by_sql(start, end))
+
+            ok = same(by_attributes, by_matrix) and same(by_attributes, by_sql)
+            failed |= not ok
+            print(f"{label:<8} {len(rows):>9} | {fetch_ms:10.2f}ms | {attribute_ms:10.2f}ms "
+                  f"| {matrix_ms:7.2f}ms | {sql_ms:7.2f}ms {'✅' if ok else '❌'}")
+
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
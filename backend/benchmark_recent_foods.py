@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark af nylige og hyppige fødevarer per måltid.
+
+Lægger et års historik i en midlertidig SQLite fil og måler for hvert
+vindue (7, 30 og 90 dage) de hyppigste fødevarer til "frokost" på to
+måder:
+
+  - sql:   GROUP BY over diary_entries i vinduet, som
+           DiaryHelpers.get_most_used_foods gør (men per måltid)
+  - index: opslag i recent_foods_index alene, og hele
+           GET /api/diary/food-suggestions, som også henter fødevarerne i
+           én query
+
+Derefter logges nye indgange og indekset sammenlignes med en fuld
+genindlæsning fra databasen.
+
+Brug: python benchmark_recent_foods.py [--days 365] [--entries-per-day 20]
+                                       [--requests 300]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, func, insert
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from services.recent_foods_index import recent_foods_index
+
+FOOD_COUNT = 2000
+
+def seed(days, entries_per_day):
+    rng = random.Random(42)
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100,
+        'used': 0, 'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    food_ids = [food_id for (food_id,) in db.session.query(Food.id).all()]
+    weights = [1 / (rank + 1) for rank in range(len(food_ids))]
+
+    today = date.today()
+    rows = [{
+        'date': today - timedelta(days=day),
+        'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+        'food_id': rng.choices(food_ids, weights)[0],
+        'grams': 100.0
+    } for day in range(days) for i in range(entries_per_day)]
+    for i in range(0, len(rows), 10000):
+        db.session.execute(insert(DiaryEntry.__table__), rows[i:i + 10000])
+    db.session.commit()
+    return food_ids, len(rows)
+
+def most_used_sql(meal_type, days, limit):
+    """GROUP BY over historikken, som DiaryHelpers.get_most_used_foods."""
+    start_date = date.today() - timedelta(days=days - 1)
+    return db.session.query(
+        Food, func.count(func.distinct(DiaryEntry.date)).label('usage_count')
+    ).join(DiaryEntry).filter(
+        DiaryEntry.date >= start_date, DiaryEntry.meal_type == meal_type
+    ).group_by(Food.id).order_by(
+        func.count(func.distinct(DiaryEntry.date)).desc()
+    ).limit(limit).all()
+
+def measure(function, requests):
+    statements = []
+    on_execute = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    timings = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return statistics.median(timings), len(statements) / requests
+
+def top_lists():
+    return {
+        (meal_type, days, order): recent_foods_index.top(meal_type, days, order, 50)
+        for meal_type in [None] + MealType.CORE_TYPES
+        for days in (7, 30, 90)
+        for order in recent_foods_index.ORDERS
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af nylige og hyppige fødevarer')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--entries-per-day', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids, entries = seed(args.days, args.entries_per_day)
+        started = time.perf_counter()
+        recent_foods_index.load_from_db()
+        print(f"📊 {entries} indgange over {args.days} dage; indeks indlæst på "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms ({recent_foods_index.stats()['meal_dates']} måltidsdatoer)\n")
+
+        for days in (7, 30, 90):
+            sql_ms, sql_statements = measure(lambda: most_used_sql('frokost', days, 10), args.requests)
+            lookup_ms, _ = measure(lambda: recent_foods_index.suggestions('frokost', days, 10), args.requests)
+            index_ms, index_statements = measure(
+                lambda: client.get(f'/api/diary/food-suggestions?meal_type=frokost&days={days}&limit=10'),
+                args.requests
+            )
+            print(f"{days:>3} dage | sql p50 {sql_ms:6.2f}ms ({sql_statements:.0f} statements) "
+                  f"| index opslag p50 {lookup_ms:6.3f}ms "
+                  f"| endpoint p50 {index_ms:6.2f}ms ({index_statements:.1f} statements, nylige og hyppige)")
+
+        # Nye indgange via API'et holder indekset ajour uden genindlæsning
+        rng = random.Random(7)
+        today = date.today()
+        for i in range(200):
+            response = client.post('/api/diary/entries', json={
+                'food_id': rng.choice(food_ids[:50]), 'date': (today - timedelta(days=rng.randint(0, 100))).isoformat(),
+                'meal_type': rng.choice(MealType.CORE_TYPES), 'amount_grams': 100
+            })
+            assert response.status_code == 201, response.get_data(as_text=True)
+
+        applied = top_lists()
+        recent_foods_index.load_from_db()
+        status = '✅' if applied == top_lists() else '❌'
+        print(f"\n{status} Indekset svarer til en fuld genindlæsning efter 200 nye indgange")
+        if applied != top_lists():
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark af dagsoversigten med opskrifter i forhold til almindelige fødevarer.
+
+Opretter opskrifter (også opskrifter der bruger andre opskrifter) via
+POST /api/recipes/ og logger én dag med almindelige fødevarer og én dag
+med opskrifter. Derefter måles GET /api/diary/summary og
+GET /api/diary/entries for begge dage: tid og antal SQL statements skal
+være de samme, fordi opskriftens næringsindhold per 100g er beregnet på
+forhånd. Til sidst måles hvad det koster at ændre en ingrediens som
+mange opskrifter bruger.
+
+Brug: python benchmark_recipes.py [--recipes 200] [--components 8]
+                                  [--entries 40] [--requests 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, insert
+from db.database import db
+from db.models.food import Food
+from db.models.meal_types import MealType
+from services.nutrition_rollup_service import NutritionRollupService
+
+FOOD_COUNT = 500
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def seed_foods():
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def create_recipes(client, food_ids, count, components, rng):
+    """Opret opskrifter; hver anden bruger også en tidligere opskrift."""
+    recipes = []
+    for i in range(count):
+        parts = [{'food_id': food_id, 'grams': rng.randint(10, 200)}
+                 for food_id in rng.sample(food_ids, components)]
+        if recipes and i % 2:
+            parts[0] = {'food_id': rng.choice(recipes)['food_id'], 'grams': 150}
+        response = client.post('/api/recipes/', json={'name': f'Opskrift {i}', 'components': parts})
+        assert response.status_code == 201, response.get_data(as_text=True)
+        recipes.append(response.get_json())
+    return recipes
+
+def log_day(client, day, items, key, rng):
+    entries = [{
+        key: item, 'date': day.isoformat(),
+        'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+        'amount_grams': rng.randint(50, 400)
+    } for i, item in enumerate(items)]
+    response = client.post('/api/diary/entries/batch', json={'entries': entries})
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+def measure(client, url, requests):
+    statements = []
+    on_execute = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    timings = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_data(as_text=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return timings, len(statements) / requests
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af opskrifter i dagsoversigten')
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--components', type=int, default=8)
+    parser.add_argument('--entries', type=int, default=40, help='Indgange per dag')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids = seed_foods()
+
+        started = time.perf_counter()
+        recipes = create_recipes(client, food_ids, args.recipes, args.components, rng)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"🍲 {args.recipes} opskrifter med {args.components} ingredienser "
+              f"oprettet på {elapsed / args.recipes:.2f}ms per opskrift")
+
+        foods_day, recipes_day = date(2024, 1, 1), date(2024, 1, 2)
+        log_day(client, foods_day, rng.sample(food_ids, args.entries), 'food_id', rng)
+        log_day(client, recipes_day, [recipe['id'] for recipe in rng.sample(recipes, args.entries)], 'recipe_id', rng)
+
+        print(f"\n📊 {args.entries} indgange per dag, {args.requests} requests per måling")
+        for label, day in (('fødevarer', foods_day), ('opskrifter', recipes_day)):
+            for endpoint in ('summary', 'entries'):
+                timings, statements = measure(client, f'/api/diary/{endpoint}?date={day.isoformat()}', args.requests)
+                print(f"   {label:<11} {endpoint:<8} | p50 {percentile(timings, 50):6.2f}ms "
+                      f"p99 {percentile(timings, 99):6.2f}ms | {statements:4.1f} statements")
+
+        # En ingrediens i mange opskrifter ændres: opskrifterne og dagene genberegnes
+        shared = max(food_ids, key=lambda food_id: sum(
+            any(part['food_id'] == food_id for part in client.get(f"/api/recipes/{recipe['id']}").get_json()['components'])
+            for recipe in recipes[:50]
+        ))
+        started = time.perf_counter()
+        response = client.put(f'/api/foods/{shared}', json={'calories': 999})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        print(f"\n✏️  Ændring af en delt ingrediens med genberegning: "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+
+        summary = client.get(f'/api/diary/summary?date={recipes_day.isoformat()}').get_json()
+        NutritionRollupService().rebuild()
+        db.session.commit()
+        rebuilt = client.get(f'/api/diary/summary?date={recipes_day.isoformat()}').get_json()
+        status = '✅' if summary == rebuilt else '❌'
+        print(f"{status} Dagsoversigten svarer til en fuld genberegning")
+        if summary != rebuilt:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
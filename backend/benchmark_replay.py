@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark af afspilning af en offline kø (POST /api/sync/replay) mod at
+sende mutationerne én ad gangen med Idempotency-Key.
+
+En kø består af nye dagbogsindgange (med enkelte rettelser og
+sletninger via ref), motion og vægt. For hver køstørrelse måles tid på
+serveren og antal SQL statements for
+
+  - enkeltvis: ét POST/PUT/DELETE per mutation
+  - replay:    hele køen i ét POST /api/sync/replay
+  - gentaget:  samme kø igen, som efter en afbrudt forbindelse; alle
+               nøgler er brugt og springes over med ét opslag
+
+Til sidst kontrolleres at gentagelserne ikke har lavet dubletter.
+
+Brug: python benchmark_replay.py [--sizes 10,100,1000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import event, insert
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.exercise import Exercise
+from db.models.weight import Weight
+from db.models.meal_types import MealType
+
+FOOD_COUNT = 500
+
+def seed():
+    now = datetime.now()
+    db.session.execute(insert(Food.__table__), [{
+        'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i,
+        'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+        'created_at': now, 'updated_at': now
+    } for i in range(FOOD_COUNT)])
+    db.session.commit()
+    return [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+def make_queue(prefix, size, food_ids):
+    """En offline kø: mest nye indgange, hver tiende rettes og hver tyvende slettes."""
+    queue = []
+    today = date.today()
+    for i in range(size):
+        key = f'{prefix}-{i}'
+        if i % 20 == 19:
+            queue.append({'type': 'diary_entry.delete', 'key': key, 'ref': f'{prefix}-{i - 1}'})
+        elif i % 10 == 9:
+            queue.append({'type': 'diary_entry.update', 'key': key, 'ref': f'{prefix}-{i - 1}',
+                          'data': {'amount_grams': 250}})
+        elif i % 25 == 0:
+            queue.append({'type': 'exercise.add', 'key': key, 'data': {
+                'name': 'Løb', 'duration_minutes': 30, 'calories_burned': 300, 'date': today.isoformat()}})
+        elif i % 50 == 1:
+            queue.append({'type': 'weight.add', 'key': key, 'data': {'weight_kg': 80, 'date': today.isoformat()}})
+        else:
+            queue.append({'type': 'diary_entry.add', 'key': key, 'data': {
+                'food_id': food_ids[i % len(food_ids)],
+                'date': (today - timedelta(days=i % 7)).isoformat(),
+                'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+                'amount_grams': 100
+            }})
+    return queue
+
+def send_one_by_one(client, queue):
+    """Send køen som enkelte requests, som klienten ville uden replay."""
+    ids = {}
+    for mutation in queue:
+        kind = mutation['type']
+        headers = {'Idempotency-Key': mutation['key']}
+        if kind == 'diary_entry.add':
+            response = client.post('/api/diary/entries', json=mutation['data'], headers=headers)
+            ids[mutation['key']] = response.get_json()['id']
+        elif kind == 'exercise.add':
+            response = client.post('/api/exercises/', json=mutation['data'], headers=headers)
+        elif kind == 'weight.add':
+            response = client.post('/api/weights/', json=mutation['data'], headers=headers)
+        elif kind == 'diary_entry.update':
+            response = client.put(f"/api/diary/entries/{ids[mutation['ref']]}", json=mutation['data'])
+        else:
+            response = client.delete(f"/api/diary/entries/{ids[mutation['ref']]}")
+        assert response.status_code in (200, 201), response.get_data(as_text=True)
+
+def replay(client, queue):
+    response = client.post('/api/sync/replay', json={'mutations': queue})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+def measure(function):
+    statements = []
+    on_execute = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        started = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return elapsed, len(statements), result
+
+def counts():
+    return (DiaryEntry.query.count(), Exercise.query.count(), Weight.query.count())
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af afspilning af en offline kø')
+    parser.add_argument('--sizes', default='10,100,1000')
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids = seed()
+        duplicates = False
+        for size in [int(size) for size in args.sizes.split(',')]:
+            single_ms, single_statements, _ = measure(
+                lambda: send_one_by_one(client, make_queue(f'enkelt{size}', size, food_ids)))
+
+            queue = make_queue(f'replay{size}', size, food_ids)
+            replay_ms, replay_statements, result = measure(lambda: replay(client, queue))
+            assert result['applied'] == size, result
+            before = counts()
+
+            again_ms, again_statements, result = measure(lambda: replay(client, queue))
+            duplicates |= result['replayed'] != size or counts() != before
+
+            print(f"{size:>5} mutationer | enkeltvis {single_ms:8.1f}ms {single_statements:6} statements "
+                  f"({size} requests) | replay {replay_ms:7.1f}ms {replay_statements:5} statements "
+                  f"| gentaget {again_ms:6.1f}ms {again_statements} statement(s)")
+
+        print(f"\n{'❌' if duplicates else '✅'} Gentagne køer er sprunget over uden dubletter")
+        if duplicates:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark af delta sync (GET /api/sync) mod en fuld synkronisering.
+
+Lægger et katalog med mange fødevarer og et års dagbog i en midlertidig
+SQLite fil og måler for hver runde af ændringer (nye indgange, en slettet
+indgang og et par ændrede fødevarer, som en dags brug):
+
+  - fuld:  GET /api/sync?since=0, alt sendes igen
+  - delta: GET /api/sync?since=<cursor>, kun ændrede rækker og slettede id'er
+
+Der måles svarstørrelse og tid på serveren. Data fra før change tracking
+har ingen version, så indtil første sporede ændring er cursoren 0 og
+første runde er også en fuld synkronisering. Til sidst sammenlignes en
+klient, der kun har hentet deltaer, med en fuld synkronisering.
+
+Brug: python benchmark_sync.py [--foods 100000] [--days 365]
+                               [--entries-per-day 20] [--rounds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DB_FILE = Path(tempfile.mkdtemp()) / 'benchmark.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import create_app
+from sqlalchemy import insert
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from services.food_usage_counter import food_usage_counter
+
+def seed(foods, days, entries_per_day):
+    """Fyld katalog og dagbog direkte, som data fra før change tracking."""
+    rng = random.Random(42)
+    now = datetime.now()
+    for start in range(0, foods, 10000):
+        db.session.execute(insert(Food.__table__), [{
+            'name': f'Fødevare {i}', 'category': 'benchmark', 'calories': 100 + i % 400,
+            'protein': 10, 'carbohydrates': 20, 'fat': 5, 'used': 0,
+            'created_at': now, 'updated_at': now
+        } for i in range(start, min(foods, start + 10000))])
+    food_ids = [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+    today = date.today()
+    rows = [{
+        'date': today - timedelta(days=day),
+        'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+        'food_id': rng.choice(food_ids),
+        'grams': rng.randint(10, 300)
+    } for day in range(days) for i in range(entries_per_day)]
+    for start in range(0, len(rows), 10000):
+        db.session.execute(insert(DiaryEntry.__table__), rows[start:start + 10000])
+    db.session.commit()
+    return food_ids, len(rows)
+
+def change_day(client, rng, food_ids, entries_per_day):
+    """En dags ændringer: nye indgange, en slettet indgang og to ændrede fødevarer."""
+    day = date.today().isoformat()
+    entries = [{
+        'food_id': rng.choice(food_ids), 'date': day,
+        'meal_type': MealType.CORE_TYPES[i % len(MealType.CORE_TYPES)],
+        'amount_grams': rng.randint(10, 300)
+    } for i in range(entries_per_day)]
+    response = client.post('/api/diary/entries/batch', json={'entries': entries})
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+    entry_id = rng.choice([entry_id for (entry_id,) in db.session.query(DiaryEntry.id).all()])
+    response = client.delete(f'/api/diary/entries/{entry_id}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    for food_id in rng.sample(food_ids, 2):
+        response = client.put(f'/api/foods/{food_id}', json={'calories': rng.randint(50, 500)})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+def fetch(client, since):
+    started = time.perf_counter()
+    response = client.get(f'/api/sync?since={since}')
+    elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json(), len(response.get_data()), elapsed
+
+def rows_by_id(data):
+    # Dagbogens created_at er tidspunktet for serialiseringen
+    return {
+        name: {row['id']: dict(row, created_at=None) if name == 'diary_entries' else row for row in rows}
+        for name, rows in data['changed'].items()
+    }
+
+def apply(copy, data):
+    if data['reset']:
+        copy.clear()
+    for name, ids in data['deleted'].items():
+        for row_id in ids:
+            copy.get(name, {}).pop(row_id, None)
+    for name, rows in rows_by_id(data).items():
+        copy.setdefault(name, {}).update(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark af delta sync')
+    parser.add_argument('--foods', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--entries-per-day', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        food_ids, entries = seed(args.foods, args.days, args.entries_per_day)
+        print(f"📊 {len(food_ids)} fødevarer og {entries} indgange over {args.days} dage, "
+              f"{args.rounds} runder med en dags ændringer\n")
+
+        data, size, elapsed = fetch(client, 0)
+        copy = {}
+        apply(copy, data)
+        cursor = data['cursor']
+        print(f"{'start':<6} | fuld  {size / 1024:9.1f} KB {elapsed:8.1f}ms")
+
+        rng = random.Random(7)
+        full_sizes, full_times, delta_sizes, delta_times = [], [], [], []
+        for round_number in range(1, args.rounds + 1):
+            change_day(client, rng, food_ids, args.entries_per_day)
+
+            delta, size, elapsed = fetch(client, cursor)
+            delta_sizes.append(size)
+            delta_times.append(elapsed)
+            apply(copy, delta)
+            cursor = delta['cursor']
+
+            _, size, elapsed = fetch(client, 0)
+            full_sizes.append(size)
+            full_times.append(elapsed)
+            changed = sum(len(rows) for rows in delta['changed'].values())
+            deleted = sum(len(ids) for ids in delta['deleted'].values())
+            print(f"runde {round_number} | fuld  {full_sizes[-1] / 1024:9.1f} KB {full_times[-1]:8.1f}ms "
+                  f"| delta {delta_sizes[-1] / 1024:6.1f} KB {delta_times[-1]:6.1f}ms "
+                  f"({changed} ændrede, {deleted} slettede)")
+
+        print(f"\nMedian: fuld {statistics.median(full_sizes) / 1024:.1f} KB / {statistics.median(full_times):.1f}ms, "
+              f"delta {statistics.median(delta_sizes) / 1024:.1f} KB / {statistics.median(delta_times):.1f}ms "
+              f"({statistics.median(full_sizes) / statistics.median(delta_sizes):.0f}x mindre)")
+
+        # Brugstællerne skrives bagud; de sidste kommer med i næste delta
+        food_usage_counter.flush()
+        apply(copy, fetch(client, cursor)[0])
+        full = rows_by_id(fetch(client, 0)[0])
+        same = {name: rows for name, rows in copy.items() if rows} == {name: rows for name, rows in full.items() if rows}
+        print(f"\n{'✅' if same else '❌'} Klienten der kun har hentet deltaer svarer til en fuld synkronisering")
+        if not same:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
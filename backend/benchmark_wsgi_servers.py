@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Load test af Flask dev serveren (python app.py) mod gunicorn (wsgi:app).
+
+Begge servere startes mod samme seedede SQLite database. Et antal klient
+tråde sender en blanding af dagbogs requests i en fast periode:
+70% GET /api/diary/entries, 20% GET /api/diary/summary og
+10% POST /api/diary/entries. Throughput, p50/p99 og fejl rapporteres.
+
+Brug: python benchmark_wsgi_servers.py [--clients 16] [--duration 15]
+                                       [--servers dev,gunicorn]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from db.models.meal_types import MealType
+
+FOOD_COUNT = 200
+ENTRIES_PER_MEAL = 10
+TARGET_DATE = '2025-01-15'
+HOST = '127.0.0.1'
+
+SERVERS = {
+    'dev': [sys.executable, 'app.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+}
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def seed_database(database_url):
+    """Opret fødevarer og en dag med dagbogsindgange i en separat proces."""
+    script = f"""
+import random
+from datetime import date, datetime
+from app import create_app
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.meal_types import MealType
+from services.nutrition_rollup_service import NutritionRollupService
+
+app = create_app()
+with app.app_context():
+    now = datetime.now()
+    foods = [
+        Food(name=f'Benchmark fødevare {{i}}', category='benchmark', calories=100 + i,
+             protein=10, carbohydrates=20, fat=5, used=0, created_at=now, updated_at=now)
+        for i in range({FOOD_COUNT})
+    ]
+    db.session.add_all(foods)
+    db.session.flush()
+    rng = random.Random(1)
+    for meal_type in MealType.CORE_TYPES:
+        for _ in range({ENTRIES_PER_MEAL}):
+            db.session.add(DiaryEntry(food_id=rng.choice(foods).id, date=date.fromisoformat('{TARGET_DATE}'),
+                                      meal_type=meal_type, grams=rng.randint(10, 300)))
+    db.session.flush()
+    NutritionRollupService().rebuild()
+    db.session.commit()
+    print(json.dumps([food.id for food in foods]))
+"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, '-c', 'import json\n' + script],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Serveren stoppede under opstart')
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=1)
+            connection.request('GET', '/api/diagnostics/database')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Serveren svarede ikke på port {port}')
+
+def client(port, food_ids, deadline, seed, results):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(HOST, port, timeout=30)
+    latencies = []
+    errors = 0
+
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.7:
+                connection.request('GET', f'/api/diary/entries?date={TARGET_DATE}')
+            elif roll < 0.9:
+                connection.request('GET', f'/api/diary/summary?date={TARGET_DATE}')
+            else:
+                body = json.dumps({
+                    'food_id': rng.choice(food_ids),
+                    'date': TARGET_DATE,
+                    'meal_type': rng.choice(MealType.CORE_TYPES),
+                    'amount_grams': rng.randint(10, 300)
+                })
+                connection.request('POST', '/api/diary/entries', body,
+                                   {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, port, timeout=30)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    connection.close()
+    results.append((latencies, errors))
+
+def run_server(name, port, database_url, food_ids, clients, duration):
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        DB_PROFILE='production',
+        FLASK_DEBUG='False',
+        PORT=str(port),
+        GUNICORN_ACCESS_LOG='',
+    )
+    process = subprocess.Popen(
+        SERVERS[name], cwd=backend_dir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    try:
+        wait_until_ready(port, process)
+
+        results = []
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=client, args=(port, food_ids, deadline, i, results))
+            for i in range(clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    latencies = [l for result in results for l in result[0]]
+    errors = sum(result[1] for result in results)
+    print(
+        f"{name:<9} | {len(latencies):>6} requests | {len(latencies) / elapsed:7.1f} req/s "
+        f"| p50 {percentile(latencies, 50):7.1f}ms p99 {percentile(latencies, 99):7.1f}ms "
+        f"| fejl {errors}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test af dev server mod gunicorn')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15, help='Sekunder per server')
+    parser.add_argument('--servers', default='dev,gunicorn')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    print(f"📊 {args.clients} klienter i {args.duration:.0f}s per server "
+          f"({os.cpu_count()} kerner)")
+    for i, name in enumerate(args.servers.split(',')):
+        # Frisk database per server, så begge starter fra samme data
+        database_url = f'sqlite:///{Path(tempfile.mkdtemp()) / "benchmark.db"}'
+        food_ids = seed_database(database_url)
+        run_server(name, args.port + i, database_url, food_ids, args.clients, args.duration)
+
+if __name__ == "__main__":
+    main()
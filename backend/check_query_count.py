@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Regression check: GET /api/diary/entries og GET /api/bootstrap skal bruge
+et konstant antal SQL statements uanset hvor mange indgange der er på
+dagen.
+
+Kører mod en in-memory SQLite database, så den rører ikke den rigtige data.
+"""
+
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+
+from app import create_app
+from db.database import db
+from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+
+TEST_DATE = date(2025, 1, 1)
+
+def seed_entries(count):
+    """Opret en fødevare og `count` dagbogsindgange for TEST_DATE."""
+    DiaryEntry.query.delete()
+    Food.query.delete()
+
+    foods = []
+    for i in range(count):
+        food = Food(
+            name=f'testmad {i}',
+            category='test',
+            calories=100.0 + i,
+            protein=10.0,
+            carbohydrates=20.0,
+            fat=5.0,
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+        foods.append(food)
+    db.session.add_all(foods)
+    db.session.flush()
+
+    for i, food in enumerate(foods):
+        db.session.add(DiaryEntry(
+            date=TEST_DATE,
+            meal_type='frokost',
+            food_id=food.id,
+            grams=100.0 + i
+        ))
+    db.session.commit()
+
+def count_queries(app, client, url):
+    """Tæl antallet af SQL statements et request udfører."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+    return len(statements), response.get_json()
+
+def check_query_count():
+    app = create_app()
+    client = app.test_client()
+    urls = {
+        'entries': (f'/api/diary/entries?date={TEST_DATE.isoformat()}', lambda data: data),
+        'bootstrap': (f'/api/bootstrap?date={TEST_DATE.isoformat()}', lambda data: data['entries']),
+    }
+
+    # Første bootstrap opretter standard brugerindstillinger
+    with app.app_context():
+        client.get(urls['bootstrap'][0])
+
+    ok = True
+    for label, (url, entries_of) in urls.items():
+        counts = {}
+        print(f"{label}:")
+        with app.app_context():
+            for entry_count in (1, 5, 40):
+                seed_entries(entry_count)
+                db.session.remove()
+                query_count, data = count_queries(app, client, url)
+                assert len(entries_of(data)) == entry_count
+                counts[entry_count] = query_count
+                print(f"  {entry_count:>3} indgange -> {query_count} SQL statements")
+
+        if len(set(counts.values())) != 1:
+            print("❌ Antal queries vokser med antal indgange (N+1)")
+            ok = False
+
+    if ok:
+        print("✅ Konstant antal queries")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_count() else 1)
@@ -1,4 +1,6 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
 import os
 
 # Global database instance
@@ -7,6 +9,184 @@ db = SQLAlchemy()
 # Base class for models
 Base = db.Model
 
+# Engine settings per profile. Values can be overridden with the env
+# variable named in ENGINE_SETTING_ENV.
+ENGINE_PROFILES = {
+    'development': {
+        'sqlite': {
+            'busy_timeout_ms': 5000,
+        },
+        'postgresql': {},
+    },
+    'production': {
+        'sqlite': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout_ms': 15000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size_kb': 64 * 1024,
+            'foreign_keys': True,
+        },
+        'postgresql': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+            'pool_timeout': 30,
+            'statement_timeout_ms': 30000,
+        },
+    },
+}
+
+ENGINE_SETTING_ENV = {
+    'journal_mode': 'SQLITE_JOURNAL_MODE',
+    'synchronous': 'SQLITE_SYNCHRONOUS',
+    'busy_timeout_ms': 'SQLITE_BUSY_TIMEOUT_MS',
+    'mmap_size': 'SQLITE_MMAP_SIZE',
+    'cache_size_kb': 'SQLITE_CACHE_SIZE_KB',
+    'foreign_keys': 'SQLITE_FOREIGN_KEYS',
+    'pool_size': 'DB_POOL_SIZE',
+    'max_overflow': 'DB_MAX_OVERFLOW',
+    'pool_recycle': 'DB_POOL_RECYCLE',
+    'pool_pre_ping': 'DB_POOL_PRE_PING',
+    'pool_timeout': 'DB_POOL_TIMEOUT',
+    'statement_timeout_ms': 'DB_STATEMENT_TIMEOUT_MS',
+}
+
+def _dialect_name(database_url):
+    scheme = database_url.split(':', 1)[0].split('+', 1)[0]
+    return 'postgresql' if scheme == 'postgres' else scheme
+
+def get_engine_profile():
+    """Return the profile name from DB_PROFILE, defaulting from FLASK_ENV."""
+    default = 'production' if os.getenv('FLASK_ENV') == 'production' else 'development'
+    profile = os.getenv('DB_PROFILE', default).lower()
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}', expected one of {sorted(ENGINE_PROFILES)}")
+    return profile
+
+def get_engine_settings(profile, dialect):
+    """Return the profile's settings for a dialect with env overrides applied."""
+    settings = dict(ENGINE_PROFILES[profile].get(dialect, {}))
+    for key, default in list(settings.items()):
+        value = os.getenv(ENGINE_SETTING_ENV[key])
+        if value is None:
+            continue
+        if isinstance(default, bool):
+            settings[key] = value.lower() in ('1', 'true', 'on', 'yes')
+        elif isinstance(default, int):
+            settings[key] = int(value)
+        else:
+            settings[key] = value
+    return settings
+
+def _engine_options(dialect, settings):
+    """Translate profile settings into create_engine keyword arguments."""
+    options = {}
+    if dialect == 'sqlite':
+        if 'busy_timeout_ms' in settings:
+            # The driver-level timeout is what pysqlite waits on a locked database
+            options['connect_args'] = {'timeout': settings['busy_timeout_ms'] / 1000.0}
+    elif dialect == 'postgresql':
+        for key in ('pool_size', 'max_overflow', 'pool_recycle', 'pool_pre_ping', 'pool_timeout'):
+            if key in settings:
+                options[key] = settings[key]
+        if 'statement_timeout_ms' in settings:
+            options['connect_args'] = {
+                'options': f"-c statement_timeout={settings['statement_timeout_ms']}"
+            }
+    return options
+
+def _sqlite_pragmas(settings):
+    pragmas = []
+    if 'journal_mode' in settings:
+        pragmas.append(f"PRAGMA journal_mode={settings['journal_mode']}")
+    if 'synchronous' in settings:
+        pragmas.append(f"PRAGMA synchronous={settings['synchronous']}")
+    if 'busy_timeout_ms' in settings:
+        pragmas.append(f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}")
+    if 'mmap_size' in settings:
+        pragmas.append(f"PRAGMA mmap_size={int(settings['mmap_size'])}")
+    if 'cache_size_kb' in settings:
+        # Negative cache_size is in KiB rather than pages
+        pragmas.append(f"PRAGMA cache_size=-{int(settings['cache_size_kb'])}")
+    if 'foreign_keys' in settings:
+        pragmas.append(f"PRAGMA foreign_keys={'ON' if settings['foreign_keys'] else 'OFF'}")
+    return pragmas
+
+def _install_sqlite_pragmas(engine, settings):
+    pragmas = _sqlite_pragmas(settings)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def get_engine_diagnostics():
+    """Describe the active engine profile and the settings in effect.
+
+    PRAGMA values are read back from a live connection so the result shows
+    what SQLite actually applied (e.g. WAL is unavailable for :memory:).
+    """
+    engine = db.engine
+    dialect = engine.dialect.name
+    profile = current_app.config['DB_PROFILE']
+    pool = engine.pool
+
+    diagnostics = {
+        'profile': profile,
+        'dialect': dialect,
+        'driver': engine.dialect.driver,
+        'url': engine.url.render_as_string(hide_password=True),
+        'configured': get_engine_settings(profile, dialect),
+        'pool': {
+            'class': type(pool).__name__,
+            'status': pool.status(),
+        },
+        'effective': {},
+    }
+
+    with engine.connect() as connection:
+        if dialect == 'sqlite':
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size',
+                           'cache_size', 'foreign_keys'):
+                diagnostics['effective'][pragma] = connection.execute(
+                    text(f"PRAGMA {pragma}")
+                ).scalar()
+        elif dialect == 'postgresql':
+            for setting in ('statement_timeout', 'max_connections'):
+                diagnostics['effective'][setting] = connection.execute(
+                    text(f"SHOW {setting}")
+                ).scalar()
+
+    return diagnostics
+
+def _add_missing_columns(engine):
+    """
+    Add nullable columns that a model declares but an existing table lacks.
+    
+    create_all() only creates missing tables, so columns added to an
+    existing model later (like the diary_entries nutrient snapshot) are
+    added here. Anything that needs a default, a constraint or a backfill
+    belongs in a migration instead.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable or column.server_default is not None:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
 def init_db(app):
     """
     Initialize database with Flask app.
@@ -19,9 +199,19 @@ def init_db(app):
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Engine profile (DB_PROFILE=development|production)
+    profile = get_engine_profile()
+    dialect = _dialect_name(database_url)
+    settings = get_engine_settings(profile, dialect)
+    app.config['DB_PROFILE'] = profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(dialect, settings)
+    
     # Initialize database with app
     db.init_app(app)
     
     # Create all tables
     with app.app_context():
+        if dialect == 'sqlite':
+            _install_sqlite_pragmas(db.engine, settings)
         db.create_all()
+        _add_missing_columns(db.engine)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, update
+from db.database import Base
+
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_versions'
+
+    # Catalog name, e.g. 'foods'
+    name = Column(String(50), primary_key=True)
+
+    # Incremented on every change to the catalog
+    version = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def get(cls, session, name):
+        """Return the current version of a catalog (0 if never changed)"""
+        version = session.query(cls.version).filter(cls.name == name).scalar()
+        return version or 0
+
+    @classmethod
+    def bump(cls, session, name):
+        """Increment a catalog version as part of the caller's transaction"""
+        result = session.execute(
+            update(cls).where(cls.name == name).values(version=cls.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(cls(name=name, version=1))
+
+    @classmethod
+    def next(cls, session, name):
+        """Increment a catalog version in the caller's transaction and return the new value"""
+        cls.bump(session, name)
+        return session.query(cls.version).filter(cls.name == name).scalar()
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Text, DateTime
+from db.database import Base
+from datetime import datetime
+
+class ChangeEvent(Base):
+    __tablename__ = 'change_events'
+    
+    # Event id, taken from the 'events' catalog version so ids are dense
+    # and committed in order
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    # The event as JSON ({"type": ..., "payload": ...})
+    data = Column(Text, nullable=False)
+    
+    # Only the most recent events are kept for reconnecting clients
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
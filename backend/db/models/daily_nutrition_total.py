@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index
+from db.database import Base
+from datetime import datetime
+
+class DailyNutritionTotal(Base):
+    __tablename__ = 'daily_nutrition_totals'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # One row per date and meal type
+    date = Column(Date, nullable=False)
+    meal_type = Column(String(50), nullable=False)
+
+    # Number of diary entries summed into this row
+    entry_count = Column(Integer, nullable=False, default=0)
+
+    # Summed nutritional values (same columns as Food.NUTRIENT_FIELDS)
+    calories = Column(Float, nullable=False, default=0.0)
+    protein = Column(Float, nullable=False, default=0.0)
+    carbohydrates = Column(Float, nullable=False, default=0.0)
+    fat = Column(Float, nullable=False, default=0.0)
+    fiber = Column(Float, nullable=False, default=0.0)
+    sugar = Column(Float, nullable=False, default=0.0)
+    saturated_fat = Column(Float, nullable=False, default=0.0)
+    unsaturated_fat = Column(Float, nullable=False, default=0.0)
+    cholesterol = Column(Float, nullable=False, default=0.0)
+    sodium = Column(Float, nullable=False, default=0.0)
+    potassium = Column(Float, nullable=False, default=0.0)
+    calcium = Column(Float, nullable=False, default=0.0)
+    iron = Column(Float, nullable=False, default=0.0)
+    vitamin_a = Column(Float, nullable=False, default=0.0)
+    vitamin_c = Column(Float, nullable=False, default=0.0)
+    vitamin_d = Column(Float, nullable=False, default=0.0)
+    vitamin_b12 = Column(Float, nullable=False, default=0.0)
+    magnesium = Column(Float, nullable=False, default=0.0)
+
+    # Timestamps
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_daily_totals_date_meal', 'date', 'meal_type', unique=True),
+    )
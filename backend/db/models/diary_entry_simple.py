@@ -1,11 +1,31 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text
+import os
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
+from db.models.food import Food
+from db.models.nutrient_vector import FIELDS, NutrientVector
 from datetime import date, datetime
 
 class DiaryEntry(Base):
+    """A logged amount of a food.
+
+    Nutrition is handled by one of two strategies (DIARY_NUTRITION_MODE):
+
+    - 'derive' (default): only grams are stored and nutrients are derived
+      from the food's current per-100g values when read, so correcting a
+      food corrects every day it was logged.
+    - 'snapshot': the entry's nutrients are stored when it is written and
+      read back from the entry, so history stays as it was logged even if
+      the food changes later. Entries without a snapshot (written in
+      derive mode and not yet backfilled) fall back to deriving.
+
+    The snapshot columns are NULL in derive mode.
+    """
     __tablename__ = 'diary_entries'
     
+    NUTRITION_MODES = ('derive', 'snapshot')
+    NUTRITION_MODE = os.getenv('DIARY_NUTRITION_MODE', 'derive')
+    
     # Primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -19,33 +39,123 @@ class DiaryEntry(Base):
     # Amount consumed in grams
     grams = Column(Float, nullable=False, default=100.0)
     
+    # Nutrient snapshot for this entry (amount already applied), see above
+    calories = Column(Float, nullable=True)
+    protein = Column(Float, nullable=True)
+    carbohydrates = Column(Float, nullable=True)
+    fat = Column(Float, nullable=True)
+    fiber = Column(Float, nullable=True)
+    sugar = Column(Float, nullable=True)
+    saturated_fat = Column(Float, nullable=True)
+    unsaturated_fat = Column(Float, nullable=True)
+    cholesterol = Column(Float, nullable=True)
+    sodium = Column(Float, nullable=True)
+    potassium = Column(Float, nullable=True)
+    calcium = Column(Float, nullable=True)
+    iron = Column(Float, nullable=True)
+    vitamin_a = Column(Float, nullable=True)
+    vitamin_c = Column(Float, nullable=True)
+    vitamin_d = Column(Float, nullable=True)
+    vitamin_b12 = Column(Float, nullable=True)
+    magnesium = Column(Float, nullable=True)
+    
     # Optional notes
     notes = Column(Text, nullable=True)
     
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
     # Relationships
     food = relationship("Food", backref="diary_entries")
     
+    # Indexes for per-day reads and per-food history
+    __table_args__ = (
+        Index('idx_diary_entries_date_meal', 'date', 'meal_type'),
+        Index('idx_diary_entries_food_date', 'food_id', 'date'),
+        Index('idx_diary_entries_sync_version', 'sync_version'),
+    )
+    
     def calculate_nutrition(self, food):
         """Calculate nutritional values based on grams and food's per-100g values"""
-        multiplier = self.grams / 100.0
+        return NutrientVector.to_dict(self.derived_vector(food))
+    
+    def derived_vector(self, food):
+        """Nutrient vector from grams and the food's per-100g values."""
+        if not food:
+            return NutrientVector.zeros()
+        return NutrientVector.scaled(NutrientVector.of(food), self.grams / 100.0)
+    
+    @classmethod
+    def snapshots(cls):
+        """True if nutrients are stored on write (snapshot mode)."""
+        return cls.NUTRITION_MODE == 'snapshot'
+    
+    @classmethod
+    def snapshot_values(cls, food, grams):
+        """Return the snapshot column values for a new or changed entry."""
+        if not cls.snapshots() or not food:
+            return dict.fromkeys(FIELDS)
+        return NutrientVector.to_dict(NutrientVector.scaled(NutrientVector.of(food), grams / 100.0))
+    
+    def take_snapshot(self, food):
+        """Store (snapshot mode) or clear (derive mode) this entry's nutrients."""
+        for field, value in self.snapshot_values(food, self.grams).items():
+            setattr(self, field, value)
+    
+    def has_snapshot(self):
+        return self.snapshots() and self.calories is not None
+    
+    def nutrient_vector(self, food):
+        """Return this entry's nutrient vector according to the nutrition mode."""
+        if self.has_snapshot():
+            return NutrientVector.of(self)
+        return self.derived_vector(food)
+    
+    def nutrition(self, food):
+        """Return this entry's nutrients according to the nutrition mode."""
+        return NutrientVector.to_dict(self.nutrient_vector(food))
+    
+    @classmethod
+    def totals_by(cls, entries, matrix, key):
+        """Return {key(entry): summed nutrient vector} for many entries.
+        
+        Derived entries are summed through the food matrix (one row
+        addition per food and key); snapshotted entries add their stored
+        values.
+        """
+        entries = list(entries)
+        totals = matrix.totals_by(
+            (key(entry), entry.food_id, entry.grams) for entry in entries if not entry.has_snapshot()
+        )
+        for entry in entries:
+            if entry.has_snapshot():
+                total = totals.setdefault(key(entry), NutrientVector.zeros())
+                NutrientVector.add(total, NutrientVector.of(entry))
+        return totals
+    
+    @classmethod
+    def nutrient_expression(cls, field):
+        """SQL expression for one nutrient of an entry; needs foods joined."""
+        derived = cls.grams * func.coalesce(getattr(Food, field), 0.0) / 100.0
+        if cls.snapshots():
+            return func.coalesce(getattr(cls, field), derived)
+        return derived
+    
+    def to_dict(self, food):
+        """Serialize with macros (snapshot or from its preloaded food) for JSON responses"""
+        nutrition = self.nutrition(food)
         
         return {
-            'calories': food.calories * multiplier,
-            'protein': food.protein * multiplier,
-            'carbohydrates': food.carbohydrates * multiplier,
-            'fat': food.fat * multiplier,
-            'fiber': food.fiber * multiplier,
-            'sugar': food.sugar * multiplier,
-            'saturated_fat': food.saturated_fat * multiplier,
-            'unsaturated_fat': food.unsaturated_fat * multiplier,
-            'cholesterol': food.cholesterol * multiplier,
-            'sodium': food.sodium * multiplier,
-            'potassium': food.potassium * multiplier,
-            'calcium': food.calcium * multiplier,
-            'iron': food.iron * multiplier,
-            'vitamin_a': food.vitamin_a * multiplier,
-            'vitamin_c': food.vitamin_c * multiplier,
-            'vitamin_d': food.vitamin_d * multiplier,
-            'vitamin_b12': food.vitamin_b12 * multiplier,
-            'magnesium': food.magnesium * multiplier
+            'id': self.id,
+            'date': self.date.isoformat(),
+            'meal_type': self.meal_type,
+            'food_id': self.food_id,
+            'food_name': food.name if food else 'Unknown',
+            'amount_grams': self.grams,
+            'calories': nutrition['calories'],
+            'protein': nutrition['protein'],
+            'carbohydrates': nutrition['carbohydrates'],
+            'fat': nutrition['fat'],
+            'notes': getattr(self, 'notes', None),
+            'created_at': getattr(self, 'created_at', datetime.now()).isoformat()
         }
@@ -1,7 +1,8 @@
 from sqlalchemy import func, and_
 from datetime import date, datetime, timedelta
-from db.models.diary_entry_improved import DiaryEntry
+from db.models.diary_entry_simple import DiaryEntry
 from db.models.food import Food
+from db.models.nutrient_vector import FIELDS, NutrientMatrix, NutrientVector
 from db.models.meal_types import MealType
 
 class DiaryHelpers:
@@ -9,39 +10,27 @@ class DiaryHelpers:
     def get_daily_summary(session, target_date):
         """Get total nutritional intake for a specific date"""
         entries = session.query(DiaryEntry).filter(DiaryEntry.date == target_date).all()
+        matrix = NutrientMatrix.load(session, {entry.food_id for entry in entries})
+        meal_totals = DiaryEntry.totals_by(entries, matrix, key=lambda entry: entry.meal_type)
         
-        summary = {
-            'date': target_date,
-            'total_calories': sum(entry.calories for entry in entries),
-            'total_protein': sum(entry.protein for entry in entries),
-            'total_carbohydrates': sum(entry.carbohydrates for entry in entries),
-            'total_fat': sum(entry.fat for entry in entries),
-            'total_fiber': sum(entry.fiber for entry in entries),
-            'total_sugar': sum(entry.sugar for entry in entries),
-            'total_saturated_fat': sum(entry.saturated_fat for entry in entries),
-            'total_unsaturated_fat': sum(entry.unsaturated_fat for entry in entries),
-            'total_cholesterol': sum(entry.cholesterol for entry in entries),
-            'total_sodium': sum(entry.sodium for entry in entries),
-            'total_potassium': sum(entry.potassium for entry in entries),
-            'total_calcium': sum(entry.calcium for entry in entries),
-            'total_iron': sum(entry.iron for entry in entries),
-            'total_vitamin_a': sum(entry.vitamin_a for entry in entries),
-            'total_vitamin_c': sum(entry.vitamin_c for entry in entries),
-            'total_vitamin_d': sum(entry.vitamin_d for entry in entries),
-            'total_vitamin_b12': sum(entry.vitamin_b12 for entry in entries),
-            'total_magnesium': sum(entry.magnesium for entry in entries),
-            'meal_breakdown': {}
-        }
+        day_total = NutrientVector.zeros()
+        for values in meal_totals.values():
+            NutrientVector.add(day_total, values)
+        
+        summary = {'date': target_date}
+        for field, value in zip(FIELDS, day_total):
+            summary[f'total_{field}'] = value
+        summary['meal_breakdown'] = {}
         
         # Break down by meal type
         for meal_type in MealType.ALL_TYPES:
-            meal_entries = [e for e in entries if e.meal_type == meal_type]
+            values = NutrientVector.to_dict(meal_totals.get(meal_type, NutrientVector.zeros()))
             summary['meal_breakdown'][meal_type] = {
-                'calories': sum(entry.calories for entry in meal_entries),
-                'protein': sum(entry.protein for entry in meal_entries),
-                'carbohydrates': sum(entry.carbohydrates for entry in meal_entries),
-                'fat': sum(entry.fat for entry in meal_entries),
-                'entry_count': len(meal_entries)
+                'calories': values['calories'],
+                'protein': values['protein'],
+                'carbohydrates': values['carbohydrates'],
+                'fat': values['fat'],
+                'entry_count': sum(1 for entry in entries if entry.meal_type == meal_type)
             }
         
         return summary
@@ -76,7 +65,7 @@ class DiaryHelpers:
         return session.query(
             Food,
             func.count(DiaryEntry.id).label('usage_count'),
-            func.sum(DiaryEntry.calories).label('total_calories')
+            func.sum(DiaryEntry.nutrient_expression('calories')).label('total_calories')
         ).join(DiaryEntry).filter(
             DiaryEntry.date >= start_date
         ).group_by(Food.id).order_by(
@@ -105,21 +94,20 @@ class DiaryHelpers:
         ).all()
         
         # Group by date
+        matrix = NutrientMatrix.load(session, {entry.food_id for entry in entries})
+        totals_by_date = DiaryEntry.totals_by(entries, matrix, key=lambda entry: entry.date)
+        
         daily_summaries = {}
+        for entry_date, values in totals_by_date.items():
+            values = NutrientVector.to_dict(values)
+            daily_summaries[entry_date] = {
+                'calories': values['calories'],
+                'protein': values['protein'],
+                'carbohydrates': values['carbohydrates'],
+                'fat': values['fat'],
+                'entry_count': 0
+            }
         for entry in entries:
-            if entry.date not in daily_summaries:
-                daily_summaries[entry.date] = {
-                    'calories': 0,
-                    'protein': 0,
-                    'carbohydrates': 0,
-                    'fat': 0,
-                    'entry_count': 0
-                }
-            
-            daily_summaries[entry.date]['calories'] += entry.calories
-            daily_summaries[entry.date]['protein'] += entry.protein
-            daily_summaries[entry.date]['carbohydrates'] += entry.carbohydrates
-            daily_summaries[entry.date]['fat'] += entry.fat
             daily_summaries[entry.date]['entry_count'] += 1
         
         return daily_summaries
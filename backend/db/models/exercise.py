@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, Index
 from db.database import db
 from datetime import date
 
@@ -13,3 +13,21 @@ class Exercise(db.Model):
     duration_minutes = Column(Float, default=0.0)
     calories_burned = Column(Float, default=0.0)
     date = Column(Date, default=date.today)
+    
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_exercises_date', 'date'),
+        Index('idx_exercises_sync_version', 'sync_version'),
+    )
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'duration_minutes': self.duration_minutes,
+            'calories_burned': self.calories_burned,
+            'date': self.date.isoformat()
+        }
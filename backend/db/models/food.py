@@ -1,9 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from db.database import Base
 
 class Food(Base):
     __tablename__ = 'foods'
     
+    # Nutrient columns (per 100g) in a fixed order, used for aggregation
+    NUTRIENT_FIELDS = [
+        'calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar',
+        'saturated_fat', 'unsaturated_fat', 'cholesterol', 'sodium',
+        'potassium', 'calcium', 'iron', 'vitamin_a', 'vitamin_c',
+        'vitamin_d', 'vitamin_b12', 'magnesium'
+    ]
+    
+    # Fields returned for a food by the API, in response order
+    API_FIELDS = [
+        'id', 'name', 'category', 'brand', 'used', 'last_used', 'last_portion',
+        'calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar',
+        'saturated_fat', 'unsaturated_fat', 'cholesterol', 'sodium', 'potassium',
+        'calcium', 'iron', 'vitamin_a', 'vitamin_c', 'vitamin_d', 'vitamin_b12',
+        'magnesium', 'created_at', 'updated_at'
+    ]
+    
     # Primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -42,3 +59,24 @@ class Food(Base):
     # Timestamps
     created_at = Column(DateTime, nullable=False)
     updated_at = Column(DateTime, nullable=False)
+    
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
+    # Usage indexes for recent foods and search ranking
+    __table_args__ = (
+        Index('idx_foods_used', 'used'),
+        Index('idx_foods_last_used', 'last_used'),
+        Index('idx_foods_sync_version', 'sync_version'),
+    )
+    
+    @staticmethod
+    def to_api_dict(food, fields=None):
+        """Serialize a food (or a projected row) to a dict with the given API fields"""
+        result = {}
+        for field in fields or Food.API_FIELDS:
+            value = getattr(food, field)
+            if field in ('created_at', 'updated_at'):
+                value = value.isoformat() if value else None
+            result[field] = value
+        return result
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Index
+from db.database import Base
+
+class FoodOccurrence(Base):
+    __tablename__ = 'food_occurrences'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Meal context and food
+    meal_type = Column(String(50), nullable=False)
+    food_id = Column(Integer, nullable=False)
+
+    # Number of meals of this type (distinct dates) that contain the food
+    meal_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_food_occurrences_meal_food', 'meal_type', 'food_id', unique=True),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from db.database import Base
+from datetime import datetime
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    
+    # Client supplied Idempotency-Key (primary key, so a repeat is one index lookup)
+    key = Column(String(255), primary_key=True)
+    
+    # Endpoint (or replayed mutation type) the key was used for
+    endpoint = Column(String(100), nullable=False)
+    
+    # Stored response; NULL until the request that applied the key has finished
+    status_code = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+    
+    # Keys older than IDEMPOTENCY_TTL_HOURS are evicted
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_idempotency_keys_created', 'created_at'),
+    )
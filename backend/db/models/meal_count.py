@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from db.database import Base
+
+class MealCount(Base):
+    __tablename__ = 'meal_counts'
+
+    # Meal type, e.g. 'morgenmad'
+    meal_type = Column(String(50), primary_key=True)
+
+    # Number of meals of this type (distinct dates with at least one entry)
+    meal_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,121 @@
+from array import array
+from db.models.food import Food
+
+# Nutrient order shared by every vector and matrix row
+FIELDS = tuple(Food.NUTRIENT_FIELDS)
+WIDTH = len(FIELDS)
+
+class NutrientVector:
+    """Nutrient values as an array('d') in FIELDS order."""
+
+    @staticmethod
+    def zeros():
+        return array('d', bytes(8 * WIDTH))
+
+    @staticmethod
+    def of(source):
+        """Vector of a food's (per 100g) or an entry's stored values; None counts as 0."""
+        return array('d', [getattr(source, field) or 0.0 for field in FIELDS])
+
+    @staticmethod
+    def scaled(values, factor):
+        return array('d', [value * factor for value in values])
+
+    @staticmethod
+    def add(total, values, factor=1.0):
+        """Add values * factor to total in place and return it."""
+        total[:] = array('d', [t + v * factor for t, v in zip(total, values)])
+        return total
+
+    @staticmethod
+    def to_dict(values):
+        return dict(zip(FIELDS, values))
+
+class NutrientMatrix:
+    """Per-100g nutrient rows for many foods packed into one array('d').
+
+    Row i holds the food at self.index[food_id] == i, WIDTH values long.
+    totals() computes sum(grams * row / 100) for a list of (food_id, grams)
+    by first summing grams per food, so the nutrient arithmetic runs once
+    per distinct food instead of once per entry: a year of entries over a
+    few hundred foods costs a dict pass plus a few hundred row additions.
+    """
+
+    def __init__(self):
+        self.values = array('d')
+        self.index = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, food_id):
+        return food_id in self.index
+
+    def set_row(self, food_id, values):
+        """Insert or replace a food's row (WIDTH values per 100g)."""
+        row = self.index.get(food_id)
+        if row is None:
+            self.index[food_id] = len(self.index)
+            self.values.extend(values)
+        else:
+            self.values[row * WIDTH:(row + 1) * WIDTH] = array('d', values)
+
+    def add_food(self, food):
+        self.set_row(food.id, NutrientVector.of(food))
+
+    def row(self, food_id):
+        row = self.index[food_id]
+        return self.values[row * WIDTH:(row + 1) * WIDTH]
+
+    @classmethod
+    def from_foods(cls, foods):
+        matrix = cls()
+        for food in foods:
+            matrix.add_food(food)
+        return matrix
+
+    @classmethod
+    def load(cls, session, food_ids=None):
+        """Build a matrix from the foods table in one query (all foods if food_ids is None)."""
+        query = session.query(Food.id, *[getattr(Food, field) for field in FIELDS])
+        if food_ids is not None:
+            food_ids = set(food_ids)
+            if not food_ids:
+                return cls()
+            query = query.filter(Food.id.in_(food_ids))
+
+        matrix = cls()
+        for food_id, *values in query:
+            matrix.set_row(food_id, [value or 0.0 for value in values])
+        return matrix
+
+    def _accumulate(self, total, grams_by_food):
+        values = self.values
+        for food_id, grams in grams_by_food.items():
+            row = self.index.get(food_id)
+            if row is None:
+                # Unknown foods contribute nothing, like the rollup's outer join
+                continue
+            start = row * WIDTH
+            NutrientVector.add(total, values[start:start + WIDTH], grams / 100.0)
+        return total
+
+    def totals(self, amounts):
+        """Return the summed nutrient vector of (food_id, grams) pairs."""
+        grams_by_food = {}
+        for food_id, grams in amounts:
+            grams_by_food[food_id] = grams_by_food.get(food_id, 0.0) + grams
+        return self._accumulate(NutrientVector.zeros(), grams_by_food)
+
+    def totals_by(self, keyed_amounts):
+        """Return {key: summed vector} for (key, food_id, grams) triples, e.g. per date or meal."""
+        grams_by_key = {}
+        for key, food_id, grams in keyed_amounts:
+            grams_by_food = grams_by_key.get(key)
+            if grams_by_food is None:
+                grams_by_food = grams_by_key[key] = {}
+            grams_by_food[food_id] = grams_by_food.get(food_id, 0.0) + grams
+        return {
+            key: self._accumulate(NutrientVector.zeros(), grams_by_food)
+            for key, grams_by_food in grams_by_key.items()
+        }
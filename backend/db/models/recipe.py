@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from db.database import Base
+from datetime import datetime
+
+class Recipe(Base):
+    __tablename__ = 'recipes'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Recipe name (also the name of its food)
+    name = Column(String(255), nullable=False)
+
+    # The food that carries the recipe's precomputed nutrition per 100g.
+    # Diary entries reference this food like any other.
+    food_id = Column(Integer, ForeignKey('foods.id'), nullable=False, unique=True)
+
+    # Finished weight after cooking; the component weights are used if not set
+    yield_grams = Column(Float, nullable=True)
+
+    # Sum of the component weights when the vector was last computed
+    total_grams = Column(Float, nullable=False, default=0.0)
+
+    # Timestamps
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    food = relationship("Food", foreign_keys=[food_id])
+    components = relationship(
+        "RecipeComponent", back_populates="recipe",
+        cascade="all, delete-orphan", order_by="RecipeComponent.id"
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from db.database import Base
+
+class RecipeComponent(Base):
+    __tablename__ = 'recipe_components'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Recipe and ingredient (an ingredient may itself be a recipe's food)
+    recipe_id = Column(Integer, ForeignKey('recipes.id'), nullable=False)
+    food_id = Column(Integer, ForeignKey('foods.id'), nullable=False)
+
+    # Amount of the ingredient in the whole recipe
+    grams = Column(Float, nullable=False)
+
+    # Relationships
+    recipe = relationship("Recipe", back_populates="components")
+    food = relationship("Food", foreign_keys=[food_id])
+
+    # Finding the recipes that use a food when it changes
+    __table_args__ = (
+        Index('idx_recipe_components_recipe', 'recipe_id'),
+        Index('idx_recipe_components_food', 'food_id'),
+    )
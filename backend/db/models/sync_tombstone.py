@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from db.database import Base
+from datetime import datetime
+
+class SyncTombstone(Base):
+    __tablename__ = 'sync_tombstones'
+    
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # The deleted row, by sync table name ('foods', 'diary_entries', ...)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    
+    # Sync version of the deleting transaction
+    sync_version = Column(Integer, nullable=False)
+    
+    # Tombstones older than SYNC_TOMBSTONE_DAYS are pruned
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_sync_tombstones_version', 'sync_version'),
+        Index('idx_sync_tombstones_created', 'created_at'),
+    )
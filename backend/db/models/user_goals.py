@@ -12,3 +12,16 @@ class UserGoals(db.Model):
     protein_target = Column(Float, default=150.0)
     carbs_target = Column(Float, default=250.0)
     fat_target = Column(Float, default=70.0)
+    
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'daily_calories': self.daily_calories,
+            'protein_target': self.protein_target,
+            'carbs_target': self.carbs_target,
+            'fat_target': self.fat_target
+        }
@@ -37,6 +37,9 @@ class UserSettings(db.Model):
     created_at = Column(Date, default=date.today)
     updated_at = Column(Date, default=date.today)
     
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
         return {
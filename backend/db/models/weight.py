@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date
+from sqlalchemy import Column, Integer, Float, Date, Index
 from db.database import db
 from datetime import date
 
@@ -11,3 +11,19 @@ class Weight(db.Model):
     # Required fields
     date = Column(Date, default=date.today)
     weight_kg = Column(Float, nullable=False)
+    
+    # Version of the last change, for delta sync (see SyncService)
+    sync_version = Column(Integer, nullable=True)
+    
+    __table_args__ = (
+        Index('idx_weights_date', 'date'),
+        Index('idx_weights_sync_version', 'sync_version'),
+    )
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'date': self.date.isoformat(),
+            'weight_kg': self.weight_kg
+        }
@@ -0,0 +1,75 @@
+"""
+Gunicorn konfiguration til produktion.
+
+Alle værdier kan overstyres med miljøvariabler:
+
+  WEB_CONCURRENCY        antal worker processer (standard: 2 * kerner + 1)
+  GUNICORN_WORKER_CLASS  gthread (standard), sync eller gevent
+  GUNICORN_THREADS       tråde per worker ved gthread (standard: 4)
+  GUNICORN_PRELOAD       indlæs appen i master processen før fork (standard: true)
+  GUNICORN_TIMEOUT       sekunder før en hængende worker genstartes
+  GUNICORN_MAX_REQUESTS  genstart workers efter så mange requests (0 = aldrig)
+  GUNICORN_ACCESS_LOG    fil til access log, '-' for stdout, tom for ingen
+
+Hver åben /api/events/stream holder en af workerens GUNICORN_THREADS
+tråde i op til EVENT_STREAM_SECONDS, så med gthread kan hver worker højst
+have så mange streams åbne, og de tager tråde fra almindelige requests.
+Ved mere end en håndfuld samtidige abonnenter bruges gevent, som kræver
+`pip install gevent`. Events deles mellem workers gennem databasen, så en
+stream får ændringer fra alle workers.
+
+Send SIGHUP til master processen for at genstarte workers uden nedetid.
+Med preload genindlæses koden ikke ved SIGHUP; ved deploy af ny kode
+bruges en fuld genstart (SIGTERM venter op til graceful_timeout på
+igangværende requests).
+"""
+
+import multiprocessing
+import os
+
+# Server socket
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+backlog = 2048
+
+# Worker processer
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Indlæs appen én gang i master processen, så opstart (backfill af
+# afledte tabeller, søgeindeks) kun sker én gang og workers deler hukommelse
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Genstarter
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# Logging
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# HTTPS (samme variabler som app.py)
+if os.getenv('USE_HTTPS', 'False').lower() == 'true':
+    cert_path = os.getenv('SSL_CERT_PATH', '/etc/ssl/certs/calcalc-selfsigned.crt')
+    key_path = os.getenv('SSL_KEY_PATH', '/etc/ssl/private/calcalc-selfsigned.key')
+    if os.path.exists(cert_path) and os.path.exists(key_path):
+        certfile = cert_path
+        keyfile = key_path
+
+def post_fork(server, worker):
+    """Luk database forbindelser arvet fra master processen.
+
+    Med preload_app har master processen brugt engine'en under opstart;
+    forbindelser må ikke deles mellem processer.
+    """
+    if not preload_app:
+        return
+
+    from db.database import db
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
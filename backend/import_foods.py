@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 """
 Script til at importere fødevare fra foods.json til databasen.
+
+Med --on-conflict update overskrives næringsindholdet af eksisterende
+fødevarer, og bagefter genberegnes de opskrifter og dagstotaler der bygger
+på dem.
+
+Brug: python import_foods.py [fil.json] [--batch-size 1000] [--on-conflict skip|update]
 """
 
+import argparse
 import json
-import os
+import resource
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -14,28 +22,105 @@ backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
 from app import create_app
+from sqlalchemy import insert, select
 from db.database import db
 from db.models.food import Food
+from db.models.catalog_version import CatalogVersion
+from services.food_search_service import FoodSearchService
+from services.recipe_service import RecipeService
+from services.sync_service import SyncService
 
-def load_foods_json():
-    """Læs foods.json filen."""
-    foods_file = Path(__file__).parent.parent / "foods.json"
-    
-    if not foods_file.exists():
-        print(f"❌ foods.json ikke fundet på: {foods_file}")
-        return None
-    
-    try:
-        with open(foods_file, 'r', encoding='utf-8') as f:
-            foods_data = json.load(f)
-        print(f"✅ Læst {len(foods_data)} fødevare fra foods.json")
-        return foods_data
-    except Exception as e:
-        print(f"❌ Fejl ved læsning af foods.json: {e}")
-        return None
+CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 1000
+PROGRESS_EVERY = 10000
 
-def convert_food_data(food_name, food_data):
-    """Konverter JSON data til Food model format."""
+def iter_foods_json(foods_file):
+    """Læs fødevarer inkrementelt fra en JSON fil.
+
+    Understøtter både et objekt {navn: data, ...} (som foods.json) og en
+    liste [{"name": ...}, ...]. Kun en lille buffer holdes i hukommelsen, så
+    store filer kan læses uden at indlæse det hele.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(foods_file, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def next_char():
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buf):
+                raise ValueError('Uventet slutning på JSON fil')
+            char = buf[pos]
+            pos += 1
+            return char
+
+        def decode_value():
+            nonlocal pos
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A value ending exactly at the buffer edge may be cut off
+                    if end < len(buf) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        opening = next_char()
+        if opening == '{':
+            closing = '}'
+        elif opening == '[':
+            closing = ']'
+        else:
+            raise ValueError('foods JSON skal være et objekt eller en liste')
+
+        skip_whitespace()
+        if pos < len(buf) and buf[pos] == closing:
+            return
+
+        while True:
+            if opening == '{':
+                food_name = decode_value()
+                if next_char() != ':':
+                    raise ValueError(f'Forventede ":" efter {food_name!r}')
+                food_data = decode_value()
+            else:
+                food_data = decode_value()
+                food_name = food_data.get('name')
+
+            yield food_name, food_data
+
+            separator = next_char()
+            if separator == closing:
+                return
+            if separator != ',':
+                raise ValueError(f'Uventet tegn {separator!r} i JSON fil')
+
+def food_values(food_name, food_data):
+    """Konverter JSON data til en dict med Food kolonner."""
     try:
         # Hent grundlæggende data
         name = food_data.get('name', food_name)
@@ -71,8 +156,8 @@ def convert_food_data(food_name, food_data):
         vitamin_a = safe_float(food_data.get('vitamin_a_procent'))
         vitamin_c = safe_float(food_data.get('vitamin_c_procent'))
         
-        # Opret Food objekt
-        food = Food(
+        now = datetime.now()
+        return dict(
             name=name,
             category=category,
             brand=brand,
@@ -92,74 +177,172 @@ def convert_food_data(food_name, food_data):
             vitamin_a=vitamin_a,
             vitamin_c=vitamin_c,
             used=0,  # Standard værdi for nye fødevare
-            created_at=datetime.now(),
-            updated_at=datetime.now()
+            created_at=now,
+            updated_at=now
         )
         
-        return food
-        
     except Exception as e:
         print(f"❌ Fejl ved konvertering af {food_name}: {e}")
         return None
 
-def import_foods():
-    """Hovedfunktion til at importere fødevare."""
+def convert_food_data(food_name, food_data):
+    """Konverter JSON data til Food model format."""
+    values = food_values(food_name, food_data)
+    return Food(**values) if values else None
+
+def upsert_statement(dialect, on_conflict):
+    """Byg en INSERT ... ON CONFLICT(name) for SQLite/Postgres, ellers None."""
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+
+    stmt = insert(Food.__table__)
+    if on_conflict == 'update':
+        # Behold brugsdata (used, last_used, last_portion) og created_at
+        updated = {
+            column: stmt.excluded[column]
+            for column in ['category', 'brand', 'updated_at', 'sync_version'] + Food.NUTRIENT_FIELDS
+        }
+        return stmt.on_conflict_do_update(index_elements=['name'], set_=updated)
+    return stmt.on_conflict_do_nothing(index_elements=['name'])
+
+def write_food_batch(batch, dialect, on_conflict):
+    """Skriv en batch og returner (importeret/opdateret, sprunget over)."""
+    # Nye og opdaterede rækker får transaktionens sync version
+    sync_version = SyncService.version(db.session, Food)
+    rows = {name: dict(values, sync_version=sync_version) for name, values in batch.items()}
+    stmt = upsert_statement(dialect, on_conflict)
+    if stmt is not None:
+        result = db.session.execute(stmt, list(rows.values()))
+        # rowcount tæller kun indsatte rækker ved DO NOTHING (-1 hvis ukendt)
+        if on_conflict == 'update' or result.rowcount < 0:
+            return len(batch), 0
+        return result.rowcount, len(batch) - result.rowcount
+
+    # Andre databaser: find eksisterende navne med én query pr. batch
+    existing = {
+        row.name for row in db.session.query(Food.name).filter(Food.name.in_(list(batch)))
+    }
+    new_rows = [values for name, values in rows.items() if name not in existing]
+    if new_rows:
+        db.session.execute(insert(Food.__table__), new_rows)
+    return len(new_rows), len(existing)
+
+def refresh_updated_foods(since_version):
+    """Genberegn afledte data for fødevarer opdateret siden en sync version.
+
+    Ved --on-conflict update kan næringsindholdet af eksisterende fødevarer
+    ændres. Opskrifter genberegnes, og dagbogens dagstotaler genberegnes for
+    hver dag en ændret fødevare (eller opskrift) er logget. Returnerer
+    (ændrede opskrifter, genberegnede dage). Committer ikke.
+    """
+    updated = select(Food.id).where(Food.sync_version > since_version)
+    return RecipeService().refresh_changed_foods(updated)
+
+def import_foods(foods_file=None, batch_size=DEFAULT_BATCH_SIZE, on_conflict='skip'):
+    """Hovedfunktion til at importere fødevare.
+
+    Filen læses inkrementelt og skrives i batches med INSERT ... ON CONFLICT,
+    så hukommelsesforbruget er begrænset af batch størrelsen.
+    """
     print("🚀 Starter import af fødevare...")
     
+    if foods_file is None:
+        foods_file = Path(__file__).parent.parent / "foods.json"
+    foods_file = Path(foods_file)
+    
+    if not foods_file.exists():
+        print(f"❌ Fil ikke fundet: {foods_file}")
+        return
+    
     # Opret Flask app
     app = create_app()
     
     with app.app_context():
-        # Læs foods.json
-        foods_data = load_foods_json()
-        if not foods_data:
-            return
+        dialect = db.engine.dialect.name
         
         # Tællere
         imported_count = 0
         skipped_count = 0
         error_count = 0
         
-        print(f"📊 Starter import af {len(foods_data)} fødevare...")
+        started = time.perf_counter()
+        batch = {}
         
-        # Import hver fødevare
-        for food_name, food_data in foods_data.items():
-            try:
-                # Tjek om fødevaren allerede eksisterer
-                existing_food = Food.query.filter_by(name=food_data.get('name', food_name)).first()
-                if existing_food:
-                    print(f"⏭️  Springet over: {food_name} (allerede i database)")
-                    skipped_count += 1
-                    continue
-                
-                # Konverter og gem
-                food = convert_food_data(food_name, food_data)
-                if food:
-                    db.session.add(food)
-                    imported_count += 1
-                    
-                    if imported_count % 100 == 0:
-                        print(f"📈 Importeret {imported_count} fødevare...")
-                else:
-                    error_count += 1
-                    
-            except Exception as e:
-                print(f"❌ Fejl ved import af {food_name}: {e}")
-                error_count += 1
+        # Fødevarer opdateret af importen får en nyere sync version end denne
+        since_version = CatalogVersion.get(db.session, 'sync')
+        refreshed = None
         
-        # Commit alle ændringer
-        try:
+        def flush():
+            nonlocal imported_count, skipped_count
+            if not batch:
+                return
+            batch_count = len(batch)
+            imported, skipped = write_food_batch(batch, dialect, on_conflict)
             db.session.commit()
-            print(f"✅ Import fuldført!")
-            print(f"📊 Statistik:")
-            print(f"   - Importeret: {imported_count}")
-            print(f"   - Springet over: {skipped_count}")
-            print(f"   - Fejl: {error_count}")
-            print(f"   - Total: {imported_count + skipped_count + error_count}")
+            imported_count += imported
+            skipped_count += skipped
+            batch.clear()
             
+            processed = imported_count + skipped_count + error_count
+            if processed // PROGRESS_EVERY != (processed - batch_count) // PROGRESS_EVERY:
+                print(f"📈 Behandlet {processed} fødevare...")
+        
+        print(f"📊 Importerer fra {foods_file} i batches af {batch_size} ({on_conflict} ved dubletter)...")
+        
+        try:
+            for food_name, food_data in iter_foods_json(foods_file):
+                values = food_values(food_name, food_data) if isinstance(food_data, dict) else None
+                if not values or not values['name']:
+                    error_count += 1
+                    continue
+                
+                # Dubletter i samme batch: sidste forekomst vinder
+                if values['name'] in batch:
+                    skipped_count += 1
+                batch[values['name']] = values
+                
+                if len(batch) >= batch_size:
+                    flush()
+            
+            flush()
+            
+            # Afledte data: opskrifter, dagstotaler, søgeindeks og katalog version
+            if on_conflict == 'update':
+                refreshed = refresh_updated_foods(since_version)
+            FoodSearchService().rebuild_index()
+            CatalogVersion.bump(db.session, 'foods')
+            db.session.commit()
+        
         except Exception as e:
-            print(f"❌ Fejl ved commit til database: {e}")
+            print(f"❌ Fejl ved import: {e}")
             db.session.rollback()
+            return
+        
+        elapsed = time.perf_counter() - started
+        total = imported_count + skipped_count + error_count
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        
+        print(f"✅ Import fuldført!")
+        print(f"📊 Statistik:")
+        print(f"   - {'Importeret/opdateret' if on_conflict == 'update' else 'Importeret'}: {imported_count}")
+        print(f"   - Springet over: {skipped_count}")
+        print(f"   - Fejl: {error_count}")
+        if refreshed:
+            print(f"   - Genberegnet: {refreshed[0]} opskrifter, dagstotaler for {refreshed[1]} dage")
+        print(f"   - Total: {total}")
+        print(f"   - Tid: {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} fødevare/s)")
+        print(f"   - Peak RSS: {peak_rss_mb:.1f} MB")
 
 if __name__ == "__main__":
-    import_foods()
+    parser = argparse.ArgumentParser(description='Importer fødevare fra JSON')
+    parser.add_argument('file', nargs='?', help='JSON fil (standard: ../foods.json)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--on-conflict', choices=['skip', 'update'], default='skip',
+                        help='Hvad der sker med fødevare hvis navn allerede findes')
+    args = parser.parse_args()
+    
+    import_foods(args.file, args.batch_size, args.on_conflict)
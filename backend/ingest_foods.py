@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Parallel import af store næringsdatabaser (CSV, JSON Lines eller JSON) i foods.
+
+Filerne skal have samme nøgler som foods.json (name, category, brand,
+kcal_100g, protein_100g, ...). Importen kører i fire trin:
+
+  1. parse     - rå linjer læses i hovedprocessen og parses i en process pool
+  2. normalise - convert_food_data værdier valideres og normaliseres i poolen
+  3. dedupe    - dubletter på navn slås sammen (sidste forekomst vinder)
+  4. upsert    - batches skrives med INSERT ... ON CONFLICT og committes
+
+Efter hver commit skrives et checkpoint, så en afbrudt import kan
+genoptages fra samme sted ved at køre kommandoen igen. Med --on-conflict
+update genberegnes opskrifter og dagstotaler for de opdaterede fødevarer
+til sidst; checkpointet husker sync versionen fra importens start, så en
+genoptaget import også dækker fødevarer opdateret før afbrydelsen.
+
+Brug: python ingest_foods.py fil.csv [--workers N] [--batch-size 5000]
+                             [--on-conflict skip|update] [--restart]
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app import create_app
+from db.database import db
+from db.models.food import Food
+from db.models.catalog_version import CatalogVersion
+from services.food_search_service import FoodSearchService
+from import_foods import food_values, iter_foods_json, refresh_updated_foods, write_food_batch
+
+CHUNK_RECORDS = 5000
+DEFAULT_BATCH_SIZE = 5000
+PROGRESS_EVERY = 100000
+
+# Grænser for hvad der kan være per 100g
+MAX_CALORIES = 1000
+MAX_MACRO_GRAMS = 105
+MAX_ERROR_SAMPLES = 10
+
+NAME_LENGTH = Food.__table__.c.name.type.length
+BRAND_LENGTH = Food.__table__.c.brand.type.length
+CATEGORY_LENGTH = Food.__table__.c.category.type.length
+
+def detect_format(path):
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'json'
+
+# Trin 1 og 2: kører i worker processer
+
+def _clean_text(value):
+    return ' '.join(str(value).split()) if value else ''
+
+def normalise_values(food_name, food_data):
+    """Valider og normaliser én fødevare. Returnerer (values, fejl)."""
+    if not isinstance(food_data, dict):
+        return None, 'ikke et objekt'
+
+    values = food_values(food_name, food_data)
+    if not values:
+        return None, 'kunne ikke konverteres'
+
+    name = _clean_text(values['name'])
+    if not name:
+        return None, 'mangler navn'
+    if len(name) > NAME_LENGTH:
+        return None, f'navn længere end {NAME_LENGTH} tegn'
+    values['name'] = name
+    values['category'] = _clean_text(values['category'])[:CATEGORY_LENGTH] or 'ukendt'
+    values['brand'] = _clean_text(values['brand'])[:BRAND_LENGTH] or None
+
+    for field in Food.NUTRIENT_FIELDS:
+        value = values.get(field)
+        if value is None:
+            continue
+        if not math.isfinite(value) or value < 0:
+            return None, f'{name}: ugyldig {field} ({value})'
+
+    if values['calories'] > MAX_CALORIES:
+        return None, f'{name}: {values["calories"]} kcal per 100g'
+    if values['protein'] + values['carbohydrates'] + values['fat'] > MAX_MACRO_GRAMS:
+        return None, f'{name}: makronæringsstoffer over 100g per 100g'
+
+    return values, None
+
+def _parse_records(kind, header, payload):
+    """Parse en chunk til (navn, data) par."""
+    if kind == 'csv':
+        text = b''.join(payload).decode('utf-8')
+        for row in csv.DictReader(io.StringIO(text, newline=''), fieldnames=header):
+            yield None, row
+    elif kind == 'jsonl':
+        for line in payload:
+            line = line.strip()
+            if line:
+                food_data = json.loads(line)
+                yield food_data.get('name') if isinstance(food_data, dict) else None, food_data
+    else:
+        yield from payload
+
+def process_chunk(kind, header, payload):
+    """Parse og normaliser en chunk. Returnerer rækker og tællere."""
+    started = time.process_time()
+    rows = {}
+    parsed = invalid = duplicates = 0
+    errors = []
+
+    try:
+        records = list(_parse_records(kind, header, payload))
+    except (ValueError, csv.Error) as e:
+        # En ødelagt chunk tæller som ugyldig i stedet for at stoppe importen
+        return {}, {'parsed': 0, 'invalid': len(payload), 'duplicates': 0,
+                    'errors': [f'parse fejl: {e}'], 'seconds': time.process_time() - started}
+
+    for food_name, food_data in records:
+        parsed += 1
+        values, error = normalise_values(food_name, food_data)
+        if error:
+            invalid += 1
+            if len(errors) < MAX_ERROR_SAMPLES:
+                errors.append(error)
+            continue
+        if values['name'] in rows:
+            duplicates += 1
+        rows[values['name']] = values
+
+    return rows, {'parsed': parsed, 'invalid': invalid, 'duplicates': duplicates,
+                  'errors': errors, 'seconds': time.process_time() - started}
+
+# Læsning af kildefilen: kører i hovedprocessen
+
+def iter_line_chunks(path, kind, offset):
+    """Læs rå linjer i chunks. Yielder (header, linjer, antal records, byte offset).
+
+    Linjer læses som bytes, så byte offset kan bruges som checkpoint. For CSV
+    holdes felter med linjeskift i anførselstegn samlet i én record.
+    """
+    with open(path, 'rb') as f:
+        header = None
+        if kind == 'csv':
+            first = f.readline()
+            header = next(csv.reader([first.decode('utf-8-sig')]))
+            header = [column.strip() for column in header]
+            if offset:
+                f.seek(offset)
+
+        elif offset:
+            f.seek(offset)
+
+        lines = []
+        records = 0
+        pending_quotes = 0
+        for line in f:
+            lines.append(line)
+            if kind == 'csv':
+                # Et ulige antal anførselstegn betyder at recorden fortsætter
+                pending_quotes += line.count(b'"')
+                if pending_quotes % 2:
+                    continue
+                pending_quotes = 0
+            records += 1
+            if records >= CHUNK_RECORDS:
+                yield header, lines, records, f.tell()
+                lines = []
+                records = 0
+
+        if lines:
+            yield header, lines, records, f.tell()
+
+def iter_json_chunks(path, offset):
+    """Læs en JSON fil i chunks. Offset er antal records allerede importeret.
+
+    JSON kan ikke deles op uden at parse den, så her sker parsingen i
+    hovedprocessen; normaliseringen kører stadig i poolen.
+    """
+    records = []
+    position = 0
+    for food_name, food_data in iter_foods_json(path):
+        position += 1
+        if position <= offset:
+            continue
+        records.append((food_name, food_data))
+        if len(records) >= CHUNK_RECORDS:
+            yield None, records, len(records), position
+            records = []
+
+    if records:
+        yield None, records, len(records), position
+
+# Checkpoints
+
+def checkpoint_path(path):
+    return path.with_name(path.name + '.checkpoint')
+
+def source_signature(path):
+    stat = path.stat()
+    return {'source': str(path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def load_checkpoint(path):
+    checkpoint_file = checkpoint_path(path)
+    if not checkpoint_file.exists():
+        return None
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    # Kun genoptag hvis kildefilen er uændret
+    signature = source_signature(path)
+    if any(checkpoint.get(key) != value for key, value in signature.items()):
+        print("⚠️  Checkpoint passer ikke til filen - starter forfra")
+        return None
+    return checkpoint
+
+def save_checkpoint(path, offset, counters, totals, since_version):
+    checkpoint = source_signature(path)
+    checkpoint['offset'] = offset
+    checkpoint['since_version'] = since_version
+    checkpoint['counters'] = {name: counter.to_dict() for name, counter in counters.items()}
+    checkpoint['totals'] = totals
+
+    # Skriv atomisk, så et afbrudt program ikke efterlader et halvt checkpoint
+    checkpoint_file = checkpoint_path(path)
+    tmp_file = checkpoint_file.with_name(checkpoint_file.name + '.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_file, checkpoint_file)
+
+# Tællere
+
+class StageCounter:
+    """Antal records og tid brugt i ét trin."""
+
+    def __init__(self, records=0, seconds=0.0):
+        self.records = records
+        self.seconds = seconds
+
+    def add(self, records, seconds):
+        self.records += records
+        self.seconds += seconds
+
+    def rate(self):
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {'records': self.records, 'seconds': self.seconds}
+
+STAGES = ['read', 'parse_normalise', 'dedupe', 'upsert']
+
+def print_counters(counters, totals):
+    for name in STAGES:
+        counter = counters[name]
+        print(f"   - {name:<16} {counter.records:>10} records {counter.seconds:8.2f}s "
+              f"({counter.rate():>9.0f} records/s)")
+    print(f"   - Importeret/opdateret: {totals['written']}, dubletter/eksisterende: "
+          f"{totals['skipped']}, ugyldige: {totals['invalid']}")
+
+# Pipeline
+
+def ingest_foods(path, workers=None, batch_size=DEFAULT_BATCH_SIZE, on_conflict='skip', restart=False):
+    """Importer en stor næringsdatabase med parallel parsing og checkpoints."""
+    path = Path(path)
+    if not path.exists():
+        print(f"❌ Fil ikke fundet: {path}")
+        return
+
+    kind = detect_format(path)
+    workers = workers or os.cpu_count() or 1
+
+    checkpoint = None if restart else load_checkpoint(path)
+    offset = checkpoint['offset'] if checkpoint else 0
+    counters = {name: StageCounter() for name in STAGES}
+    if checkpoint:
+        for name, values in checkpoint.get('counters', {}).items():
+            if name in counters:
+                counters[name] = StageCounter(values['records'], values['seconds'])
+        print(f"🔁 Genoptager fra checkpoint (offset {offset})")
+
+    totals = {'written': 0, 'skipped': 0, 'invalid': 0}
+    if checkpoint:
+        totals.update(checkpoint.get('totals', {}))
+
+    app = create_app()
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        # Fødevarer opdateret af importen (også før en genoptagelse) får en
+        # nyere sync version end denne
+        if checkpoint and 'since_version' in checkpoint:
+            since_version = checkpoint['since_version']
+        else:
+            since_version = CatalogVersion.get(db.session, 'sync')
+        refreshed = None
+        print(f"🚀 Importerer {path} ({kind}) med {workers} workers, batches af {batch_size}...")
+
+        started = time.perf_counter()
+        pending = {}
+        pending_offset = offset
+        records_at_start = counters['parse_normalise'].records
+        last_progress = records_at_start
+
+        def flush():
+            nonlocal pending
+            if not pending:
+                return
+            stage_started = time.perf_counter()
+            written, skipped = write_food_batch(pending, dialect, on_conflict)
+            db.session.commit()
+            counters['upsert'].add(len(pending), time.perf_counter() - stage_started)
+            totals['written'] += written
+            totals['skipped'] += skipped
+            pending = {}
+
+            save_checkpoint(path, pending_offset, counters, totals, since_version)
+
+        if kind == 'json':
+            chunks = iter_json_chunks(path, offset)
+        else:
+            chunks = iter_line_chunks(path, kind, offset)
+
+        def next_chunk():
+            stage_started = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                counters['read'].add(chunk[2], time.perf_counter() - stage_started)
+            return chunk
+
+        error_samples = []
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Begræns antal chunks undervejs, så hukommelsen holdes nede
+                in_flight = deque()
+                exhausted = False
+
+                while True:
+                    while not exhausted and len(in_flight) < workers * 2:
+                        chunk = next_chunk()
+                        if chunk is None:
+                            exhausted = True
+                            break
+                        header, payload, _, end_offset = chunk
+                        in_flight.append((executor.submit(process_chunk, kind, header, payload), end_offset))
+
+                    if not in_flight:
+                        break
+
+                    # Resultater behandles i filens rækkefølge, så offset er sikkert
+                    future, end_offset = in_flight.popleft()
+                    rows, stats = future.result()
+                    counters['parse_normalise'].add(stats['parsed'], stats['seconds'])
+                    totals['invalid'] += stats['invalid']
+                    totals['skipped'] += stats['duplicates']
+                    for error in stats['errors']:
+                        if len(error_samples) < MAX_ERROR_SAMPLES:
+                            error_samples.append(error)
+
+                    stage_started = time.perf_counter()
+                    for name, values in rows.items():
+                        if name in pending:
+                            totals['skipped'] += 1
+                        pending[name] = values
+                    counters['dedupe'].add(len(rows), time.perf_counter() - stage_started)
+                    pending_offset = end_offset
+
+                    if len(pending) >= batch_size:
+                        flush()
+
+                    processed = counters['parse_normalise'].records
+                    if processed - last_progress >= PROGRESS_EVERY:
+                        last_progress = processed
+                        elapsed = time.perf_counter() - started
+                        print(f"📈 {processed} records ({(processed - records_at_start) / elapsed:.0f}/s), "
+                              f"{totals['written']} skrevet")
+
+                flush()
+
+            # Afledte data: opskrifter, dagstotaler, søgeindeks og katalog version
+            if on_conflict == 'update':
+                refreshed = refresh_updated_foods(since_version)
+            FoodSearchService().rebuild_index()
+            CatalogVersion.bump(db.session, 'foods')
+            db.session.commit()
+
+        except KeyboardInterrupt:
+            db.session.rollback()
+            print("⏸️  Afbrudt - kør kommandoen igen for at genoptage fra checkpoint")
+            return
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Fejl ved import: {e}")
+            print("   Kør kommandoen igen for at genoptage fra sidste checkpoint")
+            return
+
+        checkpoint_path(path).unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - started
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        print("✅ Import fuldført!")
+        print("📊 Trin (parse_normalise tid er CPU tid summeret over workers):")
+        print_counters(counters, totals)
+        run_records = counters['parse_normalise'].records - records_at_start
+        print(f"   - Tid: {elapsed:.2f}s ({run_records / elapsed if elapsed else 0:.0f} records/s)")
+        print(f"   - Peak RSS (hovedproces): {peak_rss_mb:.1f} MB")
+        if refreshed:
+            print(f"   - Genberegnet: {refreshed[0]} opskrifter, dagstotaler for {refreshed[1]} dage")
+        if error_samples:
+            print("⚠️  Eksempler på ugyldige records:")
+            for error in error_samples:
+                print(f"   - {error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parallel import af næringsdatabase')
+    parser.add_argument('file', help='CSV, JSON Lines eller JSON fil')
+    parser.add_argument('--workers', type=int, default=None, help='Antal processer (standard: antal kerner)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--on-conflict', choices=['skip', 'update'], default='skip',
+                        help='Hvad der sker med fødevare hvis navn allerede findes')
+    parser.add_argument('--restart', action='store_true', help='Ignorer checkpoint og start forfra')
+    args = parser.parse_args()
+
+    ingest_foods(args.file, args.workers, args.batch_size, args.on_conflict, args.restart)
@@ -0,0 +1,38 @@
+"""add indexes on diary, exercise, weight and food hot columns
+
+Revision ID: 3f1c2a9b7d10
+Revises: 
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns). Fresh databases already get these from
+# db.create_all(), and idx_foods_used may exist from the search index
+# setup, so every index is created with IF NOT EXISTS.
+INDEXES = [
+    ('idx_diary_entries_date_meal', 'diary_entries', ['date', 'meal_type']),
+    ('idx_diary_entries_food_date', 'diary_entries', ['food_id', 'date']),
+    ('idx_exercises_date', 'exercises', ['date']),
+    ('idx_weights_date', 'weights', ['date']),
+    ('idx_foods_used', 'foods', ['used']),
+    ('idx_foods_last_used', 'foods', ['last_used']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,64 @@
+"""add sync_version columns and the sync_tombstones table for delta sync
+
+Revision ID: 5d7a3e1c9b42
+Revises: 8c2e5f4a9d31
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7a3e1c9b42'
+down_revision = '8c2e5f4a9d31'
+branch_labels = None
+depends_on = None
+
+# Synced tables, with the name of their sync_version index (if any).
+# Existing rows keep a NULL version and are only sent by a full sync.
+SYNCED_TABLES = {
+    'foods': 'idx_foods_sync_version',
+    'diary_entries': 'idx_diary_entries_sync_version',
+    'exercises': 'idx_exercises_sync_version',
+    'weights': 'idx_weights_sync_version',
+    'user_goals': None,
+    'user_settings': None,
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # The app adds missing nullable columns at startup, so some or all of
+    # them may already exist
+    for table, index in SYNCED_TABLES.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        if 'sync_version' not in existing:
+            op.add_column(table, sa.Column('sync_version', sa.Integer(), nullable=True))
+        if index and index not in {i['name'] for i in inspector.get_indexes(table)}:
+            op.create_index(index, table, ['sync_version'])
+
+    if not inspector.has_table('sync_tombstones'):
+        op.create_table(
+            'sync_tombstones',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('table_name', sa.String(length=50), nullable=False),
+            sa.Column('row_id', sa.Integer(), nullable=False),
+            sa.Column('sync_version', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('idx_sync_tombstones_version', 'sync_tombstones', ['sync_version'])
+        op.create_index('idx_sync_tombstones_created', 'sync_tombstones', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_sync_tombstones_created', table_name='sync_tombstones')
+    op.drop_index('idx_sync_tombstones_version', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+
+    for table, index in reversed(list(SYNCED_TABLES.items())):
+        if index:
+            op.drop_index(index, table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('sync_version')
@@ -0,0 +1,63 @@
+"""add and backfill the diary_entries nutrient snapshot columns
+
+Revision ID: 8c2e5f4a9d31
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e5f4a9d31'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+NUTRIENT_FIELDS = [
+    'calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar',
+    'saturated_fat', 'unsaturated_fat', 'cholesterol', 'sodium',
+    'potassium', 'calcium', 'iron', 'vitamin_a', 'vitamin_c',
+    'vitamin_d', 'vitamin_b12', 'magnesium'
+]
+
+# Entries are backfilled in id ranges of this size so a large diary is
+# not rewritten in one statement
+BATCH_SIZE = 10000
+
+
+def upgrade():
+    connection = op.get_bind()
+
+    # The app adds missing nullable columns at startup, so some or all of
+    # them may already exist
+    existing = {column['name'] for column in sa.inspect(connection).get_columns('diary_entries')}
+    for field in NUTRIENT_FIELDS:
+        if field not in existing:
+            op.add_column('diary_entries', sa.Column(field, sa.Float(), nullable=True))
+
+    # Snapshot every entry that has none from its food's current values
+    entries = sa.table('diary_entries', sa.column('id'), sa.column('food_id'), sa.column('grams'),
+                       *[sa.column(field) for field in NUTRIENT_FIELDS])
+    foods = sa.table('foods', sa.column('id'), *[sa.column(field) for field in NUTRIENT_FIELDS])
+
+    max_id = connection.execute(sa.select(sa.func.max(entries.c.id))).scalar() or 0
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        connection.execute(
+            entries.update().values({
+                field: entries.c.grams * sa.func.coalesce(foods.c[field], 0.0) / 100.0
+                for field in NUTRIENT_FIELDS
+            }).where(
+                entries.c.food_id == foods.c.id,
+                entries.c.calories.is_(None),
+                entries.c.id >= start,
+                entries.c.id < start + BATCH_SIZE
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('diary_entries') as batch_op:
+        for field in reversed(NUTRIENT_FIELDS):
+            batch_op.drop_column(field)
@@ -0,0 +1,37 @@
+"""add the idempotency_keys table
+
+Revision ID: 9b4e2c7f1a58
+Revises: 5d7a3e1c9b42
+Create Date: 2026-10-18 23:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2c7f1a58'
+down_revision = '5d7a3e1c9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app creates missing tables at startup, so it may already exist
+    if sa.inspect(op.get_bind()).has_table('idempotency_keys'):
+        return
+
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(length=255), primary_key=True),
+        sa.Column('endpoint', sa.String(length=100), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('response', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('idx_idempotency_keys_created', 'idempotency_keys', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_idempotency_keys_created', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
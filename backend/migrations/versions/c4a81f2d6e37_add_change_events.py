@@ -0,0 +1,33 @@
+"""add the change_events table
+
+Revision ID: c4a81f2d6e37
+Revises: 9b4e2c7f1a58
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a81f2d6e37'
+down_revision = '9b4e2c7f1a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app creates missing tables at startup, so it may already exist
+    if sa.inspect(op.get_bind()).has_table('change_events'):
+        return
+
+    op.create_table(
+        'change_events',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('change_events')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Genopbyg food_associations, food_occurrences og meal_counts fra hele
+diary_entries historikken.
+
+Historikken læses én gang sorteret på (dato, måltid), parrene tælles i
+kompakte integer arrays, og de nye rækker skrives i samme transaktion som
+de gamle slettes. Læsere ser de gamle tal indtil commit.
+
+Brug: python rebuild_food_associations.py [--progress-every 10000]
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app import create_app
+from db.database import db
+from services.food_association_service import FoodAssociationService
+
+def rebuild_food_associations(progress_every):
+    """Slet og genberegn alle food association tællere."""
+    print("🚀 Genopbygger food_associations...")
+
+    app = create_app()
+
+    with app.app_context():
+        started = time.perf_counter()
+
+        def report(stats):
+            elapsed = time.perf_counter() - started
+            print(f"   {stats['meals']:>9} måltider | {stats['entries']:>10} indgange "
+                  f"| {stats['pair_updates']:>10} par-optællinger | {stats['entries'] / elapsed if elapsed else 0:9.0f} indgange/s")
+
+        service = FoodAssociationService()
+        try:
+            stats = service.rebuild(progress=report, progress_every=progress_every)
+            written = time.perf_counter() - started
+            db.session.commit()
+        except Exception as e:
+            print(f"❌ Fejl ved genopbygning: {e}")
+            db.session.rollback()
+            return False
+
+        elapsed = time.perf_counter() - started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"✅ {stats['pairs']} par fra {stats['meals']} måltider og {stats['entries']} indgange "
+              f"på {elapsed:.2f}s (commit {elapsed - written:.2f}s)")
+        print(f"   {stats['meals'] / elapsed:.0f} måltider/s, maks. hukommelse {peak_mb:.0f} MB")
+        return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Genopbyg food association tællere')
+    parser.add_argument('--progress-every', type=int, default=10000, help='Måltider mellem statuslinjer')
+    args = parser.parse_args()
+    sys.exit(0 if rebuild_food_associations(args.progress_every) else 1)
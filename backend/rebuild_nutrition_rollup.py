@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Genopbyg daily_nutrition_totals fra hele diary_entries historikken.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Tilføj backend mappen til Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app import create_app
+from db.database import db
+from services.nutrition_rollup_service import NutritionRollupService
+
+def rebuild_nutrition_rollup():
+    """Slet og genberegn alle rækker i daily_nutrition_totals."""
+    print("🚀 Genopbygger daily_nutrition_totals...")
+
+    app = create_app()
+
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            row_count = NutritionRollupService().rebuild()
+            db.session.commit()
+        except Exception as e:
+            print(f"❌ Fejl ved genopbygning: {e}")
+            db.session.rollback()
+            return False
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ Genopbygget {row_count} rækker (dato/måltid) på {elapsed:.2f}s")
+        return True
+
+if __name__ == "__main__":
+    sys.exit(0 if rebuild_nutrition_rollup() else 1)
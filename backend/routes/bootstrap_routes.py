@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from datetime import date, datetime
+import os
+from services.bootstrap_service import BootstrapService
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+bootstrap_service = BootstrapService()
+
+# The parts are loaded one after another by default (faster on SQLite);
+# BOOTSTRAP_CONCURRENT=true or ?concurrent=1 runs them in parallel
+CONCURRENT_DEFAULT = os.getenv('BOOTSTRAP_CONCURRENT', 'False').lower() == 'true'
+
+@bootstrap_bp.route('', methods=['GET'])
+@bootstrap_bp.route('/', methods=['GET'])
+def get_bootstrap():
+    """Get everything the dashboard loads on startup for one date in a single request.
+    
+    The response holds goals, settings, entries, summary, exercises and
+    weights, each shaped like the corresponding endpoint's data.
+    """
+    target_date = request.args.get('date')
+    concurrent = request.args.get('concurrent')
+    concurrent = CONCURRENT_DEFAULT if concurrent is None else concurrent.lower() in ('1', 'true')
+    
+    try:
+        target_date = datetime.strptime(target_date, '%Y-%m-%d').date() if target_date else date.today()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    try:
+        return jsonify(bootstrap_service.load(target_date, concurrent=concurrent))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,12 @@
+from flask import Blueprint, jsonify
+from db.database import get_engine_diagnostics
+
+diagnostics_bp = Blueprint('diagnostics', __name__)
+
+@diagnostics_bp.route('/database', methods=['GET'])
+def get_database_diagnostics():
+    """Get the active database profile and the settings in effect."""
+    try:
+        return jsonify(get_engine_diagnostics())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
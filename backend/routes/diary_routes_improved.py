@@ -4,8 +4,29 @@ from db.database import db
 from db.models.diary_entry_simple import DiaryEntry
 from db.models.food import Food
 from db.models.meal_types import MealType
+from db.models.recipe import Recipe
+from services.diary_summary_service import DiarySummaryService
+from services.nutrition_rollup_service import NutritionRollupService
+from services.food_association_service import FoodAssociationService
+from services.diary_batch_service import DiaryBatchService
+from services.food_recommendation_index import food_recommendation_index
+from services.recent_foods_index import recent_foods_index
+from services.event_broker import event_broker
+from services.food_usage_counter import food_usage_counter
+from services.idempotency_store import idempotency_store
 
 diary_bp = Blueprint('diary', __name__)
+diary_summary_service = DiarySummaryService()
+nutrition_rollup_service = NutritionRollupService()
+food_association_service = FoodAssociationService()
+diary_batch_service = DiaryBatchService()
+
+def _publish_change(event_type, payload, target_date):
+    """Publish a committed diary change together with the day's new totals"""
+    if not event_broker.has_subscribers():
+        return
+    payload['totals'] = diary_summary_service.get_daily_summary(target_date)
+    event_broker.publish(event_type, payload)
 
 @diary_bp.route('/entries', methods=['GET'])
 def get_diary_entries():
@@ -22,41 +43,15 @@ def get_diary_entries():
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
     try:
+        # Load entries and their foods in a single joined query
+        query = db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.date == target_date)
+        
         if meal_type:
-            entries = DiaryEntry.query.filter(
-                DiaryEntry.date == target_date,
-                DiaryEntry.meal_type == meal_type
-            ).all()
-        else:
-            entries = DiaryEntry.query.filter(DiaryEntry.date == target_date).all()
+            query = query.filter(DiaryEntry.meal_type == meal_type)
         
-        result = []
-        for entry in entries:
-            # Calculate calories based on grams and food data
-            multiplier = entry.grams / 100.0
-            food = Food.query.get(entry.food_id)
-            if food:
-                calc_calories = food.calories * multiplier
-                calc_protein = food.protein * multiplier
-                calc_carbs = food.carbohydrates * multiplier
-                calc_fat = food.fat * multiplier
-            else:
-                calc_calories = calc_protein = calc_carbs = calc_fat = 0
-            
-            result.append({
-                'id': entry.id,
-                'date': entry.date.isoformat(),
-                'meal_type': entry.meal_type,
-                'food_id': entry.food_id,
-                'food_name': food.name if food else 'Unknown',
-                'amount_grams': entry.grams,
-                'calories': calc_calories,
-                'protein': calc_protein,
-                'carbohydrates': calc_carbs,
-                'fat': calc_fat,
-                'notes': getattr(entry, 'notes', None),
-                'created_at': getattr(entry, 'created_at', datetime.now()).isoformat()
-            })
+        result = [entry.to_dict(food) for entry, food in query.all()]
         
         return jsonify(result)
     
@@ -64,10 +59,18 @@ def get_diary_entries():
         return jsonify({'error': str(e)}), 500
 
 @diary_bp.route('/entries', methods=['POST'])
+@idempotency_store.idempotent
 def add_diary_entry():
     """Add a new diary entry"""
     data = request.get_json()
     
+    # A recipe is logged through the food that holds its nutrition
+    if 'food_id' not in data and 'recipe_id' in data:
+        recipe = Recipe.query.filter(Recipe.id == data['recipe_id']).first()
+        if not recipe:
+            return jsonify({'error': 'Recipe not found'}), 404
+        data['food_id'] = recipe.food_id
+    
     required_fields = ['food_id', 'date', 'meal_type', 'amount_grams']
     for field in required_fields:
         if field not in data:
@@ -87,29 +90,29 @@ def add_diary_entry():
         if not food:
             return jsonify({'error': 'Food not found'}), 404
         
-        # Calculate nutritional values
-        multiplier = data['amount_grams'] / 100.0
-        calc_calories = food.calories * multiplier
-        calc_protein = food.protein * multiplier
-        calc_carbs = food.carbohydrates * multiplier
-        calc_fat = food.fat * multiplier
-        
-        # Create diary entry (simple model only has grams field)
+        # Create diary entry (snapshotting its nutrients in snapshot mode)
         entry = DiaryEntry(
             date=target_date,
             meal_type=data['meal_type'],
             food_id=data['food_id'],
-            grams=data['amount_grams']  # Simple model uses 'grams' field
+            grams=data['amount_grams']
         )
+        entry.take_snapshot(food)
+        nutrition = entry.nutrition(food)
         
         # Add to database
         db.session.add(entry)
+        nutrition_rollup_service.add_entry(entry, food)
+        association_changes = food_association_service.add_entry(entry)
         
-        # Update food's last_used timestamp
-        food.last_used = int(datetime.now().timestamp())
-        food.used = (food.used or 0) + 1
+        # Count the use once committed; foods are updated in batches
+        food_usage_counter.add(db.session, food.id)
         
         db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
+        food_usage_counter.flush_if_due()
+        _publish_change('diary_entry_added', {'entry': entry.to_dict(food)}, entry.date)
         
         return jsonify({
             'success': True,
@@ -118,11 +121,11 @@ def add_diary_entry():
             'meal_type': entry.meal_type,
             'food_id': entry.food_id,
             'food_name': food.name,
-            'amount_grams': entry.grams,  # Simple model uses 'grams' field
-            'calories': calc_calories,
-            'protein': calc_protein,
-            'carbohydrates': calc_carbs,
-            'fat': calc_fat,
+            'amount_grams': entry.grams,
+            'calories': nutrition['calories'],
+            'protein': nutrition['protein'],
+            'carbohydrates': nutrition['carbohydrates'],
+            'fat': nutrition['fat'],
             'created_at': datetime.now().isoformat()
         }), 201
     
@@ -130,6 +133,120 @@ def add_diary_entry():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@diary_bp.route('/entries/batch', methods=['POST'])
+@idempotency_store.idempotent
+def add_diary_entries_batch():
+    """Add several diary entries in one transaction, e.g. a whole meal"""
+    data = request.get_json(silent=True)
+    items = data.get('entries') if isinstance(data, dict) else data
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'entries must be a non-empty list'}), 400
+    
+    if len(items) > DiaryBatchService.MAX_ENTRIES:
+        return jsonify({'error': f'At most {DiaryBatchService.MAX_ENTRIES} entries per batch'}), 400
+    
+    try:
+        # Validate everything first; nothing is written if any entry is invalid
+        rows, foods, errors = diary_batch_service.validate(items)
+        if errors:
+            results = []
+            for index in range(len(items)):
+                if index in errors:
+                    results.append({'index': index, 'success': False, 'error': errors[index]})
+                else:
+                    results.append({'index': index, 'success': True})
+            return jsonify({'success': False, 'error': 'Validation failed', 'results': results}), 400
+        
+        entry_ids, association_changes = diary_batch_service.add_entries(rows, foods)
+        
+        # Serialize before commit while the foods are still loaded
+        results = []
+        for index, (entry_id, row) in enumerate(zip(entry_ids, rows)):
+            result = DiaryEntry(id=entry_id, **row).to_dict(foods[row['food_id']])
+            result['index'] = index
+            result['success'] = True
+            results.append(result)
+        
+        db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
+        food_usage_counter.flush_if_due()
+        
+        if event_broker.has_subscribers():
+            event_broker.publish('diary_entries_added', {
+                'entries': results,
+                'totals': [
+                    diary_summary_service.get_daily_summary(target_date)
+                    for target_date in sorted({row['date'] for row in rows})
+                ]
+            })
+        
+        return jsonify({'success': True, 'count': len(results), 'results': results}), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@diary_bp.route('/copy', methods=['POST'])
+@idempotency_store.idempotent
+def copy_diary_entries():
+    """Copy a day, a meal or several days of entries to another date"""
+    data = request.get_json(silent=True) or {}
+    
+    for field in ('from', 'to'):
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    
+    try:
+        source_date = datetime.strptime(data['from'], '%Y-%m-%d').date()
+        target_date = datetime.strptime(data['to'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    meal_type = data.get('meal_type')
+    target_meal_type = data.get('target_meal_type')
+    if meal_type and not MealType.is_valid(meal_type):
+        return jsonify({'error': 'Invalid meal type'}), 400
+    if target_meal_type and not meal_type:
+        return jsonify({'error': 'target_meal_type requires meal_type'}), 400
+    if target_meal_type and not MealType.is_valid(target_meal_type):
+        return jsonify({'error': 'Invalid target meal type'}), 400
+    
+    days = data.get('days', 1)
+    if not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= DiaryBatchService.MAX_COPY_DAYS:
+        return jsonify({'error': f'days must be between 1 and {DiaryBatchService.MAX_COPY_DAYS}'}), 400
+    
+    try:
+        copied, target_dates, association_changes = diary_batch_service.copy_entries(
+            source_date, target_date, meal_type, target_meal_type, days
+        )
+        db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
+        food_usage_counter.flush_if_due()
+        
+        if copied and event_broker.has_subscribers():
+            event_broker.publish('diary_entries_copied', {
+                'from': source_date.isoformat(),
+                'to': target_date.isoformat(),
+                'meal_type': meal_type,
+                'target_meal_type': target_meal_type or meal_type,
+                'days': days,
+                'copied': copied,
+                'totals': [diary_summary_service.get_daily_summary(d) for d in target_dates]
+            })
+        
+        return jsonify({
+            'success': True,
+            'copied': copied,
+            'dates': [d.isoformat() for d in target_dates]
+        }), 201 if copied else 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @diary_bp.route('/entries/<int:entry_id>', methods=['PUT'])
 def update_diary_entry(entry_id):
     """Update a diary entry"""
@@ -138,54 +255,36 @@ def update_diary_entry(entry_id):
     print(f"Updating diary entry {entry_id} with data: {data}")
     
     try:
-        entry = DiaryEntry.query.filter(DiaryEntry.id == entry_id).first()
-        if not entry:
+        row = db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.id == entry_id).first()
+        if not row:
             return jsonify({'error': 'Entry not found'}), 404
+        entry, food = row
         
-        # Update fields
-        if 'amount_grams' in data:
-            entry.grams = data['amount_grams']
-        
-        if 'meal_type' in data:
-            if not MealType.is_valid(data['meal_type']):
-                return jsonify({'error': 'Invalid meal type'}), 400
-            entry.meal_type = data['meal_type']
-        
-        if 'food_id' in data:
-            # Verify the food exists
-            food = Food.query.get(data['food_id'])
-            if not food:
-                return jsonify({'error': 'Food not found'}), 404
-            entry.food_id = data['food_id']
-        
-        if 'notes' in data:
-            entry.notes = data['notes']
+        try:
+            _, association_changes = diary_batch_service.update_entry(entry, food, data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
         
         db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
         
-        # Get food for response
-        food = Food.query.get(entry.food_id)
-        multiplier = entry.grams / 100.0
-        calc_calories = food.calories * multiplier if food else 0
-        calc_protein = food.protein * multiplier if food else 0
-        calc_carbs = food.carbohydrates * multiplier if food else 0
-        calc_fat = food.fat * multiplier if food else 0
+        # Reload entry and food for the response in one joined query
+        entry, food = db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.id == entry_id).one()
         
-        return jsonify({
-            'success': True,
-            'id': entry.id,
-            'date': entry.date.isoformat(),
-            'meal_type': entry.meal_type,
-            'food_id': entry.food_id,
-            'food_name': food.name if food else 'Unknown',
-            'amount_grams': entry.grams,
-            'calories': calc_calories,
-            'protein': calc_protein,
-            'carbohydrates': calc_carbs,
-            'fat': calc_fat,
-            'notes': entry.notes,
-            'updated_at': datetime.now().isoformat()
-        })
+        response = entry.to_dict(food)
+        _publish_change('diary_entry_updated', {'entry': dict(response)}, entry.date)
+        response.pop('created_at')
+        response['success'] = True
+        response['updated_at'] = datetime.now().isoformat()
+        
+        return jsonify(response)
     
     except Exception as e:
         print(f"Error updating diary entry {entry_id}: {str(e)}")
@@ -196,12 +295,26 @@ def update_diary_entry(entry_id):
 def delete_diary_entry(entry_id):
     """Delete a diary entry"""
     try:
-        entry = DiaryEntry.query.filter(DiaryEntry.id == entry_id).first()
-        if not entry:
+        row = db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.id == entry_id).first()
+        if not row:
             return jsonify({'error': 'Entry not found'}), 404
+        entry, food = row
+        
+        deleted = {
+            'id': entry.id,
+            'date': entry.date.isoformat(),
+            'meal_type': entry.meal_type,
+            'food_id': entry.food_id
+        }
+        deleted_date = entry.date
         
-        db.session.delete(entry)
+        association_changes = diary_batch_service.delete_entry(entry, food)
         db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
+        _publish_change('diary_entry_deleted', {'entry': deleted}, deleted_date)
         
         return jsonify({'message': 'Entry deleted successfully'})
     
@@ -223,67 +336,119 @@ def get_daily_summary():
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
     try:
-        # Calculate daily summary manually since we don't have DiaryHelpers
-        entries = DiaryEntry.query.filter(DiaryEntry.date == target_date).all()
-        
-        total_calories = 0
-        total_protein = 0
-        total_carbs = 0
-        total_fat = 0
+        # Read the per-meal totals maintained in daily_nutrition_totals
+        summary = diary_summary_service.get_daily_summary(target_date)
         
-        for entry in entries:
-            food = Food.query.get(entry.food_id)
-            if food:
-                multiplier = entry.grams / 100.0
-                total_calories += food.calories * multiplier
-                total_protein += food.protein * multiplier
-                total_carbs += food.carbohydrates * multiplier
-                total_fat += food.fat * multiplier
-        
-        summary = {
-            'date': target_date.isoformat(),
-            'total_calories': round(total_calories, 1),
-            'total_protein': round(total_protein, 1),
-            'total_carbohydrates': round(total_carbs, 1),
-            'total_fat': round(total_fat, 1),
-            'entry_count': len(entries)
-        }
+        return jsonify(summary)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@diary_bp.route('/summary/range', methods=['GET'])
+def get_range_summary():
+    """Get nutritional totals per day, week or month for a date range"""
+    start_date = request.args.get('from')
+    end_date = request.args.get('to')
+    granularity = request.args.get('granularity', 'day')
+    
+    if not start_date or not end_date:
+        return jsonify({'error': 'from and to parameters are required'}), 400
+    
+    if granularity not in ('day', 'week', 'month'):
+        return jsonify({'error': 'Invalid granularity. Use day, week or month'}), 400
+    
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    if start_date > end_date:
+        return jsonify({'error': 'from must not be after to'}), 400
+    
+    try:
+        # One grouped query over daily_nutrition_totals, bucketed afterwards
+        summary = diary_summary_service.get_range_summary(start_date, end_date, granularity)
         
         return jsonify(summary)
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _ranked_foods(ranked):
+    """Attach food details to ranked {'food_id', 'count', 'last_date'} items, keeping their order"""
+    foods = {food.id: food for food in Food.query.filter(Food.id.in_([item['food_id'] for item in ranked])).all()}
+    
+    result = []
+    for item in ranked:
+        food = foods.get(item['food_id'])
+        if food is None:
+            continue
+        result.append({
+            'id': food.id,
+            'name': food.name,
+            'brand': food.brand,
+            'category': food.category,
+            'calories': food.calories,
+            'last_logged': item['last_date'].isoformat(),
+            'times_logged': item['count'],
+            'last_used': food.last_used,
+            'used_count': food.used
+        })
+    return result
+
+def _suggestion_args():
+    """Parse meal_type, days and limit shared by recent-foods and food-suggestions"""
+    meal_type = request.args.get('meal_type') or None
+    if meal_type and not MealType.is_valid(meal_type):
+        raise ValueError('Invalid meal type')
+    try:
+        days = int(request.args.get('days', 7))
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        raise ValueError('days and limit must be integers')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return meal_type, days, limit
+
 @diary_bp.route('/recent-foods', methods=['GET'])
 def get_recent_foods():
-    """Get recently used foods"""
-    days = int(request.args.get('days', 7))
-    limit = int(request.args.get('limit', 20))
+    """Get the most recently (order=recent) or most often (order=frequent) logged foods
+    in the last `days` days, optionally for one meal type"""
+    order = request.args.get('order', 'recent')
     
     try:
-        # Get recent foods manually
-        from datetime import timedelta
-        cutoff_date = datetime.now().date() - timedelta(days=days)
-        
-        # Get foods that have been used recently
-        foods = Food.query.filter(
-            Food.last_used.isnot(None),
-            Food.used > 0
-        ).order_by(Food.last_used.desc()).limit(limit).all()
-        
-        result = []
-        for food in foods:
-            result.append({
-                'id': food.id,
-                'name': food.name,
-                'brand': food.brand,
-                'category': food.category,
-                'calories': food.calories,
-                'last_used': food.last_used,
-                'used_count': food.used
-            })
+        meal_type, days, limit = _suggestion_args()
+        recent_foods_index.refresh_if_stale()
+        ranked = recent_foods_index.top(meal_type, days, order, limit)
+        return jsonify(_ranked_foods(ranked))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@diary_bp.route('/food-suggestions', methods=['GET'])
+def get_food_suggestions():
+    """Get recent and frequent foods for a meal type in one call, e.g. for the add-food screen"""
+    try:
+        meal_type, days, limit = _suggestion_args()
+        recent_foods_index.refresh_if_stale()
+        suggestions = recent_foods_index.suggestions(meal_type, days, limit)
         
-        return jsonify(result)
+        # One food query for both lists; a food's count and last date are the same in each
+        ranked = suggestions['recent'] + suggestions['frequent']
+        details = {food['id']: food for food in _ranked_foods(ranked)}
+        return jsonify({
+            'meal_type': meal_type,
+            'days': days,
+            'recent': [details[item['food_id']] for item in suggestions['recent'] if item['food_id'] in details],
+            'frequent': [details[item['food_id']] for item in suggestions['frequent'] if item['food_id'] in details]
+        })
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
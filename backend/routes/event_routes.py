@@ -0,0 +1,32 @@
+import os
+from flask import Blueprint, Response, request, jsonify
+from services.event_broker import event_broker
+
+events_bp = Blueprint('events', __name__)
+
+# Streams end after this long and the browser reconnects with Last-Event-ID,
+# so a stream never holds a server thread for more than a few minutes
+STREAM_SECONDS = float(os.getenv('EVENT_STREAM_SECONDS', 300))
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """Stream diary, exercise and weight changes as Server-Sent Events"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+    
+    return Response(
+        event_broker.listen(last_event_id, STREAM_SECONDS),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@events_bp.route('/stats', methods=['GET'])
+def get_event_stats():
+    """Get the number of subscribers and buffered events in this process"""
+    return jsonify(event_broker.stats())
@@ -1,10 +1,22 @@
 from flask import Blueprint, request, jsonify
+from db.models.exercise import Exercise
 from services.exercise_service import ExerciseService
+from services.event_broker import event_broker
+from services.idempotency_store import idempotency_store
 from datetime import datetime
 
 exercise_bp = Blueprint('exercise', __name__)
 exercise_service = ExerciseService()
 
+def _publish_change(event_type, exercise, dates):
+    """Publish a committed exercise change with the new totals of the affected dates"""
+    if not event_broker.has_subscribers():
+        return
+    event_broker.publish(event_type, {
+        'exercise': exercise,
+        'totals': [exercise_service.get_daily_totals(d) for d in sorted(set(dates))]
+    })
+
 @exercise_bp.route('/<date>', methods=['GET'])
 @exercise_bp.route('/<date>/', methods=['GET'])
 def get_exercises_by_date(date):
@@ -16,16 +28,7 @@ def get_exercises_by_date(date):
         exercises = exercise_service.get_exercises_by_date(target_date)
         
         # Convert to dict format for JSON response
-        exercises_data = []
-        for exercise in exercises:
-            exercise_dict = {
-                'id': exercise.id,
-                'name': exercise.name,
-                'duration_minutes': exercise.duration_minutes,
-                'calories_burned': exercise.calories_burned,
-                'date': exercise.date.isoformat()
-            }
-            exercises_data.append(exercise_dict)
+        exercises_data = [exercise.to_dict() for exercise in exercises]
         
         return jsonify({
             'success': True,
@@ -45,6 +48,7 @@ def get_exercises_by_date(date):
         }), 500
 
 @exercise_bp.route('/', methods=['POST'])
+@idempotency_store.idempotent
 def add_exercise():
     """Create a new exercise entry."""
     try:
@@ -78,15 +82,12 @@ def add_exercise():
             target_date=target_date
         )
         
+        exercise_data = exercise.to_dict()
+        _publish_change('exercise_added', exercise_data, [exercise.date])
+        
         return jsonify({
             'success': True,
-            'data': {
-                'id': exercise.id,
-                'name': exercise.name,
-                'duration_minutes': exercise.duration_minutes,
-                'calories_burned': exercise.calories_burned,
-                'date': exercise.date.isoformat()
-            }
+            'data': exercise_data
         }), 201
         
     except ValueError as e:
@@ -117,6 +118,10 @@ def update_exercise(exercise_id):
         if 'date' in data:
             data['date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
         
+        # Remember the old date so its totals can be published too
+        existing = Exercise.query.get(exercise_id)
+        old_date = existing.date if existing else None
+        
         # Update exercise
         exercise = exercise_service.update_exercise(exercise_id, data)
         
@@ -126,15 +131,12 @@ def update_exercise(exercise_id):
                 'error': 'Exercise not found'
             }), 404
         
+        exercise_data = exercise.to_dict()
+        _publish_change('exercise_updated', exercise_data, [old_date, exercise.date])
+        
         return jsonify({
             'success': True,
-            'data': {
-                'id': exercise.id,
-                'name': exercise.name,
-                'duration_minutes': exercise.duration_minutes,
-                'calories_burned': exercise.calories_burned,
-                'date': exercise.date.isoformat()
-            }
+            'data': exercise_data
         }), 200
         
     except ValueError as e:
@@ -153,6 +155,10 @@ def update_exercise(exercise_id):
 def delete_exercise(exercise_id):
     """Delete an exercise entry."""
     try:
+        existing = Exercise.query.get(exercise_id)
+        deleted = {'id': exercise_id, 'date': existing.date.isoformat()} if existing else None
+        deleted_date = existing.date if existing else None
+        
         success = exercise_service.delete_exercise(exercise_id)
         
         if not success:
@@ -161,6 +167,8 @@ def delete_exercise(exercise_id):
                 'error': 'Exercise not found'
             }), 404
         
+        _publish_change('exercise_deleted', deleted, [deleted_date])
+        
         return jsonify({
             'success': True,
             'message': 'Exercise deleted successfully'
@@ -1,43 +1,97 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
+from hashlib import sha1
+from db.models.food import Food
 from services.food_service import FoodService
+from services.food_suggest_index import FoodSuggestIndex
 
 food_bp = Blueprint('food', __name__)
 food_service = FoodService()
 
+# Fields returned for a food, in response order
+FOOD_FIELDS = Food.API_FIELDS
+
+MAX_PAGE_SIZE = 1000
+
+def _food_to_dict(food, fields=FOOD_FIELDS):
+    """Serialize a food (or a projected row) to a dict with the given fields."""
+    return Food.to_api_dict(food, fields)
+
 @food_bp.route('/', methods=['GET'])
 def get_foods():
-    """Get all foods."""
+    """Get foods, optionally paginated (cursor/limit) and projected (fields).
+    
+    The next page cursor is returned in the X-Next-Cursor header so the body
+    stays a plain list for existing clients.
+    """
+    fields = FOOD_FIELDS
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in FOOD_FIELDS]
+        if unknown:
+            return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+        if 'id' not in fields:
+            fields = ['id'] + fields
+    
+    cursor = request.args.get('cursor', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    try:
+        # Strong ETag per catalog version and representation
+        version = food_service.get_catalog_version()
+        etag = sha1(f'{version}|{",".join(fields)}|{cursor}|{limit}'.encode()).hexdigest()
+        
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        foods = food_service.get_foods_page(fields, after_id=cursor, limit=limit)
+        response = jsonify([_food_to_dict(food, fields) for food in foods])
+        response.set_etag(etag)
+        
+        if limit is not None and len(foods) == limit:
+            response.headers['X-Next-Cursor'] = str(foods[-1].id)
+        
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@food_bp.route('/search', methods=['GET'])
+def search_foods():
+    """Search foods by name, brand and category."""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, 100))
+    
+    if not query:
+        return jsonify({'error': 'q parameter is required'}), 400
+    
+    try:
+        foods = food_service.search_foods(query, limit)
+        return jsonify([_food_to_dict(food) for food in foods])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@food_bp.route('/suggest', methods=['GET'])
+def suggest_foods():
+    """Autocomplete food names for a typed prefix."""
+    prefix = request.args.get('prefix', '').strip()
+    limit = request.args.get('limit', FoodSuggestIndex.TOP_K, type=int)
+    limit = max(1, min(limit, FoodSuggestIndex.TOP_K))
+    
+    if not prefix:
+        return jsonify([])
+    
     try:
-        foods = food_service.get_all_foods()
+        suggestions = food_service.suggest_foods(prefix, limit)
         return jsonify([{
-            'id': food.id,
-            'name': food.name,
-            'category': food.category,
-            'brand': food.brand,
-            'used': food.used,
-            'last_used': food.last_used,
-            'last_portion': food.last_portion,
-            'calories': food.calories,
-            'protein': food.protein,
-            'carbohydrates': food.carbohydrates,
-            'fat': food.fat,
-            'fiber': food.fiber,
-            'sugar': food.sugar,
-            'saturated_fat': food.saturated_fat,
-            'unsaturated_fat': food.unsaturated_fat,
-            'cholesterol': food.cholesterol,
-            'sodium': food.sodium,
-            'potassium': food.potassium,
-            'calcium': food.calcium,
-            'iron': food.iron,
-            'vitamin_a': food.vitamin_a,
-            'vitamin_c': food.vitamin_c,
-            'vitamin_d': food.vitamin_d,
-            'vitamin_b12': food.vitamin_b12,
-            'magnesium': food.magnesium,
-            'created_at': food.created_at.isoformat() if food.created_at else None,
-            'updated_at': food.updated_at.isoformat() if food.updated_at else None
-        } for food in foods])
+            'id': food_id,
+            'name': name,
+            'brand': brand,
+            'used': used
+        } for food_id, name, brand, used in suggestions])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -50,35 +104,7 @@ def get_food(food_id):
         if not food:
             return jsonify({'error': 'Food not found'}), 404
         
-        return jsonify({
-            'id': food.id,
-            'name': food.name,
-            'category': food.category,
-            'brand': food.brand,
-            'used': food.used,
-            'last_used': food.last_used,
-            'last_portion': food.last_portion,
-            'calories': food.calories,
-            'protein': food.protein,
-            'carbohydrates': food.carbohydrates,
-            'fat': food.fat,
-            'fiber': food.fiber,
-            'sugar': food.sugar,
-            'saturated_fat': food.saturated_fat,
-            'unsaturated_fat': food.unsaturated_fat,
-            'cholesterol': food.cholesterol,
-            'sodium': food.sodium,
-            'potassium': food.potassium,
-            'calcium': food.calcium,
-            'iron': food.iron,
-            'vitamin_a': food.vitamin_a,
-            'vitamin_c': food.vitamin_c,
-            'vitamin_d': food.vitamin_d,
-            'vitamin_b12': food.vitamin_b12,
-            'magnesium': food.magnesium,
-            'created_at': food.created_at.isoformat() if food.created_at else None,
-            'updated_at': food.updated_at.isoformat() if food.updated_at else None
-        })
+        return jsonify(_food_to_dict(food))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -94,35 +120,7 @@ def create_food():
             return jsonify({'error': 'Name is required'}), 400
         
         food = food_service.create_food(data)
-        return jsonify({
-            'id': food.id,
-            'name': food.name,
-            'category': food.category,
-            'brand': food.brand,
-            'used': food.used,
-            'last_used': food.last_used,
-            'last_portion': food.last_portion,
-            'calories': food.calories,
-            'protein': food.protein,
-            'carbohydrates': food.carbohydrates,
-            'fat': food.fat,
-            'fiber': food.fiber,
-            'sugar': food.sugar,
-            'saturated_fat': food.saturated_fat,
-            'unsaturated_fat': food.unsaturated_fat,
-            'cholesterol': food.cholesterol,
-            'sodium': food.sodium,
-            'potassium': food.potassium,
-            'calcium': food.calcium,
-            'iron': food.iron,
-            'vitamin_a': food.vitamin_a,
-            'vitamin_c': food.vitamin_c,
-            'vitamin_d': food.vitamin_d,
-            'vitamin_b12': food.vitamin_b12,
-            'magnesium': food.magnesium,
-            'created_at': food.created_at.isoformat() if food.created_at else None,
-            'updated_at': food.updated_at.isoformat() if food.updated_at else None
-        }), 201
+        return jsonify(_food_to_dict(food)), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -139,35 +137,7 @@ def update_food(food_id):
         if not food:
             return jsonify({'error': 'Food not found'}), 404
         
-        return jsonify({
-            'id': food.id,
-            'name': food.name,
-            'category': food.category,
-            'brand': food.brand,
-            'used': food.used,
-            'last_used': food.last_used,
-            'last_portion': food.last_portion,
-            'calories': food.calories,
-            'protein': food.protein,
-            'carbohydrates': food.carbohydrates,
-            'fat': food.fat,
-            'fiber': food.fiber,
-            'sugar': food.sugar,
-            'saturated_fat': food.saturated_fat,
-            'unsaturated_fat': food.unsaturated_fat,
-            'cholesterol': food.cholesterol,
-            'sodium': food.sodium,
-            'potassium': food.potassium,
-            'calcium': food.calcium,
-            'iron': food.iron,
-            'vitamin_a': food.vitamin_a,
-            'vitamin_c': food.vitamin_c,
-            'vitamin_d': food.vitamin_d,
-            'vitamin_b12': food.vitamin_b12,
-            'magnesium': food.magnesium,
-            'created_at': food.created_at.isoformat() if food.created_at else None,
-            'updated_at': food.updated_at.isoformat() if food.updated_at else None
-        })
+        return jsonify(_food_to_dict(food))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -181,5 +151,7 @@ def delete_food(food_id):
             return jsonify({'error': 'Food not found'}), 404
         
         return jsonify({'message': 'Food deleted successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -17,17 +17,9 @@ def get_goals():
                 'message': 'No goals set yet'
             }), 200
         
-        goals_data = {
-            'id': goals.id,
-            'daily_calories': goals.daily_calories,
-            'protein_target': goals.protein_target,
-            'carbs_target': goals.carbs_target,
-            'fat_target': goals.fat_target
-        }
-        
         return jsonify({
             'success': True,
-            'data': goals_data
+            'data': goals.to_dict()
         }), 200
         
     except Exception as e:
@@ -70,13 +62,7 @@ def create_goals():
         
         return jsonify({
             'success': True,
-            'data': {
-                'id': goals.id,
-                'daily_calories': goals.daily_calories,
-                'protein_target': goals.protein_target,
-                'carbs_target': goals.carbs_target,
-                'fat_target': goals.fat_target
-            }
+            'data': goals.to_dict()
         }), 201
         
     except Exception as e:
@@ -119,13 +105,7 @@ def update_goals(goals_id):
         
         return jsonify({
             'success': True,
-            'data': {
-                'id': goals.id,
-                'daily_calories': goals.daily_calories,
-                'protein_target': goals.protein_target,
-                'carbs_target': goals.carbs_target,
-                'fat_target': goals.fat_target
-            }
+            'data': goals.to_dict()
         }), 200
         
     except Exception as e:
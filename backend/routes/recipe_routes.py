@@ -0,0 +1,98 @@
+from flask import Blueprint, request, jsonify
+from db.models.food import Food
+from services.recipe_service import RecipeService
+
+recipe_bp = Blueprint('recipe', __name__)
+recipe_service = RecipeService()
+
+def _recipe_to_dict(recipe, with_components=False):
+    """Serialize a recipe with its precomputed nutrition per 100g"""
+    result = {
+        'id': recipe.id,
+        'name': recipe.name,
+        'food_id': recipe.food_id,
+        'yield_grams': recipe.yield_grams,
+        'total_grams': recipe.total_grams,
+        'nutrients_per_100g': {field: getattr(recipe.food, field) for field in Food.NUTRIENT_FIELDS},
+        'created_at': recipe.created_at.isoformat() if recipe.created_at else None,
+        'updated_at': recipe.updated_at.isoformat() if recipe.updated_at else None
+    }
+    if with_components:
+        result['components'] = [{
+            'food_id': component.food_id,
+            'food_name': component.food.name if component.food else 'Unknown',
+            'grams': component.grams
+        } for component in recipe.components]
+    return result
+
+@recipe_bp.route('/', methods=['GET'])
+def get_recipes():
+    """Get all recipes."""
+    try:
+        return jsonify([_recipe_to_dict(recipe) for recipe in recipe_service.get_recipes()])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recipe_bp.route('/<int:recipe_id>', methods=['GET'])
+@recipe_bp.route('/<int:recipe_id>/', methods=['GET'])
+def get_recipe(recipe_id):
+    """Get a recipe with its components."""
+    try:
+        recipe = recipe_service.get_recipe(recipe_id)
+        if not recipe:
+            return jsonify({'error': 'Recipe not found'}), 404
+        
+        return jsonify(_recipe_to_dict(recipe, with_components=True))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recipe_bp.route('/', methods=['POST'])
+def create_recipe():
+    """Create a recipe from (food_id, grams) components."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        recipe = recipe_service.create_recipe(data)
+        return jsonify(_recipe_to_dict(recipe_service.get_recipe(recipe.id), with_components=True)), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        recipe_service.db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@recipe_bp.route('/<int:recipe_id>', methods=['PUT'])
+@recipe_bp.route('/<int:recipe_id>/', methods=['PUT'])
+def update_recipe(recipe_id):
+    """Update a recipe's name, yield or components."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        recipe = recipe_service.update_recipe(recipe_id, data)
+        if not recipe:
+            return jsonify({'error': 'Recipe not found'}), 404
+        
+        return jsonify(_recipe_to_dict(recipe_service.get_recipe(recipe_id), with_components=True))
+    except ValueError as e:
+        recipe_service.db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        recipe_service.db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@recipe_bp.route('/<int:recipe_id>', methods=['DELETE'])
+@recipe_bp.route('/<int:recipe_id>/', methods=['DELETE'])
+def delete_recipe(recipe_id):
+    """Delete a recipe."""
+    try:
+        success = recipe_service.delete_recipe(recipe_id)
+        if not success:
+            return jsonify({'error': 'Recipe not found'}), 404
+        
+        return jsonify({'message': 'Recipe deleted successfully'}), 200
+    except Exception as e:
+        recipe_service.db.session.rollback()
+        return jsonify({'error': str(e)}), 500
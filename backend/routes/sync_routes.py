@@ -0,0 +1,81 @@
+from flask import Blueprint, request, jsonify
+from db.database import db
+from services.sync_service import SyncService
+from services.mutation_replay_service import MutationReplayService
+from services.food_recommendation_index import food_recommendation_index
+from services.recent_foods_index import recent_foods_index
+from services.food_usage_counter import food_usage_counter
+from services.idempotency_store import IdempotencyKeyInProgress, idempotency_store
+from services.event_broker import event_broker
+
+sync_bp = Blueprint('sync', __name__)
+sync_service = SyncService()
+mutation_replay_service = MutationReplayService()
+
+@sync_bp.route('', methods=['GET'])
+@sync_bp.route('/', methods=['GET'])
+def get_changes():
+    """Get the rows changed and deleted since a sync cursor.
+    
+    Query parameters: since (the cursor from the previous response, 0 or
+    absent for a full sync) and tables (comma separated, default all of
+    foods, diary_entries, exercises, weights, goals and settings).
+    When reset is true the response is a full sync and the client must
+    replace its copy with it; otherwise it removes the deleted ids and
+    then stores the changed rows.
+    """
+    tables = request.args.get('tables')
+    tables = [name.strip() for name in tables.split(',') if name.strip()] if tables else None
+    
+    try:
+        since = int(request.args.get('since', 0))
+        return jsonify(sync_service.changes_since(since, tables))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sync_bp.route('/replay', methods=['POST'])
+def replay_mutations():
+    """Apply an offline queue of mutations in order, in one transaction.
+    
+    Body: {"mutations": [{"type": "diary_entry.add", "key": "...", "data": {...}},
+    {"type": "diary_entry.update", "ref": "...", "data": {...}}, ...]}.
+    Mutations whose key was already applied are skipped and return their
+    stored result. Nothing is written if any mutation fails.
+    """
+    data = request.get_json(silent=True)
+    mutations = data.get('mutations') if isinstance(data, dict) else data
+    
+    try:
+        results, association_changes = mutation_replay_service.replay(mutations)
+        db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
+        food_usage_counter.flush_if_due()
+        idempotency_store.evict_if_due()
+        
+        applied = [result for result in results if not result['replayed']]
+        if applied and event_broker.has_subscribers():
+            event_broker.publish('mutations_replayed', {'results': applied})
+        
+        return jsonify({
+            'success': True,
+            'applied': len(applied),
+            'replayed': len(results) - len(applied),
+            'results': results
+        })
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except IdempotencyKeyInProgress as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify
+from db.models.weight import Weight
 from services.weight_service import WeightService
+from services.event_broker import event_broker
+from services.idempotency_store import idempotency_store
 from datetime import datetime
 
 weight_bp = Blueprint('weight', __name__)
 weight_service = WeightService()
 
+def _publish_change(event_type, weight):
+    """Publish a committed weight change"""
+    if event_broker.has_subscribers():
+        event_broker.publish(event_type, {'weight': weight})
+
 @weight_bp.route('/', methods=['GET'])
 def get_weight_history():
     """Get all weight measurements ordered by date."""
@@ -12,14 +20,7 @@ def get_weight_history():
         weights = weight_service.get_weights()
         
         # Convert to dict format for JSON response
-        weights_data = []
-        for weight in weights:
-            weight_dict = {
-                'id': weight.id,
-                'date': weight.date.isoformat(),
-                'weight_kg': weight.weight_kg
-            }
-            weights_data.append(weight_dict)
+        weights_data = [weight.to_dict() for weight in weights]
         
         return jsonify({
             'success': True,
@@ -33,6 +34,7 @@ def get_weight_history():
         }), 500
 
 @weight_bp.route('/', methods=['POST'])
+@idempotency_store.idempotent
 def add_weight_entry():
     """Create a new weight measurement entry."""
     try:
@@ -62,13 +64,12 @@ def add_weight_entry():
             weight_kg=data['weight_kg']
         )
         
+        weight_data = weight_entry.to_dict()
+        _publish_change('weight_added', weight_data)
+        
         return jsonify({
             'success': True,
-            'data': {
-                'id': weight_entry.id,
-                'date': weight_entry.date.isoformat(),
-                'weight_kg': weight_entry.weight_kg
-            }
+            'data': weight_data
         }), 201
         
     except ValueError as e:
@@ -108,13 +109,12 @@ def update_weight_entry(weight_id):
                 'error': 'Weight entry not found'
             }), 404
         
+        weight_data = weight_entry.to_dict()
+        _publish_change('weight_updated', weight_data)
+        
         return jsonify({
             'success': True,
-            'data': {
-                'id': weight_entry.id,
-                'date': weight_entry.date.isoformat(),
-                'weight_kg': weight_entry.weight_kg
-            }
+            'data': weight_data
         }), 200
         
     except ValueError as e:
@@ -133,6 +133,9 @@ def update_weight_entry(weight_id):
 def delete_weight_entry(weight_id):
     """Delete a weight measurement entry."""
     try:
+        existing = Weight.query.get(weight_id)
+        deleted = {'id': weight_id, 'date': existing.date.isoformat()} if existing else None
+        
         success = weight_service.delete_weight(weight_id)
         
         if not success:
@@ -141,6 +144,8 @@ def delete_weight_entry(weight_id):
                 'error': 'Weight entry not found'
             }), 404
         
+        _publish_change('weight_deleted', deleted)
+        
         return jsonify({
             'success': True,
             'message': 'Weight entry deleted successfully'
@@ -0,0 +1,107 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.food import Food
+from db.database import db
+from services.diary_summary_service import DiarySummaryService
+from services.exercise_service import ExerciseService
+from services.goals_service import GoalsService
+from services.user_settings_service import UserSettingsService
+from services.weight_service import WeightService
+
+class BootstrapService:
+    """Assembles the dashboard's initial data for one date.
+
+    Each part is what one of the existing GET endpoints returns (goals,
+    user settings, diary entries, diary summary, exercises and weights)
+    and costs one SQL statement regardless of how many rows it holds, so
+    a bootstrap is a fixed six statements (plus one insert the first time
+    default user settings are created).
+
+    The parts are independent. With concurrent=True they run on a shared
+    thread pool, each in its own app context and therefore its own
+    session and connection, so the response takes about as long as the
+    slowest query instead of the sum. That only pays off on a database
+    that serves reads in parallel over a network; SQLite in-process is
+    usually faster sequentially.
+    """
+
+    WORKERS = int(os.getenv('BOOTSTRAP_WORKERS', 6))
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self):
+        self.db = db
+        self.diary_summary_service = DiarySummaryService()
+        self.exercise_service = ExerciseService()
+        self.goals_service = GoalsService()
+        self.weight_service = WeightService()
+
+    # Parts
+
+    def get_goals(self, target_date):
+        goals = self.goals_service.get_goals()
+        return goals.to_dict() if goals else None
+
+    def get_settings(self, target_date):
+        return UserSettingsService.get_or_create_settings().to_dict()
+
+    def get_entries(self, target_date):
+        rows = self.db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.date == target_date).all()
+        return [entry.to_dict(food) for entry, food in rows]
+
+    def get_summary(self, target_date):
+        return self.diary_summary_service.get_daily_summary(target_date)
+
+    def get_exercises(self, target_date):
+        return [exercise.to_dict() for exercise in self.exercise_service.get_exercises_by_date(target_date)]
+
+    def get_weights(self, target_date):
+        return [weight.to_dict() for weight in self.weight_service.get_weights()]
+
+    def parts(self):
+        return {
+            'goals': self.get_goals,
+            'settings': self.get_settings,
+            'entries': self.get_entries,
+            'summary': self.get_summary,
+            'exercises': self.get_exercises,
+            'weights': self.get_weights,
+        }
+
+    # Loading
+
+    def load(self, target_date, concurrent=False):
+        """Return {'date', 'goals', 'settings', 'entries', 'summary', 'exercises', 'weights'}."""
+        parts = self.parts()
+        if concurrent:
+            app = current_app._get_current_object()
+            executor = self._get_executor()
+            futures = {
+                name: executor.submit(self._run_in_app, app, part, target_date)
+                for name, part in parts.items()
+            }
+            result = {name: future.result() for name, future in futures.items()}
+        else:
+            result = {name: part(target_date) for name, part in parts.items()}
+
+        return dict(result, date=target_date.isoformat())
+
+    @staticmethod
+    def _run_in_app(app, part, target_date):
+        # A fresh app context gives the worker its own scoped session,
+        # which is removed again when the context is popped
+        with app.app_context():
+            return part(target_date)
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.WORKERS, thread_name_prefix='bootstrap')
+            return cls._executor
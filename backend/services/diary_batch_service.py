@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from numbers import Real
+from sqlalchemy import case, func, insert, literal, select
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.food import Food
+from db.models.meal_types import MealType
+from db.models.recipe import Recipe
+from db.database import db
+from services.nutrition_rollup_service import NutritionRollupService
+from services.food_association_service import FoodAssociationService
+from services.food_usage_counter import food_usage_counter
+from services.sync_service import SyncService
+
+class DiaryBatchService:
+    """Writes many diary entries at once: batches and copies of days/meals.
+
+    Entries are inserted with one statement and the rollup, food
+    associations and usage counters are updated per meal and per food
+    rather than per entry. Single entry updates and deletes live here too
+    so the entry routes and mutation replay share them. Nothing is
+    committed; the caller commits once.
+    """
+
+    MAX_ENTRIES = 500
+    MAX_COPY_DAYS = 31
+    REQUIRED_FIELDS = ('food_id', 'date', 'meal_type', 'amount_grams')
+
+    def __init__(self):
+        self.db = db
+        self.nutrition_rollup_service = NutritionRollupService()
+        self.food_association_service = FoodAssociationService()
+
+    @staticmethod
+    def _valid_grams(grams):
+        return isinstance(grams, Real) and not isinstance(grams, bool) and grams > 0
+
+    def _parse(self, item):
+        """Return (row, error) for one request item."""
+        if not isinstance(item, dict):
+            return None, 'Entry must be an object'
+
+        missing = [field for field in self.REQUIRED_FIELDS if field not in item]
+        if missing:
+            return None, f'Missing required field: {missing[0]}'
+
+        if not MealType.is_valid(item['meal_type']):
+            return None, 'Invalid meal type'
+
+        try:
+            target_date = datetime.strptime(item['date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None, 'Invalid date format. Use YYYY-MM-DD'
+
+        food_id = item['food_id']
+        if not isinstance(food_id, int) or isinstance(food_id, bool):
+            return None, 'food_id must be an integer'
+
+        grams = item['amount_grams']
+        if not self._valid_grams(grams):
+            return None, 'amount_grams must be a positive number'
+
+        return {
+            'date': target_date,
+            'meal_type': item['meal_type'],
+            'food_id': food_id,
+            'grams': float(grams),
+            'notes': item.get('notes')
+        }, None
+
+    def validate(self, items):
+        """Validate all items together.
+
+        Returns (rows, foods, errors): rows in request order (None where
+        invalid), the referenced foods by id and {index: error message}.
+        """
+        # Items may name a recipe instead of a food; log the recipe's food
+        recipe_ids = {
+            item['recipe_id'] for item in items
+            if isinstance(item, dict) and 'food_id' not in item and isinstance(item.get('recipe_id'), int)
+        }
+        recipe_foods = {}
+        if recipe_ids:
+            recipe_foods = dict(self.db.session.query(Recipe.id, Recipe.food_id).filter(Recipe.id.in_(recipe_ids)).all())
+
+        rows = []
+        errors = {}
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and 'food_id' not in item and 'recipe_id' in item:
+                if item['recipe_id'] not in recipe_foods:
+                    rows.append(None)
+                    errors[index] = 'Recipe not found'
+                    continue
+                item = dict(item, food_id=recipe_foods[item['recipe_id']])
+            row, error = self._parse(item)
+            rows.append(row)
+            if error:
+                errors[index] = error
+
+        food_ids = {row['food_id'] for row in rows if row}
+        foods = {}
+        if food_ids:
+            foods = {food.id: food for food in Food.query.filter(Food.id.in_(food_ids)).all()}
+
+        for index, row in enumerate(rows):
+            if row and row['food_id'] not in foods:
+                errors[index] = 'Food not found'
+
+        return rows, foods, errors
+
+    def add_entries(self, rows, foods):
+        """Insert validated rows and update derived data.
+
+        Returns the new entry ids in row order and the food association
+        changes to apply to food_recommendation_index after commit.
+        """
+        table = DiaryEntry.__table__
+        columns = ('date', 'meal_type', 'food_id', 'grams', 'notes')
+        if DiaryEntry.snapshots():
+            for row in rows:
+                row.update(DiaryEntry.snapshot_values(foods[row['food_id']], row['grams']))
+        sync_version = SyncService.version(self.db.session, DiaryEntry)
+        for row in rows:
+            row['sync_version'] = sync_version
+        returned = self.db.session.execute(
+            insert(table).returning(table.c.id, *[table.c[column] for column in columns]),
+            rows
+        ).all()
+
+        # RETURNING order is not guaranteed, so match ids back by value.
+        # Identical rows are interchangeable and get their ids in order.
+        ids_by_values = {}
+        for returned_row in sorted(returned, key=lambda r: r.id):
+            values = tuple(getattr(returned_row, column) for column in columns)
+            ids_by_values.setdefault(values, []).append(returned_row.id)
+        entry_ids = [
+            ids_by_values[tuple(row[column] for column in columns)].pop(0)
+            for row in rows
+        ]
+
+        self.nutrition_rollup_service.add_entries(
+            (row['date'], row['meal_type'], DiaryEntry(**row).nutrient_vector(foods[row['food_id']])) for row in rows
+        )
+        association_changes = self.food_association_service.add_entries(
+            (row['date'], row['meal_type'], row['food_id']) for row in rows
+        )
+
+        # Usage counters are written behind, once per food
+        uses = {}
+        for row in rows:
+            uses[row['food_id']] = uses.get(row['food_id'], 0) + 1
+        for food_id, count in uses.items():
+            food_usage_counter.add(self.db.session, food_id, count)
+
+        return entry_ids, association_changes
+
+    def copy_entries(self, source_date, target_date, meal_type=None, target_meal_type=None, days=1):
+        """Copy the entries of `days` days starting at source_date to target_date onwards.
+
+        With meal_type only that meal is copied, into target_meal_type if
+        given. The copy is a single INSERT ... SELECT. Returns (number of
+        copied entries, target dates, food association changes).
+        """
+        table = DiaryEntry.__table__
+        source_days = [source_date + timedelta(days=i) for i in range(days)]
+        target_days = {day: target_date + (day - source_date) for day in source_days}
+
+        source_filter = [table.c.date.in_(source_days)]
+        if meal_type:
+            source_filter.append(table.c.meal_type == meal_type)
+
+        # The copied foods are needed for associations and usage counters
+        source_rows = self.db.session.execute(
+            select(table.c.date, table.c.meal_type, table.c.food_id).where(*source_filter)
+        ).all()
+        if not source_rows:
+            return 0, [], []
+
+        # A copy is a new log entry, so in snapshot mode it snapshots the
+        # foods' current values rather than the source entry's
+        target_meal = literal(target_meal_type) if target_meal_type else table.c.meal_type
+        snapshot_columns = []
+        if DiaryEntry.snapshots():
+            food_table = Food.__table__
+            snapshot_columns = [
+                (table.c.grams * func.coalesce(food_table.c[field], 0.0) / 100.0).label(field)
+                for field in Food.NUTRIENT_FIELDS
+            ]
+        source = select(
+            case(target_days, value=table.c.date),
+            target_meal,
+            table.c.food_id,
+            table.c.grams,
+            table.c.notes,
+            literal(SyncService.version(self.db.session, DiaryEntry)),
+            *snapshot_columns
+        ).where(*source_filter).order_by(table.c.id)
+        if snapshot_columns:
+            source = source.outerjoin(food_table, table.c.food_id == food_table.c.id)
+        self.db.session.execute(insert(table).from_select(
+            ['date', 'meal_type', 'food_id', 'grams', 'notes', 'sync_version'] + [column.name for column in snapshot_columns],
+            source
+        ))
+
+        copied = [
+            (target_days[row.date], target_meal_type or row.meal_type, row.food_id)
+            for row in source_rows
+        ]
+        copied_dates = sorted({row[0] for row in copied})
+
+        self.nutrition_rollup_service.recompute_dates(copied_dates)
+        association_changes = self.food_association_service.add_entries(copied)
+
+        uses = {}
+        for _, _, food_id in copied:
+            uses[food_id] = uses.get(food_id, 0) + 1
+        for food_id, count in uses.items():
+            food_usage_counter.add(self.db.session, food_id, count)
+
+        return len(copied), copied_dates, association_changes
+
+    def update_entry(self, entry, food, data):
+        """Apply an entry update (amount_grams, meal_type, food_id, notes).
+
+        Raises ValueError for an invalid amount or meal type and LookupError
+        for an unknown food. Returns (the entry's food, food association
+        changes).
+        """
+        if 'amount_grams' in data and not self._valid_grams(data['amount_grams']):
+            raise ValueError('amount_grams must be a positive number')
+        if 'meal_type' in data and not MealType.is_valid(data['meal_type']):
+            raise ValueError('Invalid meal type')
+
+        new_food = food
+        if 'food_id' in data:
+            new_food = Food.query.get(data['food_id'])
+            if not new_food:
+                raise LookupError('Food not found')
+
+        # Take the old values out of the daily rollup before changing the entry
+        self.nutrition_rollup_service.remove_entry(entry, food)
+
+        # Food associations only change if the entry moves to another meal or food
+        moved = (
+            data.get('meal_type', entry.meal_type) != entry.meal_type
+            or data.get('food_id', entry.food_id) != entry.food_id
+        )
+        association_changes = self.food_association_service.remove_entry(entry) if moved else []
+
+        if 'amount_grams' in data:
+            entry.grams = float(data['amount_grams'])
+        if 'meal_type' in data:
+            entry.meal_type = data['meal_type']
+        if 'food_id' in data:
+            entry.food_id = data['food_id']
+        if 'notes' in data:
+            entry.notes = data['notes']
+
+        # A new amount or food is a new log, so it gets a new snapshot
+        if 'amount_grams' in data or 'food_id' in data:
+            entry.take_snapshot(new_food)
+
+        self.nutrition_rollup_service.add_entry(entry, new_food)
+        if moved:
+            association_changes += self.food_association_service.add_entry(entry)
+        return new_food, association_changes
+
+    def delete_entry(self, entry, food):
+        """Delete an entry. Returns the food association changes."""
+        self.nutrition_rollup_service.remove_entry(entry, food)
+        association_changes = self.food_association_service.remove_entry(entry)
+        self.db.session.delete(entry)
+        return association_changes
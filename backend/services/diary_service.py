@@ -1,12 +1,18 @@
-from db.models.diary_entry_improved import DiaryEntry
+from db.models.diary_entry_simple import DiaryEntry
 from db.models.food import Food
+from db.models.nutrient_vector import NutrientMatrix, NutrientVector
 from db.database import db
+from services.nutrition_rollup_service import NutritionRollupService
 from services.food_association_service import FoodAssociationService
+from services.food_recommendation_index import food_recommendation_index
+from services.recent_foods_index import recent_foods_index
 from datetime import date
 
 class DiaryService:
     def __init__(self):
         self.db = db
+        self.nutrition_rollup_service = NutritionRollupService()
+        self.food_association_service = FoodAssociationService()
     
     def get_entries_by_date(self, target_date):
         """Return all diary entries for a given date."""
@@ -24,20 +30,20 @@ class DiaryService:
         
         entry = DiaryEntry(
             food_id=food_id,
-            amount_grams=grams,
+            grams=grams,
             meal_type=meal_type,
             date=target_date
         )
         
-        # Calculate nutrition values
-        entry.calculate_nutrition(food)
+        # Snapshot nutrition values (snapshot mode only)
+        entry.take_snapshot(food)
         
         self.db.session.add(entry)
+        self.nutrition_rollup_service.add_entry(entry, food)
+        association_changes = self.food_association_service.add_entry(entry)
         self.db.session.commit()
-        
-        # Update food associations (temporarily disabled for debugging)
-        # association_service = FoodAssociationService(self.db.session)
-        # association_service.update_associations_for_meal(target_date, meal_type)
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
         
         return entry
     
@@ -47,6 +53,9 @@ class DiaryService:
         if not entry:
             return None
         
+        self.nutrition_rollup_service.remove_entry(entry, entry.food)
+        association_changes = self.food_association_service.remove_entry(entry)
+        
         # Update fields if provided
         if 'grams' in data:
             entry.grams = data['grams']
@@ -56,8 +65,15 @@ class DiaryService:
             entry.date = data['date']
         if 'food_id' in data:
             entry.food_id = data['food_id']
+            entry.food = Food.query.get(data['food_id'])
+        if 'grams' in data or 'food_id' in data:
+            entry.take_snapshot(entry.food)
         
+        self.nutrition_rollup_service.add_entry(entry, entry.food)
+        association_changes += self.food_association_service.add_entry(entry)
         self.db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
         return entry
     
     def delete_entry(self, entry_id):
@@ -66,8 +82,12 @@ class DiaryService:
         if not entry:
             return False
         
+        self.nutrition_rollup_service.remove_entry(entry, entry.food)
+        association_changes = self.food_association_service.remove_entry(entry)
         self.db.session.delete(entry)
         self.db.session.commit()
+        food_recommendation_index.apply(association_changes)
+        recent_foods_index.apply(association_changes)
         return True
     
     def calculate_entry_nutrition(self, entry):
@@ -75,55 +95,13 @@ class DiaryService:
         if not entry or not entry.food:
             return {}
         
-        # Return the already calculated values from the entry
-        return {
-            'calories': entry.calories,
-            'protein': entry.protein,
-            'carbohydrates': entry.carbohydrates,
-            'fat': entry.fat,
-            'fiber': entry.fiber,
-            'sugar': entry.sugar,
-            'saturated_fat': entry.saturated_fat,
-            'unsaturated_fat': entry.unsaturated_fat,
-            'cholesterol': entry.cholesterol,
-            'sodium': entry.sodium,
-            'potassium': entry.potassium,
-            'calcium': entry.calcium,
-            'iron': entry.iron,
-            'vitamin_a': entry.vitamin_a,
-            'vitamin_c': entry.vitamin_c,
-            'vitamin_d': entry.vitamin_d,
-            'vitamin_b12': entry.vitamin_b12,
-            'magnesium': entry.magnesium
-        }
+        # Stored snapshot in snapshot mode, otherwise derived from the food
+        return entry.nutrition(entry.food)
     
     def calculate_daily_nutrition(self, target_date):
         """Calculate total daily nutrition for a given date."""
         entries = self.get_entries_by_date(target_date)
-        total_nutrition = {
-            'calories': 0.0,
-            'protein': 0.0,
-            'carbohydrates': 0.0,
-            'fat': 0.0,
-            'fiber': 0.0,
-            'sugar': 0.0,
-            'saturated_fat': 0.0,
-            'unsaturated_fat': 0.0,
-            'cholesterol': 0.0,
-            'sodium': 0.0,
-            'potassium': 0.0,
-            'calcium': 0.0,
-            'iron': 0.0,
-            'vitamin_a': 0.0,
-            'vitamin_c': 0.0,
-            'vitamin_d': 0.0,
-            'vitamin_b12': 0.0,
-            'magnesium': 0.0
-        }
-        
-        for entry in entries:
-            entry_nutrition = self.calculate_entry_nutrition(entry)
-            for nutrient, value in entry_nutrition.items():
-                total_nutrition[nutrient] += value
+        matrix = NutrientMatrix.load(self.db.session, {entry.food_id for entry in entries})
         
-        return total_nutrition
+        totals = DiaryEntry.totals_by(entries, matrix, key=lambda entry: None)
+        return NutrientVector.to_dict(totals.get(None, NutrientVector.zeros()))
@@ -0,0 +1,152 @@
+from sqlalchemy import func
+from datetime import date, timedelta
+from db.models.daily_nutrition_total import DailyNutritionTotal
+from db.models.food import Food
+from db.models.meal_types import MealType
+from db.database import db
+
+class DiarySummaryService:
+    # Longest range get_range_summary accepts per granularity, in days
+    MAX_RANGE_DAYS = {'day': 731, 'week': 1827, 'month': 7305}
+
+    def __init__(self):
+        self.db = db
+
+    def get_meal_totals(self, target_date):
+        """Return nutrient totals per meal type for a date from the rollup table."""
+        rows = DailyNutritionTotal.query.filter(
+            DailyNutritionTotal.date == target_date,
+            DailyNutritionTotal.entry_count > 0
+        ).all()
+
+        meal_totals = {}
+        for row in rows:
+            totals = {field: getattr(row, field) for field in Food.NUTRIENT_FIELDS}
+            totals['entry_count'] = row.entry_count
+            meal_totals[row.meal_type] = totals
+
+        return meal_totals
+
+    def build_daily_summary(self, target_date, meal_totals):
+        """Combine per-meal totals into the daily summary response."""
+        summary = {'date': target_date.isoformat()}
+        for field in Food.NUTRIENT_FIELDS:
+            summary[f'total_{field}'] = round(
+                sum(totals[field] for totals in meal_totals.values()), 1
+            )
+        summary['entry_count'] = sum(totals['entry_count'] for totals in meal_totals.values())
+
+        # Break down by meal type (always include the known meal types)
+        meal_types = list(MealType.ALL_TYPES)
+        meal_types += [meal_type for meal_type in meal_totals if meal_type not in meal_types]
+
+        meal_breakdown = {}
+        for meal_type in meal_types:
+            totals = meal_totals.get(meal_type)
+            breakdown = {
+                field: round(totals[field], 1) if totals else 0.0
+                for field in Food.NUTRIENT_FIELDS
+            }
+            breakdown['entry_count'] = totals['entry_count'] if totals else 0
+            meal_breakdown[meal_type] = breakdown
+        summary['meal_breakdown'] = meal_breakdown
+
+        return summary
+
+    def get_daily_summary(self, target_date):
+        """Return the full nutritional summary for a date."""
+        return self.build_daily_summary(target_date, self.get_meal_totals(target_date))
+
+    def get_totals_by_date(self, start_date, end_date):
+        """Return nutrient totals per date in a range, computed in one query."""
+        rows = self.db.session.query(
+            DailyNutritionTotal.date,
+            func.sum(DailyNutritionTotal.entry_count).label('entry_count'),
+            *[
+                func.sum(getattr(DailyNutritionTotal, field)).label(field)
+                for field in Food.NUTRIENT_FIELDS
+            ]
+        ).filter(
+            DailyNutritionTotal.date >= start_date,
+            DailyNutritionTotal.date <= end_date
+        ).group_by(DailyNutritionTotal.date).all()
+
+        totals_by_date = {}
+        for row in rows:
+            totals = {field: getattr(row, field) for field in Food.NUTRIENT_FIELDS}
+            totals['entry_count'] = row.entry_count
+            totals_by_date[row.date] = totals
+
+        return totals_by_date
+
+    @staticmethod
+    def bucket_start(day, granularity):
+        """Return the first date of the bucket a day belongs to."""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def bucket_end(start, granularity):
+        """Return the last date of a bucket given its first date."""
+        if granularity == 'week':
+            # The week holding date.max is cut short there
+            if start > date.max - timedelta(days=6):
+                return date.max
+            return start + timedelta(days=6)
+        if granularity == 'month':
+            if start.month == 12:
+                return start.replace(day=31)
+            return start.replace(month=start.month + 1, day=1) - timedelta(days=1)
+        return start
+
+    def build_range_summary(self, start_date, end_date, granularity, totals_by_date):
+        """Fold per-date totals into day/week/month buckets covering the range."""
+        buckets = {}
+        bucket = self.bucket_start(start_date, granularity)
+        while True:
+            totals = {field: 0.0 for field in Food.NUTRIENT_FIELDS}
+            totals['entry_count'] = 0
+            buckets[bucket] = totals
+            last = self.bucket_end(bucket, granularity)
+            if last >= end_date:
+                break
+            bucket = last + timedelta(days=1)
+
+        for day, day_totals in totals_by_date.items():
+            totals = buckets[self.bucket_start(day, granularity)]
+            for field in Food.NUTRIENT_FIELDS:
+                totals[field] += day_totals[field]
+            totals['entry_count'] += day_totals['entry_count']
+
+        result = []
+        for bucket, totals in buckets.items():
+            item = {
+                'start': bucket.isoformat(),
+                'end': self.bucket_end(bucket, granularity).isoformat()
+            }
+            for field in Food.NUTRIENT_FIELDS:
+                item[field] = round(totals[field], 1)
+            item['entry_count'] = totals['entry_count']
+            result.append(item)
+
+        return {
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'granularity': granularity,
+            'buckets': result
+        }
+
+    def get_range_summary(self, start_date, end_date, granularity='day'):
+        """Return per-bucket nutrient totals for a date range.
+
+        Raises ValueError if the range is longer than MAX_RANGE_DAYS allows
+        for the granularity.
+        """
+        max_days = self.MAX_RANGE_DAYS[granularity]
+        if (end_date - start_date).days + 1 > max_days:
+            raise ValueError(f'Range too long for {granularity} granularity (at most {max_days} days)')
+        totals_by_date = self.get_totals_by_date(start_date, end_date)
+        return self.build_range_summary(start_date, end_date, granularity, totals_by_date)
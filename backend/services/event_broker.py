@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from db.models.catalog_version import CatalogVersion
+from db.models.change_event import ChangeEvent
+from db.database import db
+
+class EventBroker:
+    """Fans out change events to Server-Sent Events subscribers.
+
+    publish() serializes an event once into an SSE frame and appends it to
+    a ring buffer of recent frames. Subscribers wait on a shared condition
+    and read every frame after their own cursor, so publishing costs the
+    same for one subscriber as for a thousand. A reconnecting client sends
+    Last-Event-ID and gets the frames it missed from the buffer; if they
+    are no longer there it gets a 'resync' event and refetches instead.
+
+    After init_app(app) the broker is shared between processes (gunicorn
+    workers): publish() writes the event to the change_events table with
+    the next 'events' catalog version as its id, and every process with
+    subscribers runs one relay thread that polls the table every
+    poll_seconds and appends new events to its ring buffer. Event ids are
+    then the same in every worker, so a client may reconnect to any of
+    them. Only the last history_size events are kept in the table.
+    EVENT_SHARED=false keeps events within the publishing process.
+
+    Publishers only build and store events while someone listens. A process
+    with open streams keeps the 'event_listeners' catalog version, a unix
+    time, at least LISTENER_TTL seconds ahead, and has_subscribers() in
+    every process checks it at most every LISTENER_CHECK_SECONDS. The first
+    stream opened after a quiet period can therefore miss events from other
+    workers for that long; clients load their data when they connect.
+    """
+
+    HISTORY_SIZE = 1000
+    LISTENER_TTL = 30
+    LISTENER_CHECK_SECONDS = 2
+
+    def __init__(self, history_size=None, heartbeat_seconds=None, poll_seconds=None):
+        if heartbeat_seconds is None:
+            heartbeat_seconds = float(os.getenv('EVENT_HEARTBEAT_SECONDS', 15))
+        if poll_seconds is None:
+            poll_seconds = float(os.getenv('EVENT_POLL_SECONDS', 1))
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+
+        self._condition = threading.Condition()
+        self._history = deque(maxlen=history_size or self.HISTORY_SIZE)
+        self._last_id = 0
+        self.subscribers = 0
+
+        self._app = None
+        self._relay_lock = threading.Lock()
+        self._relay_thread = None
+        self._relay_loaded = False
+        self._wake = threading.Event()
+        self._beat_at = None
+        self._listeners_until = 0
+        self._listeners_checked_at = None
+
+    def init_app(self, app):
+        """Share events between processes through the database."""
+        if os.getenv('EVENT_SHARED', 'true').lower() == 'true':
+            self._app = app
+
+    @property
+    def shared(self):
+        return self._app is not None
+
+    def has_subscribers(self):
+        """Return whether a stream is open in this or (when shared) any process."""
+        if self.subscribers > 0:
+            return True
+        if not self.shared:
+            return False
+
+        now = time.monotonic()
+        if self._listeners_checked_at is None or now - self._listeners_checked_at >= self.LISTENER_CHECK_SECONDS:
+            self._listeners_checked_at = now
+            try:
+                with self._app.app_context(), db.engine.connect() as connection:
+                    self._listeners_until = connection.execute(
+                        select(CatalogVersion.version).where(CatalogVersion.name == 'event_listeners')
+                    ).scalar() or 0
+            except Exception as e:
+                print(f"Checking event listeners failed: {e}")
+        return time.time() < self._listeners_until
+
+    def publish(self, event_type, payload):
+        """Send an event to all subscribers. Returns the event id (None if it could not be stored)."""
+        data = json.dumps({'type': event_type, 'payload': payload}, separators=(',', ':'), default=str)
+        if self.shared:
+            return self._store(data)
+
+        with self._condition:
+            self._append(self._last_id + 1, data)
+            self._condition.notify_all()
+        return self._last_id
+
+    def _append(self, event_id, data):
+        """Add a frame to the ring buffer. Caller holds the lock."""
+        self._last_id = event_id
+        self._history.append((event_id, f'id: {event_id}\ndata: {data}\n\n'))
+
+    # Sharing between processes
+
+    def _store(self, data):
+        # Publishers call this after their own commit; a failure to store
+        # the event must not fail the request that made the change
+        try:
+            with self._app.app_context(), Session(db.engine) as session:
+                # The version row is locked until this short transaction
+                # commits, so ids are committed in order and without gaps
+                event_id = CatalogVersion.next(session, 'events')
+                session.add(ChangeEvent(id=event_id, data=data))
+                if event_id % self._history.maxlen == 0:
+                    session.query(ChangeEvent).filter(
+                        ChangeEvent.id <= event_id - self._history.maxlen
+                    ).delete(synchronize_session=False)
+                session.commit()
+        except Exception as e:
+            print(f"Storing change event failed: {e}")
+            return None
+
+        # Local subscribers don't wait for the next poll
+        self._wake.set()
+        return event_id
+
+    def _beat(self):
+        """Tell other processes that this one has streams open, at most every third of LISTENER_TTL."""
+        now = time.monotonic()
+        if self._beat_at is not None and now - self._beat_at < self.LISTENER_TTL / 3:
+            return
+        self._beat_at = now
+        until = int(time.time()) + self.LISTENER_TTL
+        try:
+            with self._app.app_context(), Session(db.engine) as session:
+                session.execute(update(CatalogVersion).where(
+                    CatalogVersion.name == 'event_listeners', CatalogVersion.version < until
+                ).values(version=until))
+                if CatalogVersion.get(session, 'event_listeners') < until:
+                    session.add(CatalogVersion(name='event_listeners', version=until))
+                session.commit()
+        except Exception as e:
+            # Retried on the next poll
+            self._beat_at = None
+            print(f"Recording event listeners failed: {e}")
+
+    def _load(self, connection, after_id=None):
+        """Return up to history_size (id, data) rows after after_id, or the latest ones."""
+        table = ChangeEvent.__table__
+        limit = self._history.maxlen
+        if after_id is None:
+            rows = connection.execute(
+                select(table.c.id, table.c.data).order_by(table.c.id.desc()).limit(limit)
+            ).all()
+            return rows[::-1]
+        return connection.execute(
+            select(table.c.id, table.c.data).where(table.c.id > after_id).order_by(table.c.id).limit(limit)
+        ).all()
+
+    def _poll(self, after_id=None):
+        with self._app.app_context(), db.engine.connect() as connection:
+            rows = self._load(connection, after_id)
+        if rows:
+            with self._condition:
+                for event_id, data in rows:
+                    self._append(event_id, data)
+                self._condition.notify_all()
+        return len(rows)
+
+    def _start_relay(self):
+        """Load the recent events once and make sure the relay thread runs."""
+        self._beat()
+        with self._relay_lock:
+            if not self._relay_loaded:
+                self._poll()
+                self._relay_loaded = True
+            if self._relay_thread is None:
+                self._relay_thread = threading.Thread(target=self._relay, daemon=True)
+                self._relay_thread.start()
+
+    def _relay(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            with self._relay_lock:
+                if not self.subscribers:
+                    # Started again by the next subscriber
+                    self._relay_thread = None
+                    return
+            self._beat()
+            try:
+                while self._poll(self._last_id) == self._history.maxlen:
+                    pass
+            except Exception as e:
+                print(f"Polling change events failed: {e}")
+
+    # Subscribing
+
+    def _frames_after(self, cursor):
+        """Return (frames, new cursor, missed) for events after cursor. Caller holds the lock."""
+        if not self._history or cursor >= self._last_id:
+            return [], cursor, False
+        first_id = self._history[0][0]
+        if cursor < first_id - 1:
+            return [], self._last_id, True
+        frames = [frame for _, frame in islice(self._history, cursor - first_id + 1, None)]
+        return frames, self._last_id, False
+
+    def listen(self, last_event_id=None, duration=None):
+        """Yield SSE frames as they are published.
+
+        Starts after last_event_id if given, otherwise with the next
+        event. A comment line is sent when nothing has happened for
+        heartbeat_seconds so proxies keep the connection open. With
+        duration the stream ends after that many seconds and the client
+        reconnects with Last-Event-ID.
+        """
+        deadline = time.monotonic() + duration if duration else None
+
+        with self._condition:
+            self.subscribers += 1
+        try:
+            if self.shared:
+                self._start_relay()
+            with self._condition:
+                cursor = self._last_id if last_event_id is None else min(last_event_id, self._last_id)
+
+            yield 'retry: 3000\n\n'
+            while deadline is None or time.monotonic() < deadline:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._last_id > cursor, self.heartbeat_seconds)
+                    frames, cursor, missed = self._frames_after(cursor)
+
+                if missed:
+                    yield f'id: {cursor}\ndata: {{"type":"resync","payload":{{}}}}\n\n'
+                elif frames:
+                    yield ''.join(frames)
+                else:
+                    yield ': keep-alive\n\n'
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def stats(self):
+        return {
+            'subscribers': self.subscribers,
+            'last_event_id': self._last_id,
+            'buffered_events': len(self._history),
+            'shared': self.shared
+        }
+
+# Shared per-process broker
+event_broker = EventBroker()
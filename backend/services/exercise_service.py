@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from db.models.exercise import Exercise
 from db.database import db
 from datetime import date
@@ -10,7 +11,21 @@ class ExerciseService:
         """Return all exercises for a given date."""
         return Exercise.query.filter_by(date=target_date).all()
     
-    def add_exercise(self, name, duration_minutes, calories_burned, target_date=None):
+    def get_daily_totals(self, target_date):
+        """Return total calories burned and minutes for a date."""
+        calories, minutes, count = self.db.session.query(
+            func.coalesce(func.sum(Exercise.calories_burned), 0),
+            func.coalesce(func.sum(Exercise.duration_minutes), 0),
+            func.count(Exercise.id)
+        ).filter(Exercise.date == target_date).one()
+        return {
+            'date': target_date.isoformat(),
+            'total_calories_burned': calories,
+            'total_duration_minutes': minutes,
+            'exercise_count': count
+        }
+    
+    def add_exercise(self, name, duration_minutes, calories_burned, target_date=None, commit=True):
         """Create a new exercise entry."""
         if target_date is None:
             target_date = date.today()
@@ -23,10 +38,11 @@ class ExerciseService:
         )
         
         self.db.session.add(exercise)
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return exercise
     
-    def update_exercise(self, exercise_id, data):
+    def update_exercise(self, exercise_id, data, commit=True):
         """Update an existing exercise entry."""
         exercise = Exercise.query.get(exercise_id)
         if not exercise:
@@ -42,15 +58,17 @@ class ExerciseService:
         if 'date' in data:
             exercise.date = data['date']
         
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return exercise
     
-    def delete_exercise(self, exercise_id):
+    def delete_exercise(self, exercise_id, commit=True):
         """Delete an exercise entry."""
         exercise = Exercise.query.get(exercise_id)
         if not exercise:
             return False
         
         self.db.session.delete(exercise)
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return True
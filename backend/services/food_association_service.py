@@ -1,109 +1,490 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+import hashlib
+import heapq
+from array import array
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from sqlalchemy import and_, bindparam, desc, func, insert, text
 from db.models.food_association import FoodAssociation
-from db.models.diary_entry_improved import DiaryEntry
-from datetime import date, datetime
-from typing import List, Dict, Tuple
+from db.models.food_occurrence import FoodOccurrence
+from db.models.meal_count import MealCount
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+from services.food_recommendation_index import food_recommendation_index
+
+class _PairCounts:
+    """Counts food pairs of one meal type in two parallel integer arrays.
+
+    Pairs are packed into one 64-bit key (food1_id << 32 | food2_id) and
+    buffered. A full buffer is sorted, run-length encoded and merged into
+    the sorted keys/counts arrays, so memory stays at 16 bytes per
+    distinct pair plus the buffer.
+    """
+
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self):
+        self.keys = array('q')
+        self.counts = array('q')
+        self._buffer = array('q')
+
+    def add(self, food1_id, food2_id):
+        self._buffer.append(food1_id << 32 | food2_id)
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        keys, counts = array('q'), array('q')
+        for key, group in groupby(sorted(self._buffer)):
+            keys.append(key)
+            counts.append(sum(1 for _ in group))
+        self._buffer = array('q')
+
+        if self.keys:
+            merged = heapq.merge(zip(self.keys, self.counts), zip(keys, counts))
+            keys, counts = array('q'), array('q')
+            for key, group in groupby(merged, key=itemgetter(0)):
+                keys.append(key)
+                counts.append(sum(count for _, count in group))
+        self.keys, self.counts = keys, counts
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        """Yield (food1_id, food2_id, count) in key order."""
+        self.flush()
+        for key, count in zip(self.keys, self.counts):
+            yield key >> 32, key & 0xFFFFFFFF, count
 
 class FoodAssociationService:
-    def __init__(self, db: Session):
+    """Keeps food co-occurrence counters in sync with diary_entries.
+
+    A meal is the set of distinct foods logged for one (date, meal_type).
+    Per meal type there are three sparse counters: the number of meals
+    (meal_counts), the number of meals containing each food
+    (food_occurrences) and the number of meals containing each pair
+    (food_associations.co_occurrence_count). When a food joins or leaves a
+    meal with k other foods, k pair rows change, so a whole meal costs
+    O(k^2). Nothing is recomputed for the rest of the meal type.
+
+    The stored confidence and support of a pair are current as of the pair's
+    last change. Recommendations are computed from the counters in
+    food_recommendation_index.
+
+    Apart from ensure_backfilled, the write methods do not commit. Like
+    NutritionRollupService, callers commit together with the diary change.
+    After committing, they pass the returned changes to
+    food_recommendation_index.apply() and recent_foods_index.apply().
+
+    Whether a food joins or leaves a meal depends on the other entries of
+    the meal, so writers to the same meal must not read it at the same time.
+    On Postgres the meal is locked with a transaction-level advisory lock
+    before it is read; SQLite already serializes writers.
+    """
+
+    REBUILD_BATCH_SIZE = 5000
+
+    def __init__(self):
         self.db = db
-    
-    def update_associations_for_meal(self, meal_date: date, meal_type: str):
-        """Update food associations for a specific meal"""
-        # Get all food IDs for this meal on this date
-        food_entries = self.db.query(DiaryEntry).filter(
+
+    def _dialect(self):
+        return self.db.engine.dialect.name
+
+    # Incremental updates
+
+    def _lock_meal(self, meal_date, meal_type):
+        """Hold a lock on one meal until the transaction ends (Postgres only).
+
+        Under READ COMMITTED two writers adding to the same meal would
+        otherwise both miss the other's entry and never count the pair.
+        """
+        if self._dialect() != 'postgresql':
+            return
+        digest = hashlib.blake2b(f'{meal_date}|{meal_type}'.encode(), digest_size=8).digest()
+        key = int.from_bytes(digest, 'big', signed=True)
+        self.db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': key})
+
+    def _meal_foods(self, meal_date, meal_type, exclude_entry_id=None):
+        """Lock one meal and return {food_id: entry count} for it."""
+        self._lock_meal(meal_date, meal_type)
+        self.db.session.flush()
+        query = self.db.session.query(
+            DiaryEntry.food_id, func.count(DiaryEntry.id)
+        ).filter(
             DiaryEntry.date == meal_date,
             DiaryEntry.meal_type == meal_type
-        ).all()
-        
-        food_ids = [entry.food_id for entry in food_entries]
-        
-        if len(food_ids) < 2:
-            return  # Need at least 2 foods to create associations
-        
-        # Update individual food counts
-        for food_id in food_ids:
-            self._update_food_count(food_id, meal_type)
-        
-        # Update pair associations
-        for i in range(len(food_ids)):
-            for j in range(i + 1, len(food_ids)):
-                food1_id, food2_id = food_ids[i], food_ids[j]
-                association = FoodAssociation.get_or_create(
-                    self.db, meal_type, food1_id, food2_id
-                )
-                association.co_occurrence_count += 1
-        
-        # Recalculate all metrics for this meal type
-        self._recalculate_metrics(meal_type)
-        self.db.commit()
-    
-    def _update_food_count(self, food_id: int, meal_type: str):
-        """Update total occurrence count for a food in a meal type"""
-        # This is a simplified approach - in practice you might want to track this separately
-        # For now, we'll count from diary entries
-        count = self.db.query(DiaryEntry).filter(
-            DiaryEntry.food_id == food_id,
-            DiaryEntry.meal_type == meal_type
-        ).count()
-        
-        # Update all associations involving this food
-        associations = self.db.query(FoodAssociation).filter(
-            (FoodAssociation.food1_id == food_id) | (FoodAssociation.food2_id == food_id),
-            FoodAssociation.meal_type == meal_type
-        ).all()
-        
-        for assoc in associations:
-            if assoc.food1_id == food_id:
-                assoc.total_occurrences_food1 = count
-            if assoc.food2_id == food_id:
-                assoc.total_occurrences_food2 = count
-    
-    def _recalculate_metrics(self, meal_type: str):
-        """Recalculate confidence and support for all associations in a meal type"""
-        # Get total number of meals of this type
-        total_meals = self.db.query(func.count(func.distinct(DiaryEntry.date))).filter(
-            DiaryEntry.meal_type == meal_type
-        ).scalar() or 1
-        
-        # Update all associations for this meal type
-        associations = self.db.query(FoodAssociation).filter(
-            FoodAssociation.meal_type == meal_type
-        ).all()
-        
-        for assoc in associations:
-            assoc.update_metrics(total_meals)
-    
-    def get_recommendations(self, food_id: int, meal_type: str, limit: int = 5) -> List[Dict]:
-        """Get food recommendations based on associations"""
-        associations = self.db.query(FoodAssociation).filter(
-            ((FoodAssociation.food1_id == food_id) | (FoodAssociation.food2_id == food_id)),
-            FoodAssociation.meal_type == meal_type,
-            FoodAssociation.confidence > 0.1  # Minimum confidence threshold
-        ).order_by(desc(FoodAssociation.confidence)).limit(limit).all()
-        
-        recommendations = []
-        for assoc in associations:
-            # Get the other food (not the input food)
-            other_food_id = assoc.food2_id if assoc.food1_id == food_id else assoc.food1_id
-            
-            recommendations.append({
-                'food_id': other_food_id,
-                'confidence': assoc.confidence,
-                'support': assoc.support,
-                'co_occurrence_count': assoc.co_occurrence_count
+        )
+        if exclude_entry_id is not None:
+            query = query.filter(DiaryEntry.id != exclude_entry_id)
+        return dict(query.group_by(DiaryEntry.food_id).all())
+
+    def food_added(self, meal_date, meal_type, food_id):
+        """Count a food that has just been logged in a meal."""
+        foods = self._meal_foods(meal_date, meal_type)
+        if foods.get(food_id, 0) != 1:
+            # The food was already part of the meal
+            return []
+
+        others = sorted(f for f in foods if f != food_id)
+        return self._apply(meal_date, meal_type, [food_id], others, 1, 0 if others else 1)
+
+    def food_removed(self, meal_date, meal_type, food_id, exclude_entry_id=None):
+        """Uncount a food that is leaving a meal.
+
+        The meal is read without exclude_entry_id, so this can be called
+        for an entry that is about to be deleted or changed.
+        """
+        foods = self._meal_foods(meal_date, meal_type, exclude_entry_id)
+        if foods.get(food_id, 0) != 0:
+            # Other entries of the same food keep it in the meal
+            return []
+
+        others = sorted(foods)
+        return self._apply(meal_date, meal_type, [food_id], others, -1, 0 if others else -1)
+
+    def add_entry(self, entry):
+        """Count a new or changed entry (call after adding or changing it)."""
+        return self.food_added(entry.date, entry.meal_type, entry.food_id)
+
+    def remove_entry(self, entry):
+        """Uncount an entry (call before deleting or changing it)."""
+        return self.food_removed(entry.date, entry.meal_type, entry.food_id, entry.id)
+
+    def add_entries(self, entries):
+        """Count many new entries given as (date, meal_type, food_id).
+
+        Call after inserting them. Each meal is read once and all foods
+        that joined it are counted in one set of statements.
+        """
+        added = {}
+        for meal_date, meal_type, food_id in entries:
+            meal = added.setdefault((meal_date, meal_type), {})
+            meal[food_id] = meal.get(food_id, 0) + 1
+
+        changes = []
+        # Meals are locked in a fixed order so concurrent imports don't deadlock
+        for (meal_date, meal_type), new_counts in sorted(added.items()):
+            foods = self._meal_foods(meal_date, meal_type)
+            others = sorted(f for f, count in foods.items() if count > new_counts.get(f, 0))
+            joined = sorted(f for f, count in new_counts.items() if foods.get(f, 0) == count)
+            if joined:
+                changes += self._apply(meal_date, meal_type, joined, others, 1, 0 if others else 1)
+        return changes
+
+    def _apply(self, meal_date, meal_type, food_ids, others, sign, meal_delta):
+        """Count food_ids joining (sign=1) or leaving (sign=-1) a meal with others.
+
+        The foods are counted as if they joined one after another, so the
+        pairs among food_ids change as well.
+        """
+        session = self.db.session
+
+        pairs = []
+        changes = []
+        for i, food_id in enumerate(food_ids):
+            partners = list(others) + list(food_ids[:i])
+            pairs += [(food_id, other_id) for other_id in partners]
+            changes.append((meal_type, food_id, tuple(partners), sign, meal_delta if i == 0 else 0, meal_date))
+
+        if meal_delta:
+            self._increment(MealCount, ['meal_type'], [{'meal_type': meal_type}], meal_delta)
+        self._increment(
+            FoodOccurrence, ['meal_type', 'food_id'],
+            [{'meal_type': meal_type, 'food_id': food_id} for food_id in food_ids], sign
+        )
+
+        if pairs:
+            occurrences = dict(session.query(
+                FoodOccurrence.food_id, FoodOccurrence.meal_count
+            ).filter(
+                FoodOccurrence.meal_type == meal_type,
+                FoodOccurrence.food_id.in_(list(others) + list(food_ids))
+            ).all())
+            meals = session.query(MealCount.meal_count).filter(
+                MealCount.meal_type == meal_type
+            ).scalar() or 1
+            self._update_pairs(meal_type, pairs, sign, occurrences, meals)
+
+        CatalogVersion.bump(session, 'food_associations')
+        return changes
+
+    def _increment(self, model, keys, rows, delta):
+        """Add delta to model.meal_count for each key row, creating rows as needed."""
+        table = model.__table__
+        rows = [dict(row, meal_count=delta) for row in rows]
+
+        dialect = self._dialect()
+        if delta > 0 and dialect in ('sqlite', 'postgresql'):
+            stmt = self._insert(dialect, table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={'meal_count': table.c.meal_count + stmt.excluded.meal_count}
+            )
+            self.db.session.execute(stmt, rows)
+            return
+
+        match = and_(*[table.c[key] == bindparam(f'k_{key}') for key in keys])
+        params = [dict({f'k_{key}': row[key] for key in keys}, delta=delta) for row in rows]
+        result = self.db.session.execute(
+            table.update().where(match).values(meal_count=table.c.meal_count + bindparam('delta')),
+            params
+        )
+        if delta > 0 and result.rowcount < len(rows):
+            for row in rows:
+                exists = self.db.session.query(table).filter(
+                    *[table.c[key] == row[key] for key in keys]
+                ).first()
+                if not exists:
+                    self.db.session.execute(insert(table), row)
+        elif delta < 0:
+            self.db.session.execute(table.delete().where(match, table.c.meal_count <= 0), params)
+
+    @staticmethod
+    def _insert(dialect, table):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(table)
+
+    def _update_pairs(self, meal_type, pairs, sign, occurrences, meals):
+        table = FoodAssociation.__table__
+        now = datetime.utcnow()
+
+        rows = []
+        for food_id, other_id in pairs:
+            food1_id, food2_id = min(food_id, other_id), max(food_id, other_id)
+            rows.append({
+                'meal_type': meal_type,
+                'food1_id': food1_id,
+                'food2_id': food2_id,
+                'n1': max(occurrences.get(food1_id, 0), 1),
+                'n2': max(occurrences.get(food2_id, 0), 1),
             })
-        
-        return recommendations
-    
-    def get_popular_combinations(self, meal_type: str, limit: int = 10) -> List[Dict]:
+
+        dialect = self._dialect()
+        if sign > 0 and dialect in ('sqlite', 'postgresql'):
+            stmt = self._insert(dialect, table)
+            # New rows carry 1/n1 and 1/meals in confidence and support, so
+            # existing rows can scale them by their new count
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['meal_type', 'food1_id', 'food2_id'],
+                set_={
+                    'co_occurrence_count': table.c.co_occurrence_count + 1,
+                    'total_occurrences_food1': stmt.excluded.total_occurrences_food1,
+                    'total_occurrences_food2': stmt.excluded.total_occurrences_food2,
+                    'confidence': (table.c.co_occurrence_count + 1) * stmt.excluded.confidence,
+                    'support': (table.c.co_occurrence_count + 1) * stmt.excluded.support,
+                    'updated_at': stmt.excluded.updated_at,
+                }
+            )
+            self.db.session.execute(stmt, [{
+                'meal_type': row['meal_type'],
+                'food1_id': row['food1_id'],
+                'food2_id': row['food2_id'],
+                'co_occurrence_count': 1,
+                'total_occurrences_food1': row['n1'],
+                'total_occurrences_food2': row['n2'],
+                'confidence': 1.0 / row['n1'],
+                'support': 1.0 / meals,
+                'created_at': now,
+                'updated_at': now,
+            } for row in rows])
+            return
+
+        match = and_(
+            table.c.meal_type == bindparam('k_meal_type'),
+            table.c.food1_id == bindparam('k_food1_id'),
+            table.c.food2_id == bindparam('k_food2_id')
+        )
+        new_count = table.c.co_occurrence_count + bindparam('delta')
+        params = [{
+            'k_meal_type': row['meal_type'],
+            'k_food1_id': row['food1_id'],
+            'k_food2_id': row['food2_id'],
+            'delta': sign,
+            'n1': row['n1'],
+            'n2': row['n2'],
+            'inv_n1': 1.0 / row['n1'],
+            'inv_meals': 1.0 / meals,
+            'now': now,
+        } for row in rows]
+
+        result = self.db.session.execute(table.update().where(match).values(
+            co_occurrence_count=new_count,
+            total_occurrences_food1=bindparam('n1'),
+            total_occurrences_food2=bindparam('n2'),
+            confidence=new_count * bindparam('inv_n1'),
+            support=new_count * bindparam('inv_meals'),
+            updated_at=bindparam('now')
+        ), params)
+
+        if sign < 0:
+            self.db.session.execute(
+                table.delete().where(match, table.c.co_occurrence_count <= 0),
+                params
+            )
+        elif result.rowcount < len(rows):
+            # Databases without ON CONFLICT: insert the pairs that were missing
+            for row in rows:
+                exists = self.db.session.query(FoodAssociation.id).filter_by(
+                    meal_type=row['meal_type'], food1_id=row['food1_id'], food2_id=row['food2_id']
+                ).first()
+                if not exists:
+                    self.db.session.execute(insert(table), {
+                        'meal_type': row['meal_type'],
+                        'food1_id': row['food1_id'],
+                        'food2_id': row['food2_id'],
+                        'co_occurrence_count': 1,
+                        'total_occurrences_food1': row['n1'],
+                        'total_occurrences_food2': row['n2'],
+                        'confidence': 1.0 / row['n1'],
+                        'support': 1.0 / meals,
+                        'created_at': now,
+                        'updated_at': now,
+                    })
+
+    # Full rebuild
+
+    def _count_meals(self, progress=None, progress_every=10000):
+        """Stream diary history once and count meals, foods and pairs per meal type."""
+        meal_counts = {}
+        occurrences = {}
+        pairs = {}
+        stats = {'entries': 0, 'meals': 0, 'pair_updates': 0}
+
+        rows = self.db.session.query(
+            DiaryEntry.date, DiaryEntry.meal_type, DiaryEntry.food_id
+        ).order_by(DiaryEntry.date, DiaryEntry.meal_type).yield_per(10000)
+
+        for (_, meal_type), meal in groupby(rows, key=itemgetter(0, 1)):
+            foods = set()
+            for row in meal:
+                foods.add(row[2])
+                stats['entries'] += 1
+            foods = sorted(foods)
+
+            meal_counts[meal_type] = meal_counts.get(meal_type, 0) + 1
+            food_counts = occurrences.setdefault(meal_type, {})
+            for food_id in foods:
+                food_counts[food_id] = food_counts.get(food_id, 0) + 1
+
+            if len(foods) > 1:
+                pair_counts = pairs.get(meal_type)
+                if pair_counts is None:
+                    pair_counts = pairs[meal_type] = _PairCounts()
+                for i, food1_id in enumerate(foods):
+                    for food2_id in foods[i + 1:]:
+                        pair_counts.add(food1_id, food2_id)
+                stats['pair_updates'] += len(foods) * (len(foods) - 1) // 2
+
+            stats['meals'] += 1
+            if progress and stats['meals'] % progress_every == 0:
+                progress(stats)
+
+        for pair_counts in pairs.values():
+            pair_counts.flush()
+        stats['pairs'] = sum(len(p) for p in pairs.values())
+        if progress:
+            progress(stats)
+        return meal_counts, occurrences, pairs, stats
+
+    def rebuild(self, progress=None, progress_every=10000):
+        """Recount all association tables from diary history.
+
+        The old rows are deleted first, which takes the write lock for the
+        whole rebuild, and the new rows are written in the same transaction.
+        Readers see the old statistics until the caller commits. progress
+        is called with running totals every progress_every meals while the
+        history is streamed.
+        """
+        session = self.db.session
+        if self._dialect() == 'postgresql':
+            # Keep diary writes out until the new counters are committed
+            session.execute(text('LOCK TABLE diary_entries IN SHARE MODE'))
+
+        for model in (FoodAssociation, FoodOccurrence, MealCount):
+            session.execute(model.__table__.delete())
+
+        meal_counts, occurrences, pairs, stats = self._count_meals(progress, progress_every)
+
+        if meal_counts:
+            session.execute(insert(MealCount.__table__), [
+                {'meal_type': meal_type, 'meal_count': count}
+                for meal_type, count in meal_counts.items()
+            ])
+        self._insert_batched(FoodOccurrence.__table__, (
+            {'meal_type': meal_type, 'food_id': food_id, 'meal_count': count}
+            for meal_type, food_counts in occurrences.items()
+            for food_id, count in food_counts.items()
+        ))
+
+        # confidence and support for every pair in one pass over the arrays
+        now = datetime.utcnow()
+
+        def association_rows():
+            for meal_type, pair_counts in pairs.items():
+                food_counts = occurrences[meal_type]
+                inv_meals = 1.0 / meal_counts[meal_type]
+                for food1_id, food2_id, count in pair_counts:
+                    n1 = food_counts[food1_id]
+                    yield {
+                        'meal_type': meal_type,
+                        'food1_id': food1_id,
+                        'food2_id': food2_id,
+                        'co_occurrence_count': count,
+                        'total_occurrences_food1': n1,
+                        'total_occurrences_food2': food_counts[food2_id],
+                        'confidence': count / n1,
+                        'support': count * inv_meals,
+                        'created_at': now,
+                        'updated_at': now,
+                    }
+
+        self._insert_batched(FoodAssociation.__table__, association_rows())
+        CatalogVersion.bump(session, 'food_associations')
+        return stats
+
+    def _insert_batched(self, table, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.REBUILD_BATCH_SIZE:
+                self.db.session.execute(insert(table), batch)
+                batch = []
+        if batch:
+            self.db.session.execute(insert(table), batch)
+
+    def ensure_backfilled(self):
+        """Rebuild the counters if they are empty but diary entries exist."""
+        has_counts = self.db.session.query(MealCount.meal_type).first() is not None
+        has_entries = self.db.session.query(DiaryEntry.id).first() is not None
+
+        if has_entries and not has_counts:
+            stats = self.rebuild()
+            self.db.session.commit()
+            return stats['pairs']
+
+        return 0
+
+    # Reads
+
+    def get_recommendations(self, food_id, meal_type, limit=5, min_confidence=0.1):
+        """Get the foods most often eaten together with a food in a meal type"""
+        food_recommendation_index.refresh_if_stale()
+        return food_recommendation_index.recommend(food_id, meal_type, limit, min_confidence)
+
+    def get_popular_combinations(self, meal_type, limit=10):
         """Get most popular food combinations for a meal type"""
-        associations = self.db.query(FoodAssociation).filter(
+        associations = self.db.session.query(FoodAssociation).filter(
             FoodAssociation.meal_type == meal_type,
             FoodAssociation.co_occurrence_count >= 2  # At least 2 occurrences
         ).order_by(desc(FoodAssociation.co_occurrence_count)).limit(limit).all()
-        
+
         combinations = []
         for assoc in associations:
             combinations.append({
@@ -113,22 +494,22 @@ class FoodAssociationService:
                 'confidence': assoc.confidence,
                 'support': assoc.support
             })
-        
+
         return combinations
-    
-    def get_meal_insights(self, meal_type: str) -> Dict:
+
+    def get_meal_insights(self, meal_type):
         """Get insights about food patterns in a meal type"""
-        total_associations = self.db.query(FoodAssociation).filter(
+        total_associations = self.db.session.query(FoodAssociation).filter(
             FoodAssociation.meal_type == meal_type
         ).count()
-        
-        high_confidence = self.db.query(FoodAssociation).filter(
+
+        high_confidence = self.db.session.query(FoodAssociation).filter(
             FoodAssociation.meal_type == meal_type,
             FoodAssociation.confidence > 0.5
         ).count()
-        
+
         most_popular = self.get_popular_combinations(meal_type, 1)
-        
+
         return {
             'total_associations': total_associations,
             'high_confidence_pairs': high_confidence,
@@ -0,0 +1,179 @@
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from db.models.food_association import FoodAssociation
+from db.models.food_occurrence import FoodOccurrence
+from db.models.meal_count import MealCount
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+
+class FoodRecommendationIndex:
+    """In-memory co-occurrence index for meal recommendations.
+
+    Holds the sparse counters kept by FoodAssociationService: per meal type,
+    a neighbour map {food_id: {other_id: co_occurrences}}, the number of
+    meals containing each food and the number of meals. For one food,
+    confidence (co / meals with the food) orders neighbours the same way
+    as the raw count, so the top-k neighbours by count are cached per
+    (meal type, food). They are recomputed lazily when one of the food's
+    pairs changes.
+
+    Writes in this process are applied with apply() after commit. Changes
+    made by other processes are picked up by a periodic reload when the
+    'food_associations' catalog version has changed.
+    """
+
+    TOP_K = 20
+
+    def __init__(self, refresh_seconds=None):
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv('RECOMMENDATION_REFRESH_SECONDS', 300))
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._pairs = {}
+        self._occurrences = {}
+        self._meals = {}
+        self._top = {}
+        self._version = None
+        self._checked_at = 0.0
+        self.loaded = False
+
+    # Building
+
+    def build(self, pairs, occurrences, meals):
+        """Build the index from counter rows.
+
+        pairs are (meal_type, food1_id, food2_id, count), occurrences are
+        (meal_type, food_id, count) and meals are (meal_type, count).
+        """
+        neighbours = defaultdict(lambda: defaultdict(dict))
+        for meal_type, food1_id, food2_id, count in pairs:
+            by_food = neighbours[meal_type]
+            by_food[food1_id][food2_id] = count
+            by_food[food2_id][food1_id] = count
+
+        food_counts = defaultdict(dict)
+        for meal_type, food_id, count in occurrences:
+            food_counts[meal_type][food_id] = count
+
+        with self._lock:
+            self._pairs = {meal_type: dict(by_food) for meal_type, by_food in neighbours.items()}
+            self._occurrences = dict(food_counts)
+            self._meals = dict(meals)
+            self._top = {}
+            self.loaded = True
+
+    def load_from_db(self):
+        """Build the index from the counter tables."""
+        session = db.session
+        version = CatalogVersion.get(session, 'food_associations')
+        pairs = session.query(
+            FoodAssociation.meal_type, FoodAssociation.food1_id,
+            FoodAssociation.food2_id, FoodAssociation.co_occurrence_count
+        ).yield_per(10000)
+        occurrences = session.query(
+            FoodOccurrence.meal_type, FoodOccurrence.food_id, FoodOccurrence.meal_count
+        ).yield_per(10000)
+        meals = session.query(MealCount.meal_type, MealCount.meal_count).all()
+
+        self.build(pairs, occurrences, meals)
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        """Reload if the counters changed in another process since the last check."""
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+
+        version = CatalogVersion.get(db.session, 'food_associations')
+        if not self.loaded or version != self._version:
+            self.load_from_db()
+
+    # Incremental updates
+
+    def apply(self, changes):
+        """Apply changes returned by FoodAssociationService after commit."""
+        if not self.loaded or not changes:
+            return
+
+        with self._lock:
+            for meal_type, food_id, others, sign, meal_delta, _ in changes:
+                if meal_delta:
+                    self._add(self._meals, meal_type, meal_delta)
+
+                self._add(self._occurrences.setdefault(meal_type, {}), food_id, sign)
+
+                by_food = self._pairs.setdefault(meal_type, {})
+                for other_id in others:
+                    for a, b in ((food_id, other_id), (other_id, food_id)):
+                        neighbours = by_food.setdefault(a, {})
+                        self._add(neighbours, b, sign)
+                        if not neighbours:
+                            del by_food[a]
+                        self._top.pop((meal_type, a), None)
+
+    @staticmethod
+    def _add(counts, key, delta):
+        # Counters that reach zero are removed to keep the maps sparse
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+    # Lookup
+
+    def _top_neighbours(self, meal_type, food_id):
+        key = (meal_type, food_id)
+        top = self._top.get(key)
+        if top is None:
+            neighbours = self._pairs.get(meal_type, {}).get(food_id, {})
+            top = tuple(heapq.nlargest(self.TOP_K, neighbours.items(), key=lambda item: (item[1], -item[0])))
+            self._top[key] = top
+        return top
+
+    def recommend(self, food_id, meal_type, limit=5, min_confidence=0.0):
+        """Return foods most often eaten with food_id in meal_type."""
+        with self._lock:
+            food_meals = self._occurrences.get(meal_type, {}).get(food_id, 0)
+            meals = self._meals.get(meal_type, 0)
+            if not food_meals or not meals:
+                return []
+
+            if limit > self.TOP_K:
+                neighbours = self._pairs.get(meal_type, {}).get(food_id, {})
+                top = heapq.nlargest(limit, neighbours.items(), key=lambda item: (item[1], -item[0]))
+            else:
+                top = self._top_neighbours(meal_type, food_id)
+
+        recommendations = []
+        for other_id, count in top:
+            confidence = count / food_meals
+            if confidence < min_confidence:
+                # Neighbours are sorted by count, so the rest are lower too
+                break
+            recommendations.append({
+                'food_id': other_id,
+                'confidence': confidence,
+                'support': count / meals,
+                'co_occurrence_count': count
+            })
+            if len(recommendations) >= limit:
+                break
+        return recommendations
+
+    def stats(self):
+        return {
+            'meal_types': len(self._meals),
+            'foods': sum(len(by_food) for by_food in self._occurrences.values()),
+            'pairs': sum(len(n) for by_food in self._pairs.values() for n in by_food.values()) // 2,
+            'cached_top_lists': len(self._top)
+        }
+
+# Shared per-process index
+food_recommendation_index = FoodRecommendationIndex()
@@ -0,0 +1,270 @@
+import math
+import re
+import time
+import unicodedata
+from sqlalchemy import text
+from db.models.food import Food
+from db.database import db
+from services.food_usage_counter import food_usage_counter
+
+def _strip_accents(value):
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', value)
+        if not unicodedata.combining(c)
+    )
+
+def fold_variants(value):
+    """Lowercase and fold Danish letters and accents.
+
+    Returns the ae/oe/aa spelling and, if different, the a/o/a spelling, so
+    "smør" can be found by typing "smør", "smoer" or "smor".
+    """
+    value = (value or '').lower()
+    primary = _strip_accents(value.replace('æ', 'ae').replace('ø', 'oe').replace('å', 'aa'))
+    secondary = _strip_accents(value.replace('æ', 'a').replace('ø', 'o').replace('å', 'a'))
+
+    if secondary != primary:
+        return [primary, secondary]
+    return [primary]
+
+def fold_text(value):
+    """Fold a value for indexing, including both spellings of æ/ø/å."""
+    return ' '.join(fold_variants(value))
+
+def query_tokens(query):
+    """Split a search query into folded alphanumeric tokens."""
+    value = (query or '').lower()
+    value = _strip_accents(value.replace('æ', 'ae').replace('ø', 'oe').replace('å', 'aa'))
+    return re.findall(r'\w+', value)
+
+class FoodSearchService:
+    """Full-text search over food name, brand and category.
+
+    Uses an FTS5 table on SQLite and a tsvector/trigram indexed table on
+    Postgres. Other databases fall back to a LIKE scan on Food.name.
+    Index writes do not commit; callers commit with the food change.
+    """
+
+    # Candidates fetched from the index before usage re-ranking
+    CANDIDATE_MULTIPLIER = 5
+    MAX_CANDIDATES = 200
+
+    # Above this many matches, SQLite candidates are picked by usage only
+    RANKED_MATCH_LIMIT = 2000
+
+    REBUILD_CHUNK_SIZE = 5000
+
+    # Weights for blending text relevance with usage
+    USAGE_WEIGHT = 0.5
+    RECENCY_WEIGHT = 1.0
+    RECENCY_HALF_LIFE_DAYS = 30
+
+    def __init__(self):
+        self.db = db
+
+    def _dialect(self):
+        return self.db.engine.dialect.name
+
+    # Index maintenance
+
+    def ensure_index(self):
+        """Create the search index if needed and rebuild it when out of sync."""
+        dialect = self._dialect()
+        session = self.db.session
+
+        if dialect == 'sqlite':
+            session.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5("
+                "name, brand, category, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ))
+            session.execute(text("CREATE INDEX IF NOT EXISTS idx_foods_used ON foods (used)"))
+            indexed = session.execute(text("SELECT COUNT(*) FROM foods_fts")).scalar()
+        elif dialect == 'postgresql':
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            session.execute(text(
+                "CREATE TABLE IF NOT EXISTS food_search_index ("
+                "food_id INTEGER PRIMARY KEY REFERENCES foods(id) ON DELETE CASCADE, "
+                "name TEXT NOT NULL, brand TEXT NOT NULL, category TEXT NOT NULL)"
+            ))
+            session.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_food_search_document "
+                f"ON food_search_index USING GIN (({self._pg_document()}))"
+            ))
+            session.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_food_search_name_trgm "
+                "ON food_search_index USING GIN (name gin_trgm_ops)"
+            ))
+            indexed = session.execute(text("SELECT COUNT(*) FROM food_search_index")).scalar()
+        else:
+            return 0
+
+        if indexed != Food.query.count():
+            count = self.rebuild_index()
+            session.commit()
+            return count
+
+        session.commit()
+        return 0
+
+    @staticmethod
+    def _pg_document():
+        return (
+            "setweight(to_tsvector('simple', name), 'A') || "
+            "setweight(to_tsvector('simple', brand), 'B') || "
+            "setweight(to_tsvector('simple', category), 'C')"
+        )
+
+    def _index_values(self, food):
+        return {
+            'food_id': food.id,
+            'name': fold_text(food.name),
+            'brand': fold_text(food.brand),
+            'category': fold_text(food.category)
+        }
+
+    def index_food(self, food):
+        """Insert or replace a food in the search index."""
+        dialect = self._dialect()
+        values = self._index_values(food)
+
+        if dialect == 'sqlite':
+            self.db.session.execute(text("DELETE FROM foods_fts WHERE rowid = :food_id"), values)
+            self.db.session.execute(text(
+                "INSERT INTO foods_fts (rowid, name, brand, category) "
+                "VALUES (:food_id, :name, :brand, :category)"
+            ), values)
+        elif dialect == 'postgresql':
+            self.db.session.execute(text(
+                "INSERT INTO food_search_index (food_id, name, brand, category) "
+                "VALUES (:food_id, :name, :brand, :category) "
+                "ON CONFLICT (food_id) DO UPDATE SET "
+                "name = EXCLUDED.name, brand = EXCLUDED.brand, category = EXCLUDED.category"
+            ), values)
+
+    def remove_food(self, food_id):
+        """Remove a food from the search index."""
+        dialect = self._dialect()
+        if dialect == 'sqlite':
+            self.db.session.execute(text("DELETE FROM foods_fts WHERE rowid = :food_id"), {'food_id': food_id})
+        elif dialect == 'postgresql':
+            self.db.session.execute(text("DELETE FROM food_search_index WHERE food_id = :food_id"), {'food_id': food_id})
+
+    def rebuild_index(self):
+        """Rebuild the search index from the foods table."""
+        dialect = self._dialect()
+        if dialect == 'sqlite':
+            table = 'foods_fts'
+            insert_sql = (
+                "INSERT INTO foods_fts (rowid, name, brand, category) "
+                "VALUES (:food_id, :name, :brand, :category)"
+            )
+        elif dialect == 'postgresql':
+            table = 'food_search_index'
+            insert_sql = (
+                "INSERT INTO food_search_index (food_id, name, brand, category) "
+                "VALUES (:food_id, :name, :brand, :category)"
+            )
+        else:
+            return 0
+
+        self.db.session.execute(text(f"DELETE FROM {table}"))
+
+        # Stream foods in chunks so large catalogs rebuild in bounded memory
+        count = 0
+        last_id = 0
+        while True:
+            rows = self.db.session.query(
+                Food.id, Food.name, Food.brand, Food.category
+            ).filter(Food.id > last_id).order_by(Food.id).limit(self.REBUILD_CHUNK_SIZE).all()
+            if not rows:
+                break
+            self.db.session.execute(text(insert_sql), [self._index_values(row) for row in rows])
+            count += len(rows)
+            last_id = rows[-1].id
+
+        return count
+
+    # Search
+
+    def _candidates_sqlite(self, tokens, limit):
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        match_count = self.db.session.execute(text(
+            "SELECT COUNT(*) FROM foods_fts WHERE foods_fts MATCH :match"
+        ), {'match': match}).scalar()
+
+        if match_count > self.RANKED_MATCH_LIMIT:
+            # Broad prefix: scoring every match with bm25 is too slow, and
+            # usage is what distinguishes the results anyway. Walk the
+            # usage index and keep the first rows that match.
+            rows = self.db.session.execute(text(
+                "SELECT id AS rowid, 0.0 AS rank FROM foods INDEXED BY idx_foods_used "
+                "WHERE id IN (SELECT rowid FROM foods_fts WHERE foods_fts MATCH :match) "
+                "ORDER BY used DESC LIMIT :limit"
+            ), {'match': match, 'limit': limit}).all()
+        else:
+            rows = self.db.session.execute(text(
+                "SELECT rowid, bm25(foods_fts, 10.0, 3.0, 1.0) AS rank "
+                "FROM foods_fts WHERE foods_fts MATCH :match "
+                "ORDER BY rank LIMIT :limit"
+            ), {'match': match, 'limit': limit}).all()
+
+        # bm25 is lower-is-better; flip it so higher is more relevant
+        return {row.rowid: -row.rank for row in rows}
+
+    def _candidates_postgresql(self, tokens, raw_query, limit):
+        document = self._pg_document()
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        rows = self.db.session.execute(text(
+            f"SELECT food_id, ts_rank({document}, to_tsquery('simple', :tsquery)) "
+            "+ similarity(name, :raw) AS rank "
+            "FROM food_search_index "
+            f"WHERE ({document}) @@ to_tsquery('simple', :tsquery) OR name % :raw "
+            "ORDER BY rank DESC LIMIT :limit"
+        ), {'tsquery': tsquery, 'raw': raw_query, 'limit': limit}).all()
+
+        return {row.food_id: row.rank for row in rows}
+
+    def _candidates_like(self, query, limit):
+        rows = self.db.session.query(Food.id).filter(
+            Food.name.ilike(f'%{query}%')
+        ).limit(limit).all()
+        return {row.id: 1.0 for row in rows}
+
+    def search(self, query, limit=20):
+        """Search foods and rank by relevance blended with usage."""
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+
+        candidate_limit = min(limit * self.CANDIDATE_MULTIPLIER, self.MAX_CANDIDATES)
+        dialect = self._dialect()
+        if dialect == 'sqlite':
+            relevance = self._candidates_sqlite(tokens, candidate_limit)
+        elif dialect == 'postgresql':
+            relevance = self._candidates_postgresql(tokens, ' '.join(tokens), candidate_limit)
+        else:
+            relevance = self._candidates_like(query, candidate_limit)
+
+        if not relevance:
+            return []
+
+        # Rank with usage counters at most one flush interval old
+        food_usage_counter.flush_if_due()
+        foods = Food.query.filter(Food.id.in_(list(relevance))).all()
+
+        now = time.time()
+        def score(food):
+            usage = math.log1p(food.used or 0)
+            recency = 0.0
+            if food.last_used:
+                days = max(0.0, (now - food.last_used) / 86400.0)
+                recency = 0.5 ** (days / self.RECENCY_HALF_LIFE_DAYS)
+            return (
+                relevance[food.id]
+                + self.USAGE_WEIGHT * usage
+                + self.RECENCY_WEIGHT * recency
+            )
+
+        foods.sort(key=score, reverse=True)
+        return foods[:limit]
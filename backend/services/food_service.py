@@ -1,14 +1,49 @@
+from sqlalchemy.exc import IntegrityError
 from db.models.food import Food
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.recipe import Recipe
+from db.models.recipe_component import RecipeComponent
+from db.models.catalog_version import CatalogVersion
 from db.database import db
+from services.nutrition_rollup_service import NutritionRollupService
+from services.food_search_service import FoodSearchService
+from services.food_suggest_index import food_suggest_index
+from services.recipe_service import RecipeService
 
 class FoodService:
     def __init__(self):
         self.db = db
+        self.nutrition_rollup_service = NutritionRollupService()
+        self.food_search_service = FoodSearchService()
+        self.recipe_service = RecipeService()
     
     def get_all_foods(self):
         """Return all foods from database."""
         return Food.query.all()
     
+    def get_foods_page(self, fields, after_id=None, limit=None):
+        """Return foods ordered by id, loading only the requested columns."""
+        query = self.db.session.query(*[getattr(Food, field) for field in fields])
+        if after_id is not None:
+            query = query.filter(Food.id > after_id)
+        query = query.order_by(Food.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def search_foods(self, query, limit=20):
+        """Full-text search on name, brand and category."""
+        return self.food_search_service.search(query, limit)
+    
+    def suggest_foods(self, prefix, limit=10):
+        """Autocomplete food names from the in-memory suggest index."""
+        food_suggest_index.refresh_if_stale()
+        return food_suggest_index.suggest(prefix, limit)
+    
+    def get_catalog_version(self):
+        """Return the foods catalog version, bumped on every food change."""
+        return CatalogVersion.get(self.db.session, 'foods')
+    
     def get_food_by_id(self, food_id):
         """Return a single food by ID."""
         return Food.query.get(food_id)
@@ -43,7 +78,11 @@ class FoodService:
         )
         
         self.db.session.add(food)
+        self.db.session.flush()
+        self.food_search_service.index_food(food)
+        CatalogVersion.bump(self.db.session, 'foods')
         self.db.session.commit()
+        food_suggest_index.update_food(food)
         return food
     
     def update_food(self, food_id, data):
@@ -98,15 +137,44 @@ class FoodService:
         if 'used' in data:
             food.used = data['used']
         
+        # Nutrient changes affect the recipes that use the food and every
+        # day the food or one of those recipes has been logged
+        if any(field in data for field in Food.NUTRIENT_FIELDS):
+            self.recipe_service.refresh_dependents(food_id, include_food=True)
+        
+        self.food_search_service.index_food(food)
+        CatalogVersion.bump(self.db.session, 'foods')
         self.db.session.commit()
+        food_suggest_index.update_food(food)
         return food
     
     def delete_food(self, food_id):
-        """Delete a food entry."""
+        """Delete a food entry.
+        
+        Raises ValueError if the diary still logs the food (its entries
+        and the daily totals built from them need the food's values), a
+        recipe uses it or it holds a recipe's nutrition, or another row
+        still references it.
+        """
         food = Food.query.get(food_id)
         if not food:
             return False
         
-        self.db.session.delete(food)
-        self.db.session.commit()
+        if self.db.session.query(DiaryEntry.id).filter(DiaryEntry.food_id == food_id).first() is not None:
+            raise ValueError('Food is logged in the diary and cannot be deleted')
+        if self.db.session.query(RecipeComponent.id).filter(RecipeComponent.food_id == food_id).first() is not None:
+            raise ValueError('Food is used in a recipe and cannot be deleted')
+        if self.db.session.query(Recipe.id).filter(Recipe.food_id == food_id).first() is not None:
+            raise ValueError('Food belongs to a recipe; delete the recipe instead')
+        
+        try:
+            self.db.session.delete(food)
+            self.food_search_service.remove_food(food_id)
+            CatalogVersion.bump(self.db.session, 'foods')
+            self.db.session.commit()
+        except IntegrityError:
+            # With foreign keys enforced, e.g. an entry logged meanwhile
+            self.db.session.rollback()
+            raise ValueError('Food is still referenced by other data and cannot be deleted')
+        food_suggest_index.remove_food(food_id)
         return True
@@ -0,0 +1,294 @@
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from db.models.food import Food
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+from services.food_search_service import fold_variants, query_tokens
+
+def _index_terms(name, brand):
+    """Return the searchable terms for a food.
+
+    Every word boundary in the folded name and brand starts a term, so
+    "rugbrød med kerner" can be found by typing "med ke".
+    """
+    terms = set()
+    for value in (name, brand):
+        for variant in fold_variants(value):
+            words = re.findall(r'\w+', variant)
+            for i in range(len(words)):
+                terms.add(' '.join(words[i:]))
+    return terms
+
+class FoodSuggestIndex:
+    """In-memory prefix index for food name autocomplete.
+
+    Terms are kept in one sorted list of (term, food_id) tuples. For every
+    prefix that matches more than SCAN_LIMIT terms, the top-k food ids by
+    Food.used are precomputed; other prefixes scan their small range of the
+    list.
+
+    The index holds the most used foods that fit in the memory budget.
+    Writes through FoodService update it incrementally; changes made by other
+    processes are picked up by a periodic rebuild when the catalog version
+    has changed. That rebuild runs in a background thread and swaps the new
+    index in when done; requests keep reading the old one meanwhile. Only
+    the very first load blocks the request that triggers it.
+    """
+
+    TOP_K = 10
+
+    # Prefixes matching more terms than this get a precomputed top-k list
+    SCAN_LIMIT = 500
+
+    # Share of the memory budget reserved for the precomputed prefix table
+    PREFIX_TABLE_SHARE = 0.3
+
+    def __init__(self, memory_budget_mb=None, refresh_seconds=None):
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv('SUGGEST_MEMORY_BUDGET_MB', 128))
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv('SUGGEST_REFRESH_SECONDS', 300))
+
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._terms = []
+        self._foods = {}
+        self._top = {}
+        self._food_bytes = 0
+        self._version = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+        self.loaded = False
+        self.truncated = False
+
+    # Building
+
+    def _food_size(self, name, brand, terms):
+        # Rough CPython overhead: dict slot and value tuple per food, list
+        # slot, (term, id) tuple and int per term
+        size = sys.getsizeof(name) + sys.getsizeof(brand) + 200
+        for term in terms:
+            size += sys.getsizeof(term) + 100
+        return size
+
+    def build(self, rows):
+        """Build the index from (id, name, brand, used) rows."""
+        rows = sorted(rows, key=lambda row: row[3] or 0, reverse=True)
+        food_budget = self.memory_budget * (1 - self.PREFIX_TABLE_SHARE)
+
+        terms = []
+        foods = {}
+        food_bytes = 0
+        truncated = False
+        for food_id, name, brand, used in rows:
+            food_terms = _index_terms(name, brand)
+            size = self._food_size(name, brand, food_terms)
+            if food_bytes + size > food_budget:
+                truncated = True
+                break
+            food_bytes += size
+            foods[food_id] = (name, brand, used or 0)
+            terms.extend((term, food_id) for term in food_terms)
+        terms.sort()
+
+        top = self._build_prefix_table(terms, foods)
+
+        with self._lock:
+            self._terms = terms
+            self._foods = foods
+            self._top = top
+            self._food_bytes = food_bytes
+            self.truncated = truncated
+            self.loaded = True
+
+    def _build_prefix_table(self, terms, foods):
+        """Precompute top-k food ids for every prefix matching many terms."""
+        table_budget = self.memory_budget * self.PREFIX_TABLE_SHARE
+        top = {}
+        size = 0
+
+        # Breadth first, so the shortest (most expensive) prefixes are kept
+        # if the budget runs out
+        ranges = [(0, len(terms), 1)]
+        while ranges:
+            next_ranges = []
+            for start, end, depth in ranges:
+                i = start
+                while i < end:
+                    prefix = terms[i][0][:depth]
+                    j = bisect_left(terms, (prefix + '\uffff',), i, end)
+                    if j - i > self.SCAN_LIMIT and prefix not in top:
+                        entry = tuple(heapq.nlargest(
+                            self.TOP_K,
+                            {food_id for _, food_id in terms[i:j]},
+                            key=lambda food_id: foods[food_id][2]
+                        ))
+                        size += sys.getsizeof(prefix) + sys.getsizeof(entry) + 100
+                        if size > table_budget:
+                            return top
+                        top[prefix] = entry
+                        next_ranges.append((i, j, depth + 1))
+                    i = j
+            ranges = next_ranges
+        return top
+
+    def load_from_db(self):
+        """Build the index from the foods table."""
+        version = CatalogVersion.get(db.session, 'foods')
+        rows = db.session.query(Food.id, Food.name, Food.brand, Food.used).all()
+        self.build(rows)
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        """Rebuild if the catalog changed in another process since the last check.
+
+        Once loaded, the rebuild runs in a background thread so the request
+        that notices the change doesn't wait for it.
+        """
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+
+        if not self.loaded:
+            self.load_from_db()
+            return
+
+        version = CatalogVersion.get(db.session, 'foods')
+        if version == self._version:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(
+            target=self._rebuild, args=(current_app._get_current_object(),), daemon=True
+        ).start()
+
+    def _rebuild(self, app):
+        try:
+            with app.app_context():
+                self.load_from_db()
+        except Exception as e:
+            print(f"Food suggest index rebuild failed: {e}")
+        finally:
+            self._rebuilding = False
+
+    # Incremental updates
+
+    def _recompute_prefixes(self, prefixes):
+        for prefix in prefixes:
+            if prefix not in self._top:
+                continue
+            start = bisect_left(self._terms, (prefix,))
+            end = bisect_left(self._terms, (prefix + '\uffff',))
+            food_ids = {food_id for _, food_id in self._terms[start:end]}
+            self._top[prefix] = tuple(
+                heapq.nlargest(self.TOP_K, food_ids, key=lambda i: self._foods[i][2])
+            )
+
+    def _prefixes(self, terms):
+        """Return the precomputed prefixes affected by a set of terms."""
+        prefixes = set()
+        for term in terms:
+            for length in range(1, len(term) + 1):
+                if term[:length] in self._top:
+                    prefixes.add(term[:length])
+        return prefixes
+
+    def remove_food(self, food_id):
+        """Remove a food from the index."""
+        with self._lock:
+            food = self._foods.pop(food_id, None)
+            if not food:
+                return
+            name, brand, _ = food
+            terms = _index_terms(name, brand)
+            for term in terms:
+                i = bisect_left(self._terms, (term, food_id))
+                if i < len(self._terms) and self._terms[i] == (term, food_id):
+                    del self._terms[i]
+            self._food_bytes -= self._food_size(name, brand, terms)
+            self._recompute_prefixes(self._prefixes(terms))
+
+    def add_food(self, food_id, name, brand, used):
+        """Add or replace a food in the index."""
+        self.remove_food(food_id)
+
+        with self._lock:
+            terms = _index_terms(name, brand)
+            size = self._food_size(name, brand, terms)
+            if self._food_bytes + size > self.memory_budget * (1 - self.PREFIX_TABLE_SHARE):
+                self.truncated = True
+                return
+
+            self._foods[food_id] = (name, brand, used or 0)
+            self._food_bytes += size
+            for term in terms:
+                insort(self._terms, (term, food_id))
+
+            # Merge the food into the precomputed lists it now qualifies for
+            for prefix in self._prefixes(terms):
+                current = self._top.get(prefix)
+                if current is None:
+                    continue
+                merged = set(current)
+                merged.add(food_id)
+                self._top[prefix] = tuple(
+                    heapq.nlargest(self.TOP_K, merged, key=lambda i: self._foods[i][2])
+                )
+
+    def update_food(self, food):
+        """Sync a Food model instance into the index."""
+        if self.loaded:
+            self.add_food(food.id, food.name, food.brand, food.used)
+
+    # Lookup
+
+    def suggest(self, prefix, limit=TOP_K):
+        """Return up to `limit` (id, name, brand, used) tuples for a prefix."""
+        key = ' '.join(query_tokens(prefix))
+        if not key:
+            return []
+
+        foods = self._foods
+        if limit <= self.TOP_K and key in self._top:
+            food_ids = self._top[key][:limit]
+        else:
+            terms = self._terms
+            start = bisect_left(terms, (key,))
+            end = bisect_left(terms, (key + '\uffff',))
+            food_ids = heapq.nlargest(
+                limit,
+                {food_id for _, food_id in terms[start:end]},
+                key=lambda i: foods[i][2] if i in foods else -1
+            )
+
+        result = []
+        for food_id in food_ids:
+            food = foods.get(food_id)
+            if food:
+                result.append((food_id, food[0], food[1], food[2]))
+        return result
+
+    def stats(self):
+        return {
+            'foods': len(self._foods),
+            'terms': len(self._terms),
+            'precomputed_prefixes': len(self._top),
+            'estimated_bytes': self._food_bytes,
+            'memory_budget_bytes': self.memory_budget,
+            'truncated': self.truncated
+        }
+
+# Shared per-process index
+food_suggest_index = FoodSuggestIndex()
@@ -0,0 +1,171 @@
+import atexit
+import os
+import threading
+import time
+from sqlalchemy import bindparam, case, event, func
+from sqlalchemy.orm import Session
+from db.models.food import Food
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+from services.sync_service import SyncService
+
+class FoodUsageCounter:
+    """Write-behind counters for Food.used and Food.last_used.
+
+    Diary writes call add(session, food_id) instead of updating the food
+    row. The increment is held on the session until it commits (dropped on
+    rollback) and then moved into a per-process buffer. flush() writes the
+    buffer as one executemany of atomic `used = used + n` updates, so
+    concurrent writers never read-modify-write the shared foods row and no
+    increment is lost.
+
+    The buffer is flushed when flush_if_due() is called and it is older
+    than flush_seconds or holds more than max_pending foods, by a timer
+    flush_seconds after the first buffered increment, and at process exit.
+    Readers call flush_if_due() first, so usage data in the database is at
+    most flush_seconds behind. Increments still buffered when a process is
+    killed are lost; the counters are ranking hints, not diary data.
+    """
+
+    SESSION_KEY = 'food_usage'
+
+    def __init__(self, flush_seconds=None, max_pending=None):
+        if flush_seconds is None:
+            flush_seconds = float(os.getenv('USAGE_FLUSH_SECONDS', 5))
+        if max_pending is None:
+            max_pending = int(os.getenv('USAGE_MAX_PENDING', 1000))
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._since = None
+        self._timer = None
+        self._app = None
+        self.flushes = 0
+
+    def init_app(self, app):
+        """Flush from a timer and at exit within this app's context."""
+        self._app = app
+        atexit.register(self._flush_in_app)
+
+    # Recording
+
+    def add(self, session, food_id, count=1, timestamp=None):
+        """Count uses of a food once the session commits."""
+        timestamp = timestamp or int(time.time())
+        uses = session.info.setdefault(self.SESSION_KEY, {})
+        previous_count, previous_timestamp = uses.get(food_id, (0, 0))
+        uses[food_id] = (previous_count + count, max(previous_timestamp, timestamp))
+
+    def record(self, uses):
+        """Buffer {food_id: (count, last_used)} for the next flush."""
+        if not uses:
+            return
+        with self._lock:
+            for food_id, (count, timestamp) in uses.items():
+                previous_count, previous_timestamp = self._pending.get(food_id, (0, 0))
+                self._pending[food_id] = (previous_count + count, max(previous_timestamp, timestamp))
+            if self._since is None:
+                self._since = time.monotonic()
+            self._schedule()
+
+    def pending(self):
+        """Return a copy of the buffered {food_id: (count, last_used)}."""
+        with self._lock:
+            return dict(self._pending)
+
+    # Flushing
+
+    def _schedule(self):
+        """Arm a one-shot timer for the buffer. Caller holds the lock."""
+        if self._app is None or self._timer is not None or self.flush_seconds <= 0:
+            return
+        self._timer = threading.Timer(self.flush_seconds, self._flush_in_app)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_app(self):
+        with self._lock:
+            self._timer = None
+        if self._app is not None and self._pending:
+            with self._app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    # The increments are back in the buffer for the next flush
+                    print(f"Food usage flush failed: {e}")
+
+    def flush_if_due(self):
+        """Flush if the buffer is old or large enough. Call with no pending session changes.
+
+        Never raises: callers run it after their own commit, and a failed
+        flush must not turn that request into an error. The increments
+        stay buffered for the next flush.
+        """
+        with self._lock:
+            due = self._pending and (
+                time.monotonic() - self._since >= self.flush_seconds
+                or len(self._pending) >= self.max_pending
+            )
+        if due:
+            try:
+                return self.flush()
+            except Exception as e:
+                print(f"Food usage flush failed: {e}")
+        return 0
+
+    def flush(self):
+        """Write the buffered increments and commit. Returns the number of foods updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._since = None
+        if not pending:
+            return 0
+
+        table = Food.__table__
+        used_at = bindparam('used_at')
+        try:
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('k_id')).values(
+                    used=func.coalesce(table.c.used, 0) + bindparam('uses'),
+                    last_used=case(
+                        (func.coalesce(table.c.last_used, 0) < used_at, used_at),
+                        else_=table.c.last_used
+                    ),
+                    sync_version=SyncService.version(db.session, Food)
+                ),
+                [
+                    {'k_id': food_id, 'uses': count, 'used_at': timestamp}
+                    for food_id, (count, timestamp) in pending.items()
+                ]
+            )
+            CatalogVersion.bump(db.session, 'foods')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.record(pending)
+            raise
+
+        self.flushes += 1
+        return len(pending)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_foods': len(self._pending),
+                'pending_uses': sum(count for count, _ in self._pending.values()),
+                'flushes': self.flushes
+            }
+
+# Shared per-process counter
+food_usage_counter = FoodUsageCounter()
+
+@event.listens_for(Session, 'after_commit')
+def _buffer_committed_usage(session):
+    food_usage_counter.record(session.info.pop(FoodUsageCounter.SESSION_KEY, None))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_rolled_back_usage(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(FoodUsageCounter.SESSION_KEY, None)
@@ -11,8 +11,9 @@ class GoalsService:
     
     def set_goals(self, data):
         """Create or overwrite goals."""
-        # Delete ALL existing goals first
-        UserGoals.query.delete()
+        # Delete ALL existing goals first (one by one, so delta sync sees the deletions)
+        for old_goals in UserGoals.query.all():
+            self.db.session.delete(old_goals)
         self.db.session.commit()
         
         # Create new goals
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, make_response
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from db.models.idempotency_key import IdempotencyKey
+from db.database import db
+
+class IdempotencyKeyInProgress(Exception):
+    """A key's first request has not finished (or died before storing its response)."""
+
+class IdempotencyStore:
+    """Idempotency-Key handling for mutations that clients may retry.
+
+    A POST sent with an Idempotency-Key header is applied once. The key is
+    inserted in the same transaction as the mutation (a before_commit
+    listener adds it), so the mutation and its key commit or roll back
+    together and a crash can never apply a request without recording its
+    key. The response is stored on the key right after, and a repeated
+    request gets that response back with Idempotent-Replayed: true after a
+    single primary key lookup, without touching the handler.
+
+    A request that repeats a key whose first attempt is still running (or
+    died between commit and storing the response) fails the key insert;
+    it gets 409 instead of a second copy of the mutation.
+
+    Keys are kept for IDEMPOTENCY_TTL_HOURS (default a week, long enough
+    for an offline queue) and evicted at startup and at most every
+    EVICT_SECONDS afterwards.
+    """
+
+    HEADER = 'Idempotency-Key'
+    REPLAYED_HEADER = 'Idempotent-Replayed'
+    MAX_KEY_LENGTH = 255
+    EVICT_SECONDS = 3600
+
+    SESSION_KEY = 'idempotency_key'
+
+    def __init__(self, ttl_hours=None):
+        if ttl_hours is None:
+            ttl_hours = float(os.getenv('IDEMPOTENCY_TTL_HOURS', 168))
+        self.ttl_hours = ttl_hours
+        self._lock = threading.Lock()
+        self._evicted_at = None
+
+    # Keys
+
+    @classmethod
+    def validate_key(cls, key):
+        """Raise ValueError unless key is a usable Idempotency-Key."""
+        if not isinstance(key, str) or not key or len(key) > cls.MAX_KEY_LENGTH:
+            raise ValueError(f'Idempotency key must be a string of 1 to {cls.MAX_KEY_LENGTH} characters')
+
+    def get(self, keys):
+        """Return {key: IdempotencyKey} for the given keys that were already used."""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        rows = IdempotencyKey.query.filter(IdempotencyKey.key.in_(keys)).all()
+        return {row.key: row for row in rows}
+
+    def reserve(self, session, key, endpoint, status_code=None, response=None):
+        """Record a key as used in the caller's transaction. Does not commit."""
+        session.add(IdempotencyKey(
+            key=key, endpoint=endpoint, status_code=status_code,
+            response=None if response is None else json.dumps(response)
+        ))
+
+    def store_response(self, key, status_code, response):
+        """Store the response for a key reserved by a committed request and commit."""
+        db.session.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(
+            status_code=status_code, response=json.dumps(response)
+        ))
+        db.session.commit()
+
+    @staticmethod
+    def stored_response(row):
+        """Return the stored JSON response of a key (None while it is pending)."""
+        return None if row.response is None else json.loads(row.response)
+
+    # Eviction
+
+    def evict(self):
+        """Delete keys older than ttl_hours and commit. Returns the number deleted."""
+        cutoff = datetime.utcnow() - timedelta(hours=self.ttl_hours)
+        deleted = IdempotencyKey.query.filter(
+            IdempotencyKey.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        with self._lock:
+            self._evicted_at = time.monotonic()
+        return deleted
+
+    def evict_if_due(self):
+        """Evict if the last eviction is EVICT_SECONDS old. Call with no pending session changes.
+
+        Never raises, so a failed eviction can't change the response of the
+        committed request that triggered it; the next round retries.
+        """
+        with self._lock:
+            due = self._evicted_at is None or time.monotonic() - self._evicted_at >= self.EVICT_SECONDS
+            if due:
+                # Claim this round so concurrent requests don't evict too
+                self._evicted_at = time.monotonic()
+        if due:
+            try:
+                return self.evict()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Idempotency key eviction failed: {e}")
+        return 0
+
+    # Route decorator
+
+    def idempotent(self, view):
+        """Apply a POST handler at most once per Idempotency-Key header.
+
+        Requests without the header are handled as before. Only 2xx
+        responses are stored; a failed request can be retried with the
+        same key.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(self.HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+            try:
+                self.validate_key(key)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            existing = self.get([key]).get(key)
+            if existing is None:
+                db.session.info[self.SESSION_KEY] = (key, request.endpoint)
+                try:
+                    response = make_response(view(*args, **kwargs))
+                finally:
+                    db.session.info.pop(self.SESSION_KEY, None)
+
+                if 200 <= response.status_code < 300:
+                    self.store_response(key, response.status_code, response.get_json())
+                    self.evict_if_due()
+                    return response
+
+                # A concurrent request with the same key may have won the insert
+                db.session.rollback()
+                existing = self.get([key]).get(key)
+                if existing is None:
+                    return response
+
+            return self.replay(existing, request.endpoint)
+
+        return wrapper
+
+    def replay(self, row, endpoint):
+        """Return the stored response of a used key."""
+        if row.endpoint != endpoint:
+            return jsonify({'error': f'Idempotency key was used for {row.endpoint}'}), 422
+        if row.response is None:
+            return jsonify({'error': 'A request with this Idempotency-Key is in progress or its response was lost'}), 409
+        response = make_response(row.response, row.status_code)
+        response.mimetype = 'application/json'
+        response.headers[self.REPLAYED_HEADER] = 'true'
+        return response
+
+# Shared per-process store
+idempotency_store = IdempotencyStore()
+
+@event.listens_for(Session, 'before_commit')
+def _reserve_pending_key(session):
+    pending = session.info.pop(IdempotencyStore.SESSION_KEY, None)
+    if pending:
+        key, endpoint = pending
+        idempotency_store.reserve(session, key, endpoint)
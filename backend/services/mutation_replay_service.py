@@ -0,0 +1,289 @@
+from datetime import datetime
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.food import Food
+from db.database import db
+from services.diary_batch_service import DiaryBatchService
+from services.exercise_service import ExerciseService
+from services.idempotency_store import IdempotencyKeyInProgress, IdempotencyStore, idempotency_store
+from services.weight_service import WeightService
+
+class MutationReplayService:
+    """Applies an offline client's queue of mutations in one transaction.
+
+    A mutation is {'type', 'key', 'id' or 'ref', 'data'}: type is one of
+    MUTATION_TYPES, key an optional Idempotency-Key, id the row an update
+    or delete targets and ref, instead of id, the key of an earlier add
+    (in this batch or a previous request) whose row it targets. data is
+    what the corresponding POST or PUT endpoint takes.
+
+    All keys and refs are looked up with one query. A mutation whose key
+    was already applied, here or through the single endpoint it mirrors,
+    is skipped and returns the stored result with replayed=True. The keys
+    of the applied mutations are stored in the same transaction, under the
+    mirrored endpoint's name where there is one, so a retry may go through
+    either path. Consecutive diary adds are inserted together with one
+    statement.
+
+    Mutations are applied in order and all or nothing: the first invalid
+    one raises ValueError (LookupError for a missing row, and
+    IdempotencyKeyInProgress for a key whose first request is still
+    running) naming its index. Deleting a row that is already gone is not
+    an error. Nothing is committed; the caller commits once.
+    """
+
+    MAX_MUTATIONS = 1000
+
+    # Mutation types, with the endpoint whose Idempotency-Keys they share
+    MUTATION_TYPES = {
+        'diary_entry.add': 'diary.add_diary_entry',
+        'diary_entry.update': None,
+        'diary_entry.delete': None,
+        'exercise.add': 'exercise.add_exercise',
+        'exercise.update': None,
+        'exercise.delete': None,
+        'weight.add': 'weight.add_weight_entry',
+        'weight.update': None,
+        'weight.delete': None,
+    }
+
+    def __init__(self):
+        self.db = db
+        self.diary_batch_service = DiaryBatchService()
+        self.exercise_service = ExerciseService()
+        self.weight_service = WeightService()
+
+    # Validation
+
+    def _parse(self, mutations):
+        if not isinstance(mutations, list) or not mutations:
+            raise ValueError('mutations must be a non-empty list')
+        if len(mutations) > self.MAX_MUTATIONS:
+            raise ValueError(f'At most {self.MAX_MUTATIONS} mutations per replay')
+
+        for index, mutation in enumerate(mutations):
+            try:
+                if not isinstance(mutation, dict):
+                    raise ValueError('Mutation must be an object')
+                if mutation.get('type') not in self.MUTATION_TYPES:
+                    raise ValueError(f"Unknown mutation type: {mutation.get('type')}")
+                if 'key' in mutation:
+                    IdempotencyStore.validate_key(mutation['key'])
+                if not isinstance(mutation.get('data', {}), dict):
+                    raise ValueError('data must be an object')
+                if not mutation['type'].endswith('.add'):
+                    if 'ref' in mutation:
+                        IdempotencyStore.validate_key(mutation['ref'])
+                    elif not isinstance(mutation.get('id'), int) or isinstance(mutation.get('id'), bool):
+                        raise ValueError('Updates and deletes need an integer id or a ref')
+            except ValueError as e:
+                raise ValueError(f'mutations[{index}]: {e}')
+
+    @staticmethod
+    def _parse_date(data):
+        if 'date' in data:
+            data['date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        return data
+
+    @staticmethod
+    def _stored_id(response):
+        """Row id in a stored result or single endpoint response."""
+        if not isinstance(response, dict):
+            return None
+        if 'id' in response:
+            return response['id']
+        return (response.get('data') or {}).get('id')
+
+    # Replay
+
+    def replay(self, mutations):
+        """Apply the mutations in order.
+
+        Returns (results, food association changes). Each result is
+        {'index', 'key', 'type', 'status', 'replayed', 'data'}.
+        """
+        self._parse(mutations)
+
+        names = [m['key'] for m in mutations if 'key' in m] + [m['ref'] for m in mutations if 'ref' in m]
+        stored = idempotency_store.get(names)
+
+        results = [None] * len(mutations)
+        applied_keys = {}
+        association_changes = []
+        adds = []
+
+        def resolve(index, mutation):
+            if 'ref' not in mutation:
+                return mutation.get('id')
+            ref = mutation['ref']
+            add = mutation['type'].split('.')[0] + '.add'
+            if ref in applied_keys:
+                result = results[applied_keys[ref]]
+                kind, response = result['type'], result['data']
+            elif ref in stored:
+                kind, response = stored[ref].endpoint, IdempotencyStore.stored_response(stored[ref])
+            else:
+                kind, response = None, None
+            row_id = self._stored_id(response) if kind in (add, self.MUTATION_TYPES[add]) else None
+            if row_id is None:
+                raise LookupError(f'mutations[{index}]: ref {ref} is not a known {add}')
+            return row_id
+
+        def insert_adds():
+            if adds:
+                association_changes.extend(self._add_diary_entries(adds, results))
+                adds.clear()
+
+        for index, mutation in enumerate(mutations):
+            key = mutation.get('key')
+            kind = mutation['type']
+            if key in applied_keys:
+                # Repeated within the batch; filled in from the first below
+                continue
+            if key in stored:
+                row = stored[key]
+                if row.endpoint not in (kind, self.MUTATION_TYPES[kind]):
+                    raise ValueError(f'mutations[{index}]: Idempotency key was used for {row.endpoint}')
+                if row.response is None:
+                    raise IdempotencyKeyInProgress(
+                        f'mutations[{index}]: A request with this Idempotency-Key is in progress or its response was lost'
+                    )
+                results[index] = {
+                    'index': index, 'key': key, 'type': kind, 'status': row.status_code,
+                    'replayed': True, 'data': IdempotencyStore.stored_response(row)
+                }
+                continue
+            if key is not None:
+                applied_keys[key] = index
+
+            if kind == 'diary_entry.add':
+                adds.append((index, mutation))
+                continue
+            insert_adds()
+
+            model, action = kind.split('.')
+            status, data, changes = getattr(self, f'_{action}_{model}')(
+                index, resolve(index, mutation), dict(mutation.get('data', {}))
+            )
+            association_changes.extend(changes)
+            results[index] = {
+                'index': index, 'key': key, 'type': kind, 'status': status,
+                'replayed': False, 'data': data
+            }
+        insert_adds()
+
+        for index, mutation in enumerate(mutations):
+            if results[index] is None:
+                first = results[applied_keys[mutation['key']]]
+                results[index] = dict(first, index=index, replayed=True)
+
+        for key, index in applied_keys.items():
+            result = results[index]
+            endpoint = self.MUTATION_TYPES[result['type']] or result['type']
+            idempotency_store.reserve(self.db.session, key, endpoint, result['status'], result['data'])
+
+        return results, association_changes
+
+    # Handlers
+
+    def _add_diary_entries(self, adds, results):
+        """Insert a run of consecutive diary adds with one statement."""
+        items = [mutation.get('data', {}) for _, mutation in adds]
+        rows, foods, errors = self.diary_batch_service.validate(items)
+        if errors:
+            position = min(errors)
+            index = adds[position][0]
+            message = errors[position]
+            if message.endswith('not found'):
+                raise LookupError(f'mutations[{index}]: {message}')
+            raise ValueError(f'mutations[{index}]: {message}')
+
+        entry_ids, association_changes = self.diary_batch_service.add_entries(rows, foods)
+        for (index, mutation), entry_id, row in zip(adds, entry_ids, rows):
+            results[index] = {
+                'index': index, 'key': mutation.get('key'), 'type': mutation['type'], 'status': 201,
+                'replayed': False, 'data': DiaryEntry(id=entry_id, **row).to_dict(foods[row['food_id']])
+            }
+        return association_changes
+
+    def _load_entry(self, entry_id):
+        return self.db.session.query(DiaryEntry, Food).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        ).filter(DiaryEntry.id == entry_id).first()
+
+    def _update_diary_entry(self, index, entry_id, data):
+        row = self._load_entry(entry_id)
+        if not row:
+            raise LookupError(f'mutations[{index}]: Entry not found')
+        entry, food = row
+        try:
+            food, association_changes = self.diary_batch_service.update_entry(entry, food, data)
+        except (ValueError, LookupError) as e:
+            raise type(e)(f'mutations[{index}]: {e}')
+        self.db.session.flush()
+        return 200, entry.to_dict(food), association_changes
+
+    def _delete_diary_entry(self, index, entry_id, data):
+        row = self._load_entry(entry_id)
+        if not row:
+            return 200, {'id': entry_id, 'deleted': False}, []
+        association_changes = self.diary_batch_service.delete_entry(*row)
+        return 200, {'id': entry_id, 'deleted': True}, association_changes
+
+    def _add_exercise(self, index, _, data):
+        for field in ('name', 'duration_minutes', 'calories_burned'):
+            if field not in data:
+                raise ValueError(f'mutations[{index}]: Missing required field: {field}')
+        try:
+            self._parse_date(data)
+        except (TypeError, ValueError):
+            raise ValueError(f'mutations[{index}]: Invalid date format. Use YYYY-MM-DD')
+        exercise = self.exercise_service.add_exercise(
+            name=data['name'],
+            duration_minutes=data['duration_minutes'],
+            calories_burned=data['calories_burned'],
+            target_date=data.get('date'),
+            commit=False
+        )
+        self.db.session.flush()
+        return 201, exercise.to_dict(), []
+
+    def _update_exercise(self, index, exercise_id, data):
+        try:
+            self._parse_date(data)
+        except (TypeError, ValueError):
+            raise ValueError(f'mutations[{index}]: Invalid date format. Use YYYY-MM-DD')
+        exercise = self.exercise_service.update_exercise(exercise_id, data, commit=False)
+        if not exercise:
+            raise LookupError(f'mutations[{index}]: Exercise not found')
+        self.db.session.flush()
+        return 200, exercise.to_dict(), []
+
+    def _delete_exercise(self, index, exercise_id, data):
+        deleted = self.exercise_service.delete_exercise(exercise_id, commit=False)
+        return 200, {'id': exercise_id, 'deleted': deleted}, []
+
+    def _add_weight(self, index, _, data):
+        if 'weight_kg' not in data:
+            raise ValueError(f'mutations[{index}]: Missing required field: weight_kg')
+        try:
+            self._parse_date(data)
+        except (TypeError, ValueError):
+            raise ValueError(f'mutations[{index}]: Invalid date format. Use YYYY-MM-DD')
+        weight_entry = self.weight_service.add_weight(data.get('date'), data['weight_kg'], commit=False)
+        self.db.session.flush()
+        return 201, weight_entry.to_dict(), []
+
+    def _update_weight(self, index, weight_id, data):
+        try:
+            self._parse_date(data)
+        except (TypeError, ValueError):
+            raise ValueError(f'mutations[{index}]: Invalid date format. Use YYYY-MM-DD')
+        weight_entry = self.weight_service.update_weight(weight_id, data, commit=False)
+        if not weight_entry:
+            raise LookupError(f'mutations[{index}]: Weight entry not found')
+        self.db.session.flush()
+        return 200, weight_entry.to_dict(), []
+
+    def _delete_weight(self, index, weight_id, data):
+        deleted = self.weight_service.delete_weight(weight_id, commit=False)
+        return 200, {'id': weight_id, 'deleted': deleted}, []
@@ -0,0 +1,185 @@
+from datetime import datetime
+from sqlalchemy import and_, bindparam, case, func, insert
+from db.models.daily_nutrition_total import DailyNutritionTotal
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.food import Food
+from db.models.nutrient_vector import FIELDS, NutrientVector
+from db.database import db
+
+class NutritionRollupService:
+    """Keeps daily_nutrition_totals in sync with diary_entries.
+
+    Apart from ensure_backfilled, none of the methods commit; callers commit
+    together with the diary change so the rollup is updated in the same
+    transaction. Entry changes are applied as atomic increments (an upsert
+    on SQLite and Postgres), never read-modify-write.
+    """
+
+    RECOMPUTE_CHUNK_SIZE = 500
+
+    def __init__(self):
+        self.db = db
+
+    def _dialect(self):
+        return self.db.engine.dialect.name
+
+    def _apply(self, grouped, sign):
+        """Add or remove {(date, meal_type): (count, summed vector)} with atomic updates.
+
+        Totals are changed in the database (`col = col + :delta`) rather
+        than read and written back, so concurrent writers to the same day
+        never lose each other's changes.
+        """
+        if not grouped:
+            return 0
+        table = DailyNutritionTotal.__table__
+        now = datetime.utcnow()
+        rows = []
+        for (target_date, meal_type), (count, sums) in grouped.items():
+            row = {'date': target_date, 'meal_type': meal_type, 'entry_count': count, 'updated_at': now}
+            row.update(zip(FIELDS, sums))
+            rows.append(row)
+
+        # Update parameters can't share the column names
+        params = [{f'd_{key}': value for key, value in row.items()} for row in rows]
+        match = and_(table.c.date == bindparam('d_date'), table.c.meal_type == bindparam('d_meal_type'))
+
+        if sign < 0:
+            # The last entry of a meal resets the row instead of leaving
+            # floating point residue
+            emptied = table.c.entry_count <= bindparam('d_entry_count')
+            values = {
+                field: case((emptied, 0.0), else_=table.c[field] - bindparam(f'd_{field}'))
+                for field in Food.NUTRIENT_FIELDS
+            }
+            values['entry_count'] = case((emptied, 0), else_=table.c.entry_count - bindparam('d_entry_count'))
+            values['updated_at'] = bindparam('d_updated_at')
+            self.db.session.execute(table.update().where(match).values(values), params)
+            return len(rows)
+
+        dialect = self._dialect()
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(table)
+            set_ = {field: table.c[field] + stmt.excluded[field] for field in Food.NUTRIENT_FIELDS}
+            set_['entry_count'] = table.c.entry_count + stmt.excluded.entry_count
+            set_['updated_at'] = stmt.excluded.updated_at
+            self.db.session.execute(
+                stmt.on_conflict_do_update(index_elements=['date', 'meal_type'], set_=set_), rows
+            )
+            return len(rows)
+
+        # Other databases: increment existing rows, insert the missing ones
+        values = {field: table.c[field] + bindparam(f'd_{field}') for field in Food.NUTRIENT_FIELDS}
+        values['entry_count'] = table.c.entry_count + bindparam('d_entry_count')
+        values['updated_at'] = bindparam('d_updated_at')
+        for row, row_params in zip(rows, params):
+            result = self.db.session.execute(table.update().where(match).values(values), row_params)
+            if result.rowcount == 0:
+                self.db.session.execute(insert(table), row)
+        return len(rows)
+
+    def apply_entry(self, target_date, meal_type, values, sign=1):
+        """Add (sign=1) or remove (sign=-1) one entry's nutrient vector."""
+        return self._apply({(target_date, meal_type): (1, values)}, sign)
+
+    def add_entry(self, entry, food):
+        return self.apply_entry(entry.date, entry.meal_type, entry.nutrient_vector(food), 1)
+
+    def remove_entry(self, entry, food):
+        return self.apply_entry(entry.date, entry.meal_type, entry.nutrient_vector(food), -1)
+
+    def add_entries(self, entries):
+        """Add many new entries given as (date, meal_type, nutrient vector).
+
+        Entries are summed per (date, meal_type) first, so each total is
+        updated once, with one executemany for all of them.
+        """
+        grouped = {}
+        for target_date, meal_type, values in entries:
+            count, sums = grouped.get((target_date, meal_type), (0, NutrientVector.zeros()))
+            NutrientVector.add(sums, values)
+            grouped[(target_date, meal_type)] = (count + 1, sums)
+        return self._apply(grouped, 1)
+
+    def _aggregate_rows(self, date_filter=None):
+        """Sum diary entries per (date, meal_type) straight from the raw tables."""
+        query = self.db.session.query(
+            DiaryEntry.date,
+            DiaryEntry.meal_type,
+            func.count(DiaryEntry.id).label('entry_count'),
+            *[
+                func.coalesce(func.sum(DiaryEntry.nutrient_expression(field)), 0.0).label(field)
+                for field in Food.NUTRIENT_FIELDS
+            ]
+        ).outerjoin(
+            Food, DiaryEntry.food_id == Food.id
+        )
+
+        if date_filter is not None:
+            query = query.filter(DiaryEntry.date.in_(date_filter))
+
+        return query.group_by(DiaryEntry.date, DiaryEntry.meal_type).all()
+
+    def _replace_rows(self, rows, date_filter=None):
+        delete_query = DailyNutritionTotal.query
+        if date_filter is not None:
+            delete_query = delete_query.filter(DailyNutritionTotal.date.in_(date_filter))
+        delete_query.delete(synchronize_session=False)
+
+        values = []
+        for row in rows:
+            value = {
+                'date': row.date,
+                'meal_type': row.meal_type,
+                'entry_count': row.entry_count
+            }
+            for field in Food.NUTRIENT_FIELDS:
+                value[field] = getattr(row, field)
+            values.append(value)
+
+        if values:
+            self.db.session.execute(insert(DailyNutritionTotal), values)
+
+        return len(values)
+
+    def recompute_dates(self, dates):
+        """Recompute the rollup for the given dates from diary_entries."""
+        dates = list(dates)
+        count = 0
+
+        # Chunk to stay well below the database's bound parameter limit
+        for i in range(0, len(dates), self.RECOMPUTE_CHUNK_SIZE):
+            chunk = dates[i:i + self.RECOMPUTE_CHUNK_SIZE]
+            rows = self._aggregate_rows(chunk)
+            count += self._replace_rows(rows, chunk)
+
+        return count
+
+    def recompute_for_food(self, food_id):
+        """Recompute every day on which a food has been logged."""
+        food_dates = self.db.session.query(DiaryEntry.date).filter(
+            DiaryEntry.food_id == food_id
+        ).distinct()
+
+        return self.recompute_dates(row.date for row in food_dates.all())
+
+    def rebuild(self):
+        """Rebuild the whole rollup table from diary history."""
+        rows = self._aggregate_rows()
+        return self._replace_rows(rows)
+
+    def ensure_backfilled(self):
+        """Backfill the rollup if it is empty but diary entries exist."""
+        has_totals = self.db.session.query(DailyNutritionTotal.id).first() is not None
+        has_entries = self.db.session.query(DiaryEntry.id).first() is not None
+
+        if has_entries and not has_totals:
+            count = self.rebuild()
+            self.db.session.commit()
+            return count
+
+        return 0
@@ -0,0 +1,215 @@
+import heapq
+import os
+import threading
+import time
+from datetime import date, timedelta
+from sqlalchemy import func
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+
+class RecentFoodsIndex:
+    """In-memory index of recently and frequently logged foods per meal type.
+
+    For each meal type it holds {food_id: {date: seq}}, the dates within
+    the last MAX_DAYS days on which the food was part of that meal. seq
+    orders foods that joined their meal on the same date (the first entry
+    id when loaded, a running counter afterwards). A food's frequency over a
+    window is the number of its dates in the window, i.e. the number of
+    meals it was eaten in, and its recency is its latest date.
+
+    Ranked lists are cached per (meal type, days, order) up to TOP_K foods
+    and dropped when a change touches the meal type or the day rolls over,
+    so repeated reads cost O(limit). Meal type None ranks over all meal
+    types, counting days rather than meals.
+
+    The index is fed the changes FoodAssociationService returns, which
+    carry the date of the meal a food joined or left: writes in this
+    process are applied with apply() after commit, and changes made by
+    other processes are picked up by a reload when the 'food_associations'
+    catalog version has changed.
+    """
+
+    MAX_DAYS = 90
+    ORDERS = ('recent', 'frequent')
+    TOP_K = 50
+
+    def __init__(self, refresh_seconds=None):
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv('RECENT_FOODS_REFRESH_SECONDS', 30))
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._dates = {}
+        self._top = {}
+        self._seq = 0
+        self._today = None
+        self._version = None
+        self._checked_at = 0.0
+        self.loaded = False
+
+    # Building
+
+    def build(self, rows, today=None):
+        """Build the index from (meal_type, food_id, date, seq) rows."""
+        today = today or date.today()
+        cutoff = today - timedelta(days=self.MAX_DAYS - 1)
+        dates = {}
+        seq = 0
+        for meal_type, food_id, meal_date, row_seq in rows:
+            seq = max(seq, row_seq)
+            if meal_date >= cutoff:
+                dates.setdefault(meal_type, {}).setdefault(food_id, {})[meal_date] = row_seq
+
+        with self._lock:
+            self._dates = dates
+            self._top = {}
+            self._seq = max(self._seq, seq)
+            self._today = today
+            self.loaded = True
+
+    def load_from_db(self):
+        """Build the index from the last MAX_DAYS days of diary entries."""
+        session = db.session
+        version = CatalogVersion.get(session, 'food_associations')
+        today = date.today()
+        rows = session.query(
+            DiaryEntry.meal_type, DiaryEntry.food_id, DiaryEntry.date, func.min(DiaryEntry.id)
+        ).filter(
+            DiaryEntry.date >= today - timedelta(days=self.MAX_DAYS - 1)
+        ).group_by(
+            DiaryEntry.meal_type, DiaryEntry.food_id, DiaryEntry.date
+        ).all()
+
+        self.build(rows, today)
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        """Reload if the diary changed in another process since the last check."""
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+
+        version = CatalogVersion.get(db.session, 'food_associations')
+        if not self.loaded or version != self._version:
+            self.load_from_db()
+
+    # Incremental updates
+
+    def apply(self, changes):
+        """Apply changes returned by FoodAssociationService after commit."""
+        if not self.loaded or not changes:
+            return
+
+        with self._lock:
+            cutoff = self._today - timedelta(days=self.MAX_DAYS - 1)
+            for meal_type, food_id, _, sign, _, meal_date in changes:
+                if meal_date < cutoff:
+                    continue
+                by_food = self._dates.setdefault(meal_type, {})
+                if sign > 0:
+                    self._seq += 1
+                    by_food.setdefault(food_id, {})[meal_date] = self._seq
+                else:
+                    food_dates = by_food.get(food_id, {})
+                    food_dates.pop(meal_date, None)
+                    if not food_dates:
+                        by_food.pop(food_id, None)
+                self._invalidate(meal_type)
+
+    def _invalidate(self, meal_type):
+        for key in [key for key in self._top if key[0] in (meal_type, None)]:
+            del self._top[key]
+
+    def _roll_over(self, today):
+        """Drop dates that fell out of the index when the day changes. Caller holds the lock."""
+        if today == self._today:
+            return
+        cutoff = today - timedelta(days=self.MAX_DAYS - 1)
+        for by_food in self._dates.values():
+            for food_id in list(by_food):
+                food_dates = by_food[food_id]
+                for meal_date in [d for d in food_dates if d < cutoff]:
+                    del food_dates[meal_date]
+                if not food_dates:
+                    del by_food[food_id]
+        self._top = {}
+        self._today = today
+
+    # Lookup
+
+    def _food_dates(self, meal_type):
+        """Return {food_id: {date: seq}} for a meal type, or merged over all meal types."""
+        if meal_type is not None:
+            return self._dates.get(meal_type, {})
+
+        merged = {}
+        for by_food in self._dates.values():
+            for food_id, food_dates in by_food.items():
+                dates = merged.setdefault(food_id, {})
+                for meal_date, seq in food_dates.items():
+                    if seq > dates.get(meal_date, 0):
+                        dates[meal_date] = seq
+        return merged
+
+    def _ranked(self, meal_type, days, order, count):
+        cutoff = self._today - timedelta(days=days - 1)
+        ranked = []
+        for food_id, food_dates in self._food_dates(meal_type).items():
+            in_window = [(meal_date, seq) for meal_date, seq in food_dates.items() if meal_date >= cutoff]
+            if not in_window:
+                continue
+            last_date, last_seq = max(in_window)
+            ranked.append((food_id, len(in_window), last_date, last_seq))
+
+        if order == 'recent':
+            key = lambda item: (item[2], item[3])
+        else:
+            key = lambda item: (item[1], item[2], item[3])
+        return heapq.nlargest(count, ranked, key=key)
+
+    def top(self, meal_type=None, days=30, order='recent', limit=20, today=None):
+        """Return up to limit foods as {'food_id', 'count', 'last_date'}.
+
+        count is the number of meals (days when meal_type is None) in the
+        last `days` days, today included, that contained the food.
+        """
+        if not 1 <= days <= self.MAX_DAYS:
+            raise ValueError(f'days must be between 1 and {self.MAX_DAYS}')
+        if order not in self.ORDERS:
+            raise ValueError(f"order must be one of: {', '.join(self.ORDERS)}")
+
+        with self._lock:
+            self._roll_over(today or date.today())
+            if limit > self.TOP_K:
+                ranked = self._ranked(meal_type, days, order, limit)
+            else:
+                key = (meal_type, days, order)
+                ranked = self._top.get(key)
+                if ranked is None:
+                    ranked = self._top[key] = tuple(self._ranked(meal_type, days, order, self.TOP_K))
+
+        return [
+            {'food_id': food_id, 'count': count, 'last_date': last_date}
+            for food_id, count, last_date, _ in ranked[:limit]
+        ]
+
+    def suggestions(self, meal_type=None, days=30, limit=10, today=None):
+        """Return the recent and frequent lists for one meal type together."""
+        return {
+            order: self.top(meal_type, days, order, limit, today)
+            for order in self.ORDERS
+        }
+
+    def stats(self):
+        return {
+            'meal_types': len(self._dates),
+            'foods': sum(len(by_food) for by_food in self._dates.values()),
+            'meal_dates': sum(len(d) for by_food in self._dates.values() for d in by_food.values()),
+            'cached_top_lists': len(self._top)
+        }
+
+# Shared per-process index
+recent_foods_index = RecentFoodsIndex()
@@ -0,0 +1,311 @@
+from datetime import datetime
+from numbers import Real
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload, selectinload
+from db.models.food import Food
+from db.models.nutrient_vector import NutrientMatrix, NutrientVector
+from db.models.recipe import Recipe
+from db.models.recipe_component import RecipeComponent
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.catalog_version import CatalogVersion
+from db.database import db
+from services.nutrition_rollup_service import NutritionRollupService
+from services.food_search_service import FoodSearchService
+from services.food_suggest_index import food_suggest_index
+from services.sync_service import SyncService
+
+class RecipeService:
+    """Recipes made of (food, grams) components.
+
+    Every recipe owns a Food row whose nutrient columns hold the recipe's
+    precomputed nutrition per 100g. Diary entries log that food like any
+    other, so reads and the daily rollup never look at components. The
+    vector is recomputed when the recipe is saved and when one of its
+    component foods changes (refresh_dependents), including recipes that
+    use the changed recipe as an ingredient.
+    """
+
+    CATEGORY = 'opskrift'
+
+    def __init__(self):
+        self.db = db
+        self.nutrition_rollup_service = NutritionRollupService()
+        self.food_search_service = FoodSearchService()
+
+    # Reads
+
+    def get_recipes(self):
+        """Return all recipes with their foods, ordered by name."""
+        return Recipe.query.options(joinedload(Recipe.food)).order_by(Recipe.name).all()
+
+    def get_recipe(self, recipe_id):
+        """Return one recipe with its food and components."""
+        return Recipe.query.options(
+            joinedload(Recipe.food),
+            selectinload(Recipe.components).joinedload(RecipeComponent.food)
+        ).filter(Recipe.id == recipe_id).first()
+
+    # Nutrition
+
+    @staticmethod
+    def compute_nutrients(components, foods, yield_grams=None):
+        """Return (nutrients per 100g, total grams) for [(food_id, grams)].
+
+        A component whose food is missing from foods (deleted since)
+        contributes its weight but no nutrients.
+        """
+        total_grams = sum(grams for _, grams in components)
+        matrix = NutrientMatrix.from_foods(
+            foods[food_id] for food_id in {food_id for food_id, _ in components} if food_id in foods
+        )
+        sums = matrix.totals(components)
+
+        weight = yield_grams or total_grams
+        return NutrientVector.to_dict(NutrientVector.scaled(sums, 100.0 / weight)), total_grams
+
+    def _store_nutrients(self, recipe, foods):
+        """Recompute the recipe's vector into its food. Returns True if it changed."""
+        components = [(component.food_id, component.grams) for component in recipe.components]
+        nutrients, total_grams = self.compute_nutrients(components, foods, recipe.yield_grams)
+
+        food = recipe.food
+        changed = any(abs((getattr(food, field) or 0.0) - value) > 1e-9 for field, value in nutrients.items())
+        for field, value in nutrients.items():
+            setattr(food, field, value)
+        recipe.total_grams = total_grams
+        if changed:
+            food.updated_at = datetime.now()
+        return changed
+
+    def _load_foods(self, food_ids):
+        food_ids = set(food_ids)
+        if not food_ids:
+            return {}
+        return {food.id: food for food in Food.query.filter(Food.id.in_(food_ids)).all()}
+
+    # Validation
+
+    @staticmethod
+    def _parse_components(components):
+        """Return [(food_id, grams)] or raise ValueError."""
+        if not isinstance(components, list) or not components:
+            raise ValueError('components must be a non-empty list')
+
+        parsed = []
+        for component in components:
+            if not isinstance(component, dict) or 'food_id' not in component or 'grams' not in component:
+                raise ValueError('Each component needs food_id and grams')
+            food_id, grams = component['food_id'], component['grams']
+            if not isinstance(food_id, int) or isinstance(food_id, bool):
+                raise ValueError('food_id must be an integer')
+            if not isinstance(grams, Real) or isinstance(grams, bool) or grams <= 0:
+                raise ValueError('grams must be a positive number')
+            parsed.append((food_id, float(grams)))
+        return parsed
+
+    @staticmethod
+    def _parse_yield(value):
+        if value is None:
+            return None
+        if not isinstance(value, Real) or isinstance(value, bool) or value <= 0:
+            raise ValueError('yield_grams must be a positive number')
+        return float(value)
+
+    def _check_name_free(self, name, food_id=None):
+        """Raise ValueError if another food already has the name."""
+        query = self.db.session.query(Food.id).filter(Food.name == name)
+        if food_id is not None:
+            query = query.filter(Food.id != food_id)
+        if query.first() is not None:
+            raise ValueError(f'A food named {name} already exists')
+
+    def _components_with_foods(self, components):
+        foods = self._load_foods(food_id for food_id, _ in components)
+        missing = [food_id for food_id, _ in components if food_id not in foods]
+        if missing:
+            raise ValueError(f'Food not found: {missing[0]}')
+        return foods
+
+    # Writes
+
+    def create_recipe(self, data):
+        """Create a recipe and its food. Raises ValueError on invalid data."""
+        name = (data.get('name') or '').strip()
+        if not name:
+            raise ValueError('Name is required')
+        self._check_name_free(name)
+        components = self._parse_components(data.get('components'))
+        yield_grams = self._parse_yield(data.get('yield_grams'))
+        foods = self._components_with_foods(components)
+
+        now = datetime.now()
+        food = Food(name=name, category=self.CATEGORY, used=0, created_at=now, updated_at=now)
+        recipe = Recipe(name=name, food=food, yield_grams=yield_grams)
+        recipe.components = [RecipeComponent(food_id=food_id, grams=grams) for food_id, grams in components]
+        self._store_nutrients(recipe, foods)
+
+        self.db.session.add(recipe)
+        self.db.session.flush()
+        self.food_search_service.index_food(food)
+        CatalogVersion.bump(self.db.session, 'foods')
+        self.db.session.commit()
+        food_suggest_index.update_food(food)
+        return recipe
+
+    def update_recipe(self, recipe_id, data):
+        """Update name, yield or components. Raises ValueError on invalid data."""
+        recipe = self.get_recipe(recipe_id)
+        if not recipe:
+            return None
+
+        if 'name' in data:
+            name = (data.get('name') or '').strip()
+            if not name:
+                raise ValueError('Name is required')
+            self._check_name_free(name, recipe.food_id)
+            recipe.name = name
+            recipe.food.name = name
+
+        if 'yield_grams' in data:
+            recipe.yield_grams = self._parse_yield(data['yield_grams'])
+
+        if 'components' in data:
+            components = self._parse_components(data['components'])
+            self._components_with_foods(components)
+
+            # A recipe may use other recipes, but not one that uses it
+            excluded = {recipe.food_id} | {r.food_id for r in self._dependent_recipes(recipe.food_id)}
+            if any(food_id in excluded for food_id, _ in components):
+                raise ValueError('A recipe cannot contain itself')
+
+            recipe.components = [RecipeComponent(food_id=food_id, grams=grams) for food_id, grams in components]
+
+        foods = self._load_foods(component.food_id for component in recipe.components)
+        if self._store_nutrients(recipe, foods):
+            self.refresh_dependents(recipe.food_id, include_food=True)
+
+        self.food_search_service.index_food(recipe.food)
+        CatalogVersion.bump(self.db.session, 'foods')
+        self.db.session.commit()
+        food_suggest_index.update_food(recipe.food)
+        return recipe
+
+    def delete_recipe(self, recipe_id):
+        """Delete a recipe.
+
+        Its food is deleted too unless it has been logged or is used in
+        another recipe; then it stays as a plain food with its last values.
+        """
+        recipe = Recipe.query.get(recipe_id)
+        if not recipe:
+            return False
+
+        food_id = recipe.food_id
+        in_use = (
+            self.db.session.query(DiaryEntry.id).filter(DiaryEntry.food_id == food_id).first() is not None
+            or self.db.session.query(RecipeComponent.id).filter(RecipeComponent.food_id == food_id).first() is not None
+        )
+
+        self.db.session.delete(recipe)
+        if not in_use:
+            self.db.session.flush()
+            self.db.session.delete(recipe.food)
+            self.food_search_service.remove_food(food_id)
+        CatalogVersion.bump(self.db.session, 'foods')
+        self.db.session.commit()
+        if not in_use:
+            food_suggest_index.remove_food(food_id)
+        return True
+
+    # Invalidation
+
+    def _dependent_recipes(self, food_id):
+        """Return every recipe that uses food_id, directly or through other recipes."""
+        found = {}
+        frontier = {food_id}
+        while frontier:
+            recipes = Recipe.query.options(
+                joinedload(Recipe.food), selectinload(Recipe.components)
+            ).join(RecipeComponent).filter(RecipeComponent.food_id.in_(frontier)).all()
+            new = [recipe for recipe in recipes if recipe.id not in found]
+            for recipe in new:
+                found[recipe.id] = recipe
+            frontier = {recipe.food_id for recipe in new}
+        return list(found.values())
+
+    def _recompute(self, recipes):
+        """Recompute recipes, each after the given recipes it contains.
+
+        Returns the food ids of the recipes whose vector changed.
+        """
+        recipe_foods = {recipe.food_id for recipe in recipes}
+        foods = self._load_foods(
+            component.food_id for recipe in recipes for component in recipe.components
+        )
+
+        changed = set()
+        done = set()
+        pending = list(recipes)
+        while pending:
+            ready = [
+                recipe for recipe in pending
+                if all(c.food_id not in recipe_foods or c.food_id in done for c in recipe.components)
+            ] or pending[:1]
+            for recipe in ready:
+                if self._store_nutrients(recipe, foods):
+                    changed.add(recipe.food_id)
+                done.add(recipe.food_id)
+            pending = [recipe for recipe in pending if recipe.food_id not in done]
+        return changed
+
+    def _refresh_logged(self, food_filter):
+        """Recompute the rollup for every day a matching food was logged.
+
+        Snapshotted entries keep the values they were logged with. The
+        other matching entries are stamped, since their derived nutrition
+        changed and delta sync must resend them. Returns the number of days.
+        """
+        derived = [food_filter]
+        if DiaryEntry.snapshots():
+            derived.append(DiaryEntry.calories.is_(None))
+        dates = self.db.session.query(DiaryEntry.date).filter(*derived).distinct().all()
+        self.nutrition_rollup_service.recompute_dates(row.date for row in dates)
+        if dates:
+            SyncService.stamp(self.db.session, DiaryEntry, *derived)
+        return len(dates)
+
+    def refresh_dependents(self, food_id, include_food=False):
+        """Recompute the recipes that depend on a changed food.
+
+        Recipes are recomputed after the recipes they use, and the rollup
+        is recomputed for every day one of them was logged (and the food
+        itself with include_food) without a nutrient snapshot. Does not
+        commit. Returns the recomputed recipes.
+        """
+        recipes = self._dependent_recipes(food_id)
+        self._recompute(recipes)
+
+        changed_foods = {recipe.food_id for recipe in recipes}
+        if include_food:
+            changed_foods.add(food_id)
+        if changed_foods:
+            self._refresh_logged(DiaryEntry.food_id.in_(changed_foods))
+        return recipes
+
+    def refresh_changed_foods(self, food_ids):
+        """Recompute derived data after a bulk update of many foods' nutrients.
+
+        food_ids is a select of the changed food ids, so it may be large.
+        Every recipe is recomputed, and the rollup for every day one of the
+        foods or a recipe whose vector changed was logged. Does not commit.
+        Returns (number of changed recipes, number of recomputed days).
+        """
+        recipes = Recipe.query.options(
+            joinedload(Recipe.food), selectinload(Recipe.components)
+        ).all()
+        changed_recipes = self._recompute(recipes)
+
+        food_filter = DiaryEntry.food_id.in_(food_ids)
+        if changed_recipes:
+            food_filter = or_(food_filter, DiaryEntry.food_id.in_(changed_recipes))
+        return len(changed_recipes), self._refresh_logged(food_filter)
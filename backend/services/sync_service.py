@@ -0,0 +1,214 @@
+import os
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+from db.models.catalog_version import CatalogVersion
+from db.models.diary_entry_simple import DiaryEntry
+from db.models.exercise import Exercise
+from db.models.food import Food
+from db.models.sync_tombstone import SyncTombstone
+from db.models.user_goals import UserGoals
+from db.models.user_settings import UserSettings
+from db.models.weight import Weight
+from db.database import db
+
+class SyncService:
+    """Change tracking for delta sync of offline clients.
+
+    Every write transaction that touches a synced table stamps each row it
+    inserts or updates (the sync_version column) with its version; deleted
+    rows leave a tombstone with that version. ORM changes are stamped by a
+    before_flush listener. Core statements that write synced rows (batch
+    inserts, copies, usage counter flushes, food imports) include
+    version(session, model) themselves, and stamp() marks rows whose
+    derived values changed.
+
+    While the transaction runs, version() is a random negative placeholder
+    unique to it. A before_commit listener then takes the next 'sync'
+    catalog version and swaps it in with one UPDATE per touched table. The
+    UPDATE of the 'sync' row holds that row's lock until commit, so
+    versions become visible in commit order (a client that has seen
+    version N has seen every change up to N), but the lock is only held
+    for the commit itself rather than the whole transaction, so writers
+    don't wait on each other's work. changes_since(N) returns the rows
+    with a higher version and the ids deleted since, plus the cursor for
+    the next call.
+
+    Rows written before change tracking have no version and are only
+    returned by a full sync (since=0), which has reset=True: the client
+    replaces its copy instead of merging. Tombstones are kept for
+    SYNC_TOMBSTONE_DAYS days; a client whose cursor is older than the
+    pruned horizon (or ahead of the server) gets a full sync too.
+    """
+
+    SESSION_KEY = 'sync_version'
+    TABLES_KEY = 'sync_tables'
+
+    # Synced tables by the name used in requests, responses and tombstones
+    MODELS = {
+        'foods': Food,
+        'diary_entries': DiaryEntry,
+        'exercises': Exercise,
+        'weights': Weight,
+        'goals': UserGoals,
+        'settings': UserSettings,
+    }
+    NAMES = {model: name for name, model in MODELS.items()}
+
+    def __init__(self, tombstone_days=None):
+        if tombstone_days is None:
+            tombstone_days = int(os.getenv('SYNC_TOMBSTONE_DAYS', 90))
+        self.tombstone_days = tombstone_days
+        self.db = db
+
+    # Writing
+
+    @classmethod
+    def version(cls, session, model):
+        """Return the version to stamp on rows of model written in this transaction.
+
+        Before commit this is the transaction's placeholder, which
+        before_commit replaces in every table it was used for.
+        """
+        version = session.info.get(cls.SESSION_KEY)
+        if version is None:
+            version = session.info[cls.SESSION_KEY] = -random.randint(1, 2 ** 31 - 1)
+            session.info[cls.TABLES_KEY] = set()
+        if version < 0:
+            session.info[cls.TABLES_KEY].add(model.__table__)
+        return version
+
+    @classmethod
+    def stamp(cls, session, model, *criteria):
+        """Mark the rows of a synced model matching criteria as changed. Does not commit."""
+        table = model.__table__
+        session.execute(
+            update(table).where(*criteria).values(sync_version=cls.version(session, model))
+        )
+
+    @classmethod
+    def _before_flush(cls, session, flush_context, instances):
+        changed = [obj for obj in session.new if type(obj) in cls.NAMES]
+        changed += [
+            obj for obj in session.dirty
+            if type(obj) in cls.NAMES and session.is_modified(obj, include_collections=False)
+        ]
+        deleted = [obj for obj in session.deleted if type(obj) in cls.NAMES]
+        if not changed and not deleted:
+            return
+
+        for obj in changed:
+            obj.sync_version = cls.version(session, type(obj))
+        for obj in deleted:
+            session.add(SyncTombstone(
+                table_name=cls.NAMES[type(obj)], row_id=obj.id,
+                sync_version=cls.version(session, SyncTombstone)
+            ))
+
+    @classmethod
+    def _before_commit(cls, session):
+        # Flush first so every pending change carries the placeholder
+        session.flush()
+        placeholder = session.info.get(cls.SESSION_KEY)
+        if placeholder is None or placeholder > 0:
+            return
+        version = session.info[cls.SESSION_KEY] = CatalogVersion.next(session, 'sync')
+        for table in session.info.pop(cls.TABLES_KEY):
+            session.execute(
+                update(table).where(table.c.sync_version == placeholder).values(sync_version=version)
+            )
+
+    def prune(self):
+        """Delete tombstones older than tombstone_days and commit. Returns the number deleted."""
+        session = self.db.session
+        cutoff = datetime.utcnow() - timedelta(days=self.tombstone_days)
+        horizon = session.query(func.max(SyncTombstone.sync_version)).filter(
+            SyncTombstone.created_at < cutoff
+        ).scalar()
+        if horizon is None:
+            return 0
+
+        deleted = session.query(SyncTombstone).filter(
+            SyncTombstone.sync_version <= horizon
+        ).delete(synchronize_session=False)
+        # Clients behind the horizon may have missed deletions
+        session.execute(update(CatalogVersion).where(
+            CatalogVersion.name == 'sync_pruned', CatalogVersion.version < horizon
+        ).values(version=horizon))
+        if CatalogVersion.get(session, 'sync_pruned') < horizon:
+            session.add(CatalogVersion(name='sync_pruned', version=horizon))
+        session.commit()
+        return deleted
+
+    # Reading
+
+    def _serialize(self, name, since):
+        session = self.db.session
+        model = self.MODELS[name]
+        changed = (model.sync_version > since,) if since else ()
+
+        if model is DiaryEntry:
+            rows = session.query(DiaryEntry, Food).outerjoin(
+                Food, DiaryEntry.food_id == Food.id
+            ).filter(*changed).order_by(DiaryEntry.id).all()
+            return [entry.to_dict(food) for entry, food in rows]
+        if model is Food:
+            return [Food.to_api_dict(food) for food in session.query(Food).filter(*changed).order_by(Food.id)]
+        return [row.to_dict() for row in session.query(model).filter(*changed).order_by(model.id)]
+
+    def changes_since(self, since=0, tables=None):
+        """Return {'cursor', 'reset', 'changed': {table: rows}, 'deleted': {table: ids}}.
+
+        since is the cursor of the previous call (0 for a full sync).
+        tables limits the result to some of MODELS.
+        """
+        tables = list(tables or self.MODELS)
+        unknown = [name for name in tables if name not in self.MODELS]
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+        if since < 0:
+            raise ValueError('since must not be negative')
+
+        session = self.db.session
+        # Read the cursor before the rows: changes committed in between
+        # are returned now and again next time, never skipped
+        versions = dict(session.query(CatalogVersion.name, CatalogVersion.version).filter(
+            CatalogVersion.name.in_(['sync', 'sync_pruned'])
+        ).all())
+        cursor = versions.get('sync', 0)
+        if since > cursor or since < versions.get('sync_pruned', 0):
+            since = 0
+        # A full sync replaces the client's copy, which drops rows deleted
+        # before the first tracked change
+        reset = since == 0
+
+        changed = {name: self._serialize(name, since) for name in tables}
+
+        deleted = {name: [] for name in tables}
+        if since:
+            tombstones = session.query(SyncTombstone.table_name, SyncTombstone.row_id).filter(
+                SyncTombstone.sync_version > since,
+                SyncTombstone.table_name.in_(tables)
+            ).order_by(SyncTombstone.id).all()
+            # An id can be reused after a delete; the row that exists now wins
+            current = {name: {row['id'] for row in rows} for name, rows in changed.items()}
+            for table_name, row_id in tombstones:
+                if row_id not in current[table_name]:
+                    deleted[table_name].append(row_id)
+
+        return {'cursor': cursor, 'reset': reset, 'changed': changed, 'deleted': deleted}
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_synced_rows(session, flush_context, instances):
+    SyncService._before_flush(session, flush_context, instances)
+
+@event.listens_for(Session, 'before_commit')
+def _assign_sync_version(session):
+    SyncService._before_commit(session)
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_sync_version(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(SyncService.SESSION_KEY, None)
+        session.info.pop(SyncService.TABLES_KEY, None)
@@ -84,7 +84,9 @@ class UserSettingsService:
     def delete_settings() -> bool:
         """Delete all user settings"""
         try:
-            UserSettings.query.delete()
+            # One by one, so delta sync sees the deletions
+            for settings in UserSettings.query.all():
+                db.session.delete(settings)
             db.session.commit()
             return True
         except Exception as e:
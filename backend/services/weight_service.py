@@ -10,7 +10,7 @@ class WeightService:
         """Return all weight entries ordered by date."""
         return Weight.query.order_by(Weight.date.desc()).all()
     
-    def add_weight(self, target_date, weight_kg):
+    def add_weight(self, target_date, weight_kg, commit=True):
         """Create a new weight entry."""
         if target_date is None:
             target_date = date.today()
@@ -21,10 +21,11 @@ class WeightService:
         )
         
         self.db.session.add(weight_entry)
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return weight_entry
     
-    def update_weight(self, entry_id, data):
+    def update_weight(self, entry_id, data, commit=True):
         """Update an existing weight entry."""
         weight_entry = Weight.query.get(entry_id)
         if not weight_entry:
@@ -36,15 +37,17 @@ class WeightService:
         if 'date' in data:
             weight_entry.date = data['date']
         
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return weight_entry
     
-    def delete_weight(self, entry_id):
+    def delete_weight(self, entry_id, commit=True):
         """Delete a weight entry."""
         weight_entry = Weight.query.get(entry_id)
         if not weight_entry:
             return False
         
         self.db.session.delete(weight_entry)
-        self.db.session.commit()
+        if commit:
+            self.db.session.commit()
         return True
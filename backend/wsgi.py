@@ -0,0 +1,9 @@
+"""
+WSGI entry point til produktion.
+
+Brug: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
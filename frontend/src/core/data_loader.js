@@ -15,15 +15,21 @@ export class DataLoader {
             const today = new Date().toISOString().split('T')[0];
             console.log('Loading data for date:', today);
             
-            // Load all data in parallel
-            await Promise.all([
+            // Load foods and the date's data (one bootstrap request) in parallel
+            const [, bootstrapped] = await Promise.all([
                 AppState.loadFoods(),
-                AppState.loadDiary(today),
-                AppState.loadExercises(today),
-                AppState.loadWeights(),
-                AppState.loadGoals()
+                AppState.loadBootstrap(today)
             ]);
             
+            if (!bootstrapped) {
+                await Promise.all([
+                    AppState.loadDiary(today),
+                    AppState.loadExercises(today),
+                    AppState.loadWeights(),
+                    AppState.loadGoals()
+                ]);
+            }
+            
             console.log('Initial data loaded successfully');
             console.log('Current state:', AppState.getState());
         } catch (error) {
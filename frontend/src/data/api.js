@@ -75,6 +75,11 @@ export class ApiClient {
         });
     }
     
+    // Bootstrap API methods
+    async getBootstrap(date) {
+        return await this._request(`/bootstrap?date=${date}`);
+    }
+    
     // Diary API methods
     async getDiaryEntries(date) {
         return await this._request(`/diary/entries?date=${date}`);
@@ -162,6 +162,22 @@ export const AppState = {
         }
     },
     
+    async loadBootstrap(date) {
+        // Goals, diary, exercises and weights for a date in one request.
+        // Returns false so callers can fall back to the separate loads.
+        try {
+            const response = await api.getBootstrap(date);
+            this.setDiary({ date, entries: response.entries });
+            this.setExercises(response.exercises);
+            this.setWeights(response.weights);
+            handleGoalsApiResponse({ success: true, data: response.goals }, (goals) => this.setGoals(goals), () => {});
+            return true;
+        } catch (error) {
+            console.error('Failed to load bootstrap data:', error);
+            return false;
+        }
+    },
+    
     async loadGoals() {
         // Prevent multiple simultaneous calls
         if (this._loadingGoals) {